@@ -3,21 +3,502 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import Any, Dict, List
+from dataclasses import dataclass, replace
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import json
+import logging
+import re
 
+from ..config import settings
 
-def evaluate_alerts(hits: List[Dict[str, Any]], severities: List[str]) -> List[Dict[str, Any]]:
-    """Simple alert evaluation based on level mapping.
 
-    This is a placeholder; in production, load rules from config and apply.
+logger = logging.getLogger("alert_engine")
+
+SEVERITIES = ("high", "medium", "low")
+LEVEL_ORDER = ("trace", "debug", "info", "warn", "error", "fatal")
+_LEVEL_ALIASES = {"warning": "warn", "err": "error", "critical": "fatal", "crit": "fatal"}
+
+# Used when ALERT_RULES_PATH is not configured, addressable by `rules[].id`.
+BUILTIN_RULES: List[Dict[str, Any]] = [
+    {"id": "level-error", "levels": ["error"], "severity": "high"},
+    {"id": "level-warn", "levels": ["warn"], "severity": "medium"},
+    {"id": "level-info", "levels": ["info"], "severity": "low"},
+]
+BUILTIN_DEFAULT_SEVERITY: Optional[str] = "low"
+
+
+def _canon_level(level: Any) -> str:
+    lv = str(level or "").strip().lower()
+    return _LEVEL_ALIASES.get(lv, lv)
+
+
+def _canon_service(service: Any) -> str:
+    return str(service or "").strip().lower().replace("_", "-")
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """One alert rule; every configured condition must hold.
+
+    - `levels`: allowed levels (empty = any); `min_level` in config expands
+      to that level and everything above it.
+    - `services`: service scope (empty = any); `-`/`_` are equivalent.
+    - `keywords` / `pattern`: message must contain a keyword or match the regex.
+    """
+
+    id: str
+    severity: str
+    levels: FrozenSet[str] = frozenset()
+    services: FrozenSet[str] = frozenset()
+    keywords: Tuple[str, ...] = ()
+    pattern: Optional[str] = None
+    case_sensitive: bool = False
+
+    @property
+    def has_message_match(self) -> bool:
+        return bool(self.keywords or self.pattern)
+
+    def message_regex(self) -> str:
+        """The message condition as one standalone regex (reference form)."""
+        parts: List[str] = []
+        if self.keywords:
+            parts.extend(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        if self.pattern:
+            parts.append(f"(?:{self.pattern})")
+        body = "|".join(parts)
+        return body if self.case_sensitive else f"(?i:{body})"
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "AlertRule":
+        rid = str(raw.get("id") or "").strip()
+        if not rid:
+            raise ValueError("alert rule without id")
+        severity = str(raw.get("severity") or "").lower()
+        if severity not in SEVERITIES:
+            raise ValueError(f"alert rule {rid}: bad severity {severity!r}")
+        levels = {_canon_level(lv) for lv in raw.get("levels") or []}
+        if raw.get("min_level"):
+            lo = _canon_level(raw["min_level"])
+            if lo not in LEVEL_ORDER:
+                raise ValueError(f"alert rule {rid}: bad min_level {lo!r}")
+            levels |= set(LEVEL_ORDER[LEVEL_ORDER.index(lo):])
+        pattern = raw.get("pattern") or None
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"alert rule {rid}: bad pattern: {e}") from e
+        return cls(
+            id=rid,
+            severity=severity,
+            levels=frozenset(levels),
+            services=frozenset(_canon_service(s) for s in raw.get("services") or []),
+            keywords=tuple(str(k) for k in raw.get("keywords") or [] if str(k)),
+            pattern=pattern,
+            case_sensitive=bool(raw.get("case_sensitive", False)),
+        )
+
+    @property
+    def exact(self) -> bool:
+        """True when `es_filter()` selects exactly the documents this rule matches."""
+        return not self.has_message_match
+
+    def es_filter(self) -> Dict[str, Any]:
+        """ES clause for this rule.
+
+        `keywords` and `pattern` are not pushed down: ES matches analyzed
+        tokens (a phrase `timeout` misses `ReadTimeoutException`) and its
+        regexp is anchored and limited to keyword fields, while the matcher
+        works on substrings. For message rules the clause is a superset and
+        the compiled matcher makes the final decision.
+        """
+        clauses: List[Dict[str, Any]] = []
+        if self.levels:
+            clauses.append(_level_terms(sorted(self.levels)))
+        if self.services:
+            variants = sorted({v for s in self.services for v in (s, s.replace("-", "_"))})
+            clauses.append(
+                {
+                    "bool": {
+                        "should": [
+                            {"terms": {"service.keyword": variants}},
+                            {"terms": {"service": variants}},
+                            {"terms": {"fields.service.keyword": variants}},
+                            {"terms": {"fields.service": variants}},
+                        ],
+                        "minimum_should_match": 1,
+                    }
+                }
+            )
+        if not clauses:
+            return {"match_all": {}}
+        return {"bool": {"filter": clauses}}
+
+
+def _level_terms(levels: List[str]) -> Dict[str, Any]:
+    # keyword fields are case-sensitive; cover the aliases _canon_level
+    # accepts ("warning", "err", "critical", ...) in their common spellings
+    spellings = set(levels) | {a for a, canon in _LEVEL_ALIASES.items() if canon in levels}
+    variants = sorted({v for lv in spellings for v in (lv.lower(), lv.upper(), lv.capitalize())})
+    return {
+        "bool": {
+            "should": [
+                {"terms": {"loglevel.keyword": variants}},
+                {"terms": {"level.keyword": variants}},
+                {"terms": {"loglevel": variants}},
+                {"terms": {"level": variants}},
+            ],
+            "minimum_should_match": 1,
+        }
+    }
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation of literals factored into a trie (shared prefixes).
+
+    Python's `re` tries alternatives one by one; a trie-shaped pattern lets
+    it reject most offsets after one character, close to Aho-Corasick speed.
     """
-    severity_map = {"error": "high", "warn": "medium", "info": "low"}
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(sub) for ch, sub in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        out = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{out})?" if "" in node else out
+
+    return build(trie)
+
+
+def _required_literal(pattern: str, case_sensitive: bool) -> Optional[str]:
+    """Longest literal run (>= 3 chars) that every match of `pattern` contains.
+
+    Only top-level literals are considered; patterns with inline flags or
+    no usable run return None and are always verified by regex.
+    """
+    try:
+        import re._parser as sre_parse  # type: ignore[import-not-found]
+    except ImportError:  # Python < 3.11
+        import sre_parse  # type: ignore[no-redef]
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if case_sensitive and parsed.state.flags & re.IGNORECASE:
+        return None
+    best = ""
+    run: List[str] = []
+    for op, arg in list(parsed) + [(None, None)]:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    # str.lower() and re.IGNORECASE only agree on ASCII
+    if len(best) < 3 or not best.isascii():
+        return None
+    return best
+
+
+class CompiledRuleSet:
+    """Rules compiled into bitmask lookup tables and one literal automaton.
+
+    Rule `i` is bit `1 << i`; the first matching rule (config order) wins.
+    Per hit the work is: two dict lookups for the level/service candidate
+    mask, then (only if message rules are candidates) one scan of the
+    message with a trie regex over all keywords and pattern literals.
+    Pattern rules are only run when their required literal was seen, so
+    there is no per-rule loop on the common path.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], default_severity: Optional[str] = None) -> None:
+        self.rules: Tuple[AlertRule, ...] = tuple(rules)
+        self.default_severity = default_severity
+        self.by_id: Dict[str, AlertRule] = {r.id: r for r in self.rules}
+        all_mask = (1 << len(self.rules)) - 1
+
+        any_level = 0
+        level_masks: Dict[str, int] = {}
+        any_service = 0
+        service_masks: Dict[str, int] = {}
+        msg_mask = 0
+        # literal -> rules it satisfies directly (keywords) / rules to verify (patterns)
+        lits: Dict[bool, Dict[str, List[int]]] = {False: {}, True: {}}
+        self._patterns: Dict[int, "re.Pattern[str]"] = {}
+        always_verify = 0
+        for i, r in enumerate(self.rules):
+            bit = 1 << i
+            if r.levels:
+                for lv in r.levels:
+                    level_masks[lv] = level_masks.get(lv, 0) | bit
+            else:
+                any_level |= bit
+            if r.services:
+                for s in r.services:
+                    service_masks[s] = service_masks.get(s, 0) | bit
+            else:
+                any_service |= bit
+            if not r.has_message_match:
+                continue
+            msg_mask |= bit
+            cs = r.case_sensitive
+            for k in r.keywords:
+                key = k if cs else k.lower()
+                lits[cs].setdefault(key, [0, 0])[0] |= bit
+            if r.pattern:
+                self._patterns[i] = re.compile(r.pattern if cs else f"(?i:{r.pattern})")
+                lit = _required_literal(r.pattern, cs)
+                if lit is None:
+                    always_verify |= bit
+                else:
+                    lits[cs].setdefault(lit if cs else lit.lower(), [0, 0])[1] |= bit
+        self._any_level = any_level
+        self._level_masks = {lv: m | any_level for lv, m in level_masks.items()}
+        self._any_service = any_service
+        self._service_masks = {s: m | any_service for s, m in service_masks.items()}
+        self._msg_mask = msg_mask
+        self._plain_mask = all_mask & ~msg_mask
+        self._always_verify = always_verify
+        # Each offset reports only its longest literal; fold in every literal
+        # that is a prefix of it so shorter overlapping keywords still count.
+        self._scanners: List[Tuple[bool, "re.Pattern[str]", Dict[str, Tuple[int, int]]]] = []
+        for cs, table in lits.items():
+            if not table:
+                continue
+            folded: Dict[str, Tuple[int, int]] = {}
+            for lit in table:
+                direct = verify = 0
+                for n in range(1, len(lit) + 1):
+                    masks = table.get(lit[:n])
+                    if masks:
+                        direct |= masks[0]
+                        verify |= masks[1]
+                folded[lit] = (direct, verify)
+            rx = re.compile("(?=(" + _trie_regex(table) + "))")
+            self._scanners.append((cs, rx, folded))
+        self._level_cache: Dict[Any, int] = {}
+        self._service_cache: Dict[Any, int] = {}
+
+    def _candidates(self, src: Dict[str, Any]) -> int:
+        raw_level = src.get("level") or src.get("loglevel")
+        lm = self._level_cache.get(raw_level)
+        if lm is None:
+            lm = self._level_masks.get(_canon_level(raw_level), self._any_level)
+            if len(self._level_cache) < 4096:
+                self._level_cache[raw_level] = lm
+        if not lm:
+            return 0
+        raw_service = src.get("service") or (src.get("fields") or {}).get("service")
+        sm = self._service_cache.get(raw_service)
+        if sm is None:
+            sm = self._service_masks.get(_canon_service(raw_service), self._any_service)
+            if len(self._service_cache) < 4096:
+                self._service_cache[raw_service] = sm
+        return lm & sm
+
+    def _message_match(self, text: str, msg: int) -> int:
+        """Lowest rule index in `msg` whose message condition holds, else -1."""
+        direct = 0
+        verify = self._always_verify
+        lowered: Optional[str] = None
+        for cs, rx, folded in self._scanners:
+            if cs:
+                subject = text
+            else:
+                if lowered is None:
+                    lowered = text.lower()
+                subject = lowered
+            for m in rx.finditer(subject):
+                d, v = folded[m.group(1)]
+                direct |= d
+                verify |= v
+        direct &= msg
+        best = (direct & -direct).bit_length() - 1 if direct else len(self.rules)
+        # Regex verification only for pattern rules whose literal was seen
+        verify &= msg & ~direct & ((1 << best) - 1)
+        while verify:
+            low = verify & -verify
+            i = low.bit_length() - 1
+            if self._patterns[i].search(text):
+                return i
+            verify ^= low
+        return best if direct else -1
+
+    def match_one(self, src: Dict[str, Any]) -> Optional[AlertRule]:
+        cand = self._candidates(src)
+        if not cand:
+            return None
+        plain = cand & self._plain_mask
+        best = (plain & -plain).bit_length() - 1 if plain else len(self.rules)
+        # Only message rules ranked before the best plain rule can change the result
+        msg = cand & self._msg_mask & ((1 << best) - 1)
+        if msg:
+            text = src.get("message") or src.get("log")
+            if text:
+                i = self._message_match(str(text), msg)
+                if i >= 0:
+                    best = i
+        return self.rules[best] if best < len(self.rules) else None
+
+    def match_batch(self, hits: List[Dict[str, Any]]) -> List[Optional[AlertRule]]:
+        match = self.match_one
+        return [match(h.get("_source") or {}) for h in hits]
+
+    def subset(self, refs: List[Dict[str, Any]]) -> "CompiledRuleSet":
+        """Rules referenced by id (request order), with optional severity override.
+
+        Raises KeyError for unknown ids.
+        """
+        picked = []
+        for ref in refs:
+            rule = self.by_id[ref["id"]]
+            if ref.get("severity"):
+                rule = replace(rule, severity=str(ref["severity"]).lower())
+            picked.append(rule)
+        return CompiledRuleSet(picked, default_severity=None)
+
+
+def load_rule_set(path: str = "") -> CompiledRuleSet:
+    """Load rules from a JSON file (`{"default_severity": ..., "rules": [...]}`
+    or a bare list); fall back to the built-in level rules."""
+    if not path:
+        return CompiledRuleSet(
+            [AlertRule.from_dict(r) for r in BUILTIN_RULES], BUILTIN_DEFAULT_SEVERITY
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if isinstance(raw, list):
+        raw = {"rules": raw}
+    default = raw.get("default_severity")
+    if default is not None and default not in SEVERITIES:
+        raise ValueError(f"bad default_severity {default!r}")
+    rule_set = CompiledRuleSet([AlertRule.from_dict(r) for r in raw.get("rules") or []], default)
+    logger.info("alert.rules.loaded", extra={"path": path, "count": len(rule_set.rules)})
+    return rule_set
+
+
+alert_rules = load_rule_set(settings.ALERT_RULES_PATH)
+
+
+class AlertPlan:
+    """Severity filters compiled for ES plus the matcher used for labeling.
+
+    - `filters`: severity -> ES filter clause (only requested severities).
+    - `matcher`: compiled rules; the first matching rule decides severity.
+    - `default`: severity for hits no rule matches (None = not an alert).
+
+    Each rule's clause excludes earlier rules of another severity, so ES
+    follows first-match order. `exact` is True when every rule is a
+    level/service rule: ES counts and totals then agree with the labels.
+    Message rules (keywords/pattern) are decided in Python; their clauses
+    are supersets, so counts are upper bounds and pages may hold fewer
+    items than requested.
+    """
+
+    def __init__(
+        self,
+        filters: Dict[str, Dict[str, Any]],
+        matcher: CompiledRuleSet,
+        default: Optional[str],
+    ) -> None:
+        self.filters = filters
+        self.matcher = matcher
+        self.default = default
+        self.exact = all(r.exact for r in matcher.rules)
+
+    def query_filter(self) -> Dict[str, Any]:
+        """Single clause matching any requested severity."""
+        return {"bool": {"should": list(self.filters.values()), "minimum_should_match": 1}}
+
+    def aggregation(self) -> Dict[str, Any]:
+        """`filters` aggregation that counts matches per severity in ES."""
+        return {"severity_counts": {"filters": {"filters": self.filters}}}
+
+    @property
+    def needs_message(self) -> bool:
+        """True when some rule inspects the message text."""
+        return any(r.has_message_match for r in self.matcher.rules)
+
+    def severity_of(self, src: Dict[str, Any]) -> Optional[str]:
+        rule = self.matcher.match_one(src)
+        sev = rule.severity if rule is not None else self.default
+        return sev if sev in self.filters else None
+
+
+def compile_alert_plan(
+    severities: Optional[List[str]] = None,
+    rules: Optional[List[Dict[str, Any]]] = None,
+    rule_set: Optional[CompiledRuleSet] = None,
+) -> AlertPlan:
+    """Compile the configured rules (or the referenced subset) into ES filters.
+
+    Without rule refs, the whole rule set applies and unmatched hits get the
+    set's default severity (built-in: error -> high, warn -> medium, other
+    -> low). With refs, only hits matching a referenced rule are alerts and
+    `severity` on the reference overrides the rule's own.
+    Raises KeyError for unknown rule ids.
+    """
+    base = rule_set or alert_rules
+    matcher = base.subset(rules) if rules else base
+    default = None if rules else base.default_severity
+    wanted = set(severities or SEVERITIES)
+
+    by_severity: Dict[str, List[Dict[str, Any]]] = {}
+    for i, r in enumerate(matcher.rules):
+        clause = r.es_filter()
+        # First match wins: an earlier rule of another severity takes the hit.
+        # Only exact clauses can be excluded; message rules stay in Python.
+        earlier = [
+            q.es_filter() for q in matcher.rules[:i] if q.severity != r.severity and q.exact
+        ]
+        if earlier:
+            clause = {"bool": {"filter": [clause], "must_not": earlier}}
+        by_severity.setdefault(r.severity, []).append(clause)
+
+    filters: Dict[str, Dict[str, Any]] = {}
+    for sev in SEVERITIES:
+        if sev not in wanted:
+            continue
+        clauses = list(by_severity.get(sev, []))
+        if sev == default:
+            # Default bucket: no other exact rule matches
+            others = [r.es_filter() for r in matcher.rules if r.severity != sev and r.exact]
+            if others:
+                clauses.append({"bool": {"must_not": others}})
+            else:
+                clauses.append({"match_all": {}})
+        if clauses:
+            filters[sev] = (
+                clauses[0]
+                if len(clauses) == 1
+                else {"bool": {"should": clauses, "minimum_should_match": 1}}
+            )
+    return AlertPlan(filters, matcher, default)
+
+
+def label_alerts(hits: List[Dict[str, Any]], plan: AlertPlan) -> List[Dict[str, Any]]:
+    """Attach a severity to hits already filtered by ES (batch, compiled rules)."""
+    rules = plan.matcher.match_batch(hits)
+    default = plan.default
+    wanted = plan.filters
     out: List[Dict[str, Any]] = []
-    for h in hits:
-        src = h.get("_source", {})
-        level = (src.get("level") or "").lower()
-        sev = severity_map.get(level, "low")
-        if not severities or sev in severities:
-            out.append({"hit": h, "severity": sev})
+    for h, rule in zip(hits, rules):
+        sev = rule.severity if rule is not None else default
+        if sev is not None and sev in wanted:
+            out.append({"hit": h, "severity": sev, "rule": rule.id if rule is not None else None})
     return out
 
+
+def evaluate_alerts(hits: List[Dict[str, Any]], severities: List[str]) -> List[Dict[str, Any]]:
+    """Evaluate the configured rules over hits already held in memory.
+
+    `/alerts` pushes the same rules down to ES via `compile_alert_plan`.
+    """
+    return label_alerts(hits, compile_alert_plan(severities or None))
@@ -0,0 +1,378 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+import httpx
+
+from ..config import settings
+from ..es.client import ESHttpClient, cluster_registry
+from ..es.query_adapter import adapt_query_to_es6, format_timestamp_ms, parse_timestamp_ms
+from ..logs.normalizer import normalize_batch
+from .engine import AlertPlan, alert_rules, compile_alert_plan
+
+
+logger = logging.getLogger("alert_scheduler")
+
+
+class _RuleState:
+    """Bounded in-memory state for one rule.
+
+    - `recent`: ring buffer of the latest matched alerts (oldest evicted).
+    - `minute_counts`: ring buffer of `[minute_start_ms, count]`.
+    - `covered_from_ms`: alerts at or after this instant are all retained,
+      so reads for windows starting later are exact.
+    - `covered_until_ms`: every cluster has been evaluated up to here (at
+      most now minus the settle window); later documents may still be
+      ingested. Not advanced past a skipped, failed or truncated cluster.
+    """
+
+    def __init__(self, ring_size: int, counter_minutes: int) -> None:
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=ring_size)
+        self.minute_counts: Deque[List[int]] = deque(maxlen=counter_minutes)
+        self.total: int = 0
+        self.covered_from_ms: Optional[int] = None
+        self.covered_until_ms: Optional[int] = None
+
+    def add(self, record: Dict[str, Any]) -> None:
+        if len(self.recent) == self.recent.maxlen:
+            evicted = self.recent[0]
+            self.covered_from_ms = max(self.covered_from_ms or 0, evicted["ts_ms"] + 1)
+        self.recent.append(record)
+        self.total += 1
+        minute = record["ts_ms"] - record["ts_ms"] % 60_000
+        if self.minute_counts and self.minute_counts[-1][0] == minute:
+            self.minute_counts[-1][1] += 1
+        elif not self.minute_counts or self.minute_counts[-1][0] < minute:
+            self.minute_counts.append([minute, 1])
+        # Out-of-order minutes (late cluster) are only counted in `total`
+
+
+class AlertScheduler:
+    """Background alert evaluation with the same lifecycle as IndexDiscoveryService.
+
+    - Every interval, each configured rule is evaluated per cluster from its
+      persisted watermark (`search_after` sort values + timestamp).
+    - Only new documents are read; results land in bounded ring buffers.
+    - `/alerts` is served from this state when it covers the requested window.
+    """
+
+    def __init__(self, clients: Optional[List[ESHttpClient]] = None) -> None:
+        self._clients: List[ESHttpClient] = clients if clients is not None else cluster_registry.clients()
+        self._enabled: bool = settings.ALERT_SCHEDULER_ENABLED
+        self._interval_seconds: int = settings.ALERT_SCHEDULER_INTERVAL_SECONDS
+        self._rule_ids: List[str] = list(settings.ALERT_SCHEDULER_RULES) or [r.id for r in alert_rules.rules]
+        self._state_path: str = settings.ALERT_STATE_PATH
+
+        self._lock = threading.Lock()
+        self._rules: Dict[str, _RuleState] = {}
+        # (rule_id, host) -> {"sort": [...], "ts_ms": int}
+        self._watermarks: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._last_run_ts: Optional[float] = None
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load_watermarks()
+
+    # Public API
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._enabled,
+            "last_run_ts": self._last_run_ts,
+            "rules": {rid: st.total for rid, st in self._rules.items()},
+        }
+
+    def covers(self, rule_ids: List[str], start_ms: Optional[int], end_ms: Optional[int]) -> bool:
+        """True when every rule has complete state for `[start_ms, end_ms]`.
+
+        Windows reaching into the settle period are never covered: documents
+        there may still be ingested late and are not evaluated yet.
+        """
+        if not self._enabled or self._last_run_ts is None or start_ms is None or end_ms is None:
+            return False
+        with self._lock:
+            for rid in rule_ids:
+                st = self._rules.get(rid)
+                if st is None or st.covered_from_ms is None or start_ms < st.covered_from_ms:
+                    return False
+                if st.covered_until_ms is None or end_ms > st.covered_until_ms:
+                    return False
+        return True
+
+    def rule_ids_for(self, plan: AlertPlan) -> Optional[List[str]]:
+        """Scheduled rules that together produce exactly the plan's alerts.
+
+        Returns None when the plan needs data the scheduler does not keep:
+        the catch-all default severity, unscheduled rules, or a filtered-out
+        severity ranked before a requested one (its rule would take some
+        documents first, but the scheduler evaluates each rule on its own).
+        """
+        if plan.default is not None and plan.default in plan.filters:
+            return None
+        rules = plan.matcher.rules
+        last = max((i for i, r in enumerate(rules) if r.severity in plan.filters), default=-1)
+        if any(r.severity not in plan.filters for r in rules[:last]):
+            return None
+        ids = [r.id for r in plan.matcher.rules if r.severity in plan.filters]
+        return ids if all(rid in self._rule_ids for rid in ids) else None
+
+    def query(
+        self,
+        *,
+        plan: AlertPlan,
+        rule_ids: List[str],
+        tenant_id: Optional[str],
+        start_ms: int,
+        end_ms: int,
+        page: int,
+        page_size: int,
+    ) -> Dict[str, Any]:
+        """Read alerts for a window from memory, newest first.
+
+        `rule_ids` are in plan order: a document held by several rules is
+        labeled by the first one, as the compiled matcher would.
+        """
+        all_tenants = not tenant_id or str(tenant_id).lower() == "all"
+        seen: set = set()
+        counts: Dict[str, int] = {}
+        labeled: List[Tuple[Dict[str, Any], str]] = []
+        with self._lock:
+            for rid in rule_ids:
+                sev = plan.matcher.by_id[rid].severity
+                st = self._rules.get(rid)
+                for rec in st.recent if st else ():
+                    if not (start_ms <= rec["ts_ms"] <= end_ms):
+                        continue
+                    if not all_tenants and rec["tenant_id"] != tenant_id:
+                        continue
+                    if rec["id"] in seen:
+                        continue
+                    seen.add(rec["id"])
+                    counts[sev] = counts.get(sev, 0) + 1
+                    labeled.append((rec, sev))
+        labeled.sort(key=lambda x: x[0]["ts_ms"], reverse=True)
+        offset = (page - 1) * page_size
+        items = [rec["item"] | {"severity": sev} for rec, sev in labeled[offset : offset + page_size]]
+        return {"total": len(labeled), "items": items, "counts": counts}
+
+    def minute_counts(self, rule_id: str) -> List[List[int]]:
+        with self._lock:
+            st = self._rules.get(rule_id)
+            return [list(x) for x in st.minute_counts] if st else []
+
+    # Lifecycle hooks
+    def startup(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="AlertScheduler", daemon=True)
+        self._thread.start()
+        logger.info("alert.scheduler.started")
+
+    def shutdown(self) -> None:
+        self._stop_evt.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._save_watermarks()
+        logger.info("alert.scheduler.stopped")
+
+    # Core logic
+    def _run_loop(self) -> None:
+        while not self._stop_evt.is_set():
+            if self._enabled:
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception("alert.scheduler.run.error")
+            # Sleep in short steps to allow quick shutdown
+            remaining = self._interval_seconds
+            while remaining > 0 and not self._stop_evt.is_set():
+                time.sleep(min(1.0, remaining))
+                remaining -= 1
+
+    def run_once(self) -> None:
+        """Evaluate every rule on every cluster from its watermark up to the settle horizon."""
+        # Late-ingested documents older than the watermark would be skipped
+        # for good: stop short of now by the settle window
+        now_ms = int(time.time() * 1000) - settings.ALERT_SCHEDULER_SETTLE_SECONDS * 1000
+        for rid in self._rule_ids:
+            if rid not in alert_rules.by_id:
+                continue
+            plan = compile_alert_plan(None, [{"id": rid}])
+            with self._lock:
+                st = self._rules.get(rid)
+                if st is None:
+                    st = _RuleState(settings.ALERT_RING_SIZE, settings.ALERT_COUNTER_MINUTES)
+                    # Persisted watermarks skip older documents: state starts there
+                    marks = [m["ts_ms"] for (r, _), m in self._watermarks.items() if r == rid]
+                    st.covered_from_ms = (
+                        max(marks) + 1
+                        if marks
+                        else now_ms - settings.ALERT_SCHEDULER_LOOKBACK_SECONDS * 1000
+                    )
+                    self._rules[rid] = st
+            reached: Optional[int] = now_ms
+            for client in self._clients:
+                if not client.available():
+                    # Down per the registry; its watermark catches up once it recovers
+                    reached = None
+                    continue
+                try:
+                    host_reached = self._evaluate(rid, plan, client, now_ms)
+                except httpx.HTTPError:
+                    logger.warning(
+                        "alert.scheduler.host.unavailable", extra={"host": client._base_url, "rule": rid}
+                    )
+                    reached = None
+                    continue
+                if reached is not None:
+                    reached = min(reached, host_reached)
+            if reached is not None:
+                with self._lock:
+                    st.covered_until_ms = max(st.covered_until_ms or reached, reached)
+        self._last_run_ts = time.time()
+        self._save_watermarks()
+        try:
+            from ..metrics.metrics import ALERT_SCHEDULER_RUNS
+
+            ALERT_SCHEDULER_RUNS.inc()
+        except Exception:
+            pass
+
+    def _evaluate(self, rule_id: str, plan: AlertPlan, client: ESHttpClient, now_ms: int) -> int:
+        """Read new matches up to `now_ms`; returns the instant evaluated up to.
+
+        That is `now_ms` when the cluster caught up, or just before the last
+        document read when `ALERT_SCHEDULER_MAX_PAGES` cut the run short.
+        """
+        key = (rule_id, client._base_url)
+        mark = self._watermarks.get(key)
+        start_ms = (
+            mark["ts_ms"]
+            if mark
+            else now_ms - settings.ALERT_SCHEDULER_LOOKBACK_SECONDS * 1000
+        )
+        cursor = mark.get("sort") if mark else None
+        caught_up = False
+        for _ in range(settings.ALERT_SCHEDULER_MAX_PAGES):
+            body = adapt_query_to_es6(
+                tenant_id="all",
+                pagination={"page": 1, "page_size": 1},
+                time_range={"start": format_timestamp_ms(start_ms), "end": format_timestamp_ms(now_ms)},
+                filters={},
+                sort={"field": settings.TIMESTAMP_FIELD, "order": "asc"},
+                mode="cursor",
+                cursor_after=cursor,
+                truncate_message=False if plan.needs_message else None,
+            )
+            body["size"] = settings.ALERT_SCHEDULER_BATCH_SIZE
+            body["query"]["bool"]["filter"].append(plan.query_filter())
+            res = client.search_logs(
+                index=settings.LOG_INDEXES, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+            )
+            hits = res.get("hits", {}).get("hits", [])
+            if not hits:
+                caught_up = True
+                break
+            self._ingest(rule_id, plan, hits)
+            last = hits[-1]
+            cursor = last.get("sort") or cursor
+            mark = {"sort": cursor, "ts_ms": self._hit_ts_ms(last) or start_ms}
+            self._watermarks[key] = mark
+            if len(hits) < body["size"]:
+                caught_up = True
+                break
+        if mark is None:
+            # Nothing matched yet: move the window forward (to the settle
+            # horizon, not wall-clock now) so the next tick is small
+            self._watermarks[key] = {"sort": None, "ts_ms": now_ms}
+        try:
+            from ..metrics.metrics import ALERT_WATERMARK_LAG
+
+            ALERT_WATERMARK_LAG.labels(rule=rule_id).set(
+                max(0.0, (now_ms - self._watermarks[key]["ts_ms"]) / 1000)
+            )
+        except Exception:
+            pass
+        # Documents sharing the last timestamp may still be pending
+        return now_ms if caught_up else self._watermarks[key]["ts_ms"] - 1
+
+    def _ingest(self, rule_id: str, plan: AlertPlan, hits: List[Dict[str, Any]]) -> None:
+        # ES filters are a superset for pattern rules; the matcher decides
+        matched = [
+            h
+            for h, rule in zip(hits, plan.matcher.match_batch(hits))
+            if rule is not None and self._hit_ts_ms(h) is not None
+        ]
+        records = [
+            {
+                "id": f"{h.get('_index')}/{h.get('_id')}",
+                "ts_ms": self._hit_ts_ms(h),
+                "tenant_id": item.get("tenant_id"),
+                "item": item,
+            }
+            for h, item in zip(matched, normalize_batch(matched))
+        ]
+        with self._lock:
+            st = self._rules[rule_id]
+            for rec in records:
+                st.add(rec)
+        try:
+            from ..metrics.metrics import ALERT_MATCHED_TOTAL
+
+            ALERT_MATCHED_TOTAL.labels(rule=rule_id).inc(len(records))
+        except Exception:
+            pass
+
+    @staticmethod
+    def _hit_ts_ms(hit: Dict[str, Any]) -> Optional[int]:
+        sort = hit.get("sort") or []
+        if sort and isinstance(sort[0], (int, float)):
+            return int(sort[0])
+        src = hit.get("_source", {})
+        return parse_timestamp_ms(
+            src.get(settings.TIMESTAMP_FIELD) or src.get("@timestamp") or src.get("timestamp")
+        )
+
+    # Persistence
+    def _load_watermarks(self) -> None:
+        if not self._state_path or not os.path.exists(self._state_path):
+            return
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            for item in raw.get("watermarks", []):
+                self._watermarks[(item["rule"], item["host"])] = {
+                    "sort": item.get("sort"),
+                    "ts_ms": int(item["ts_ms"]),
+                }
+        except (OSError, ValueError, KeyError):
+            logger.warning("alert.scheduler.state.unreadable", extra={"path": self._state_path})
+
+    def _save_watermarks(self) -> None:
+        if not self._state_path:
+            return
+        payload = {
+            "watermarks": [
+                {"rule": rid, "host": host, "sort": m.get("sort"), "ts_ms": m["ts_ms"]}
+                for (rid, host), m in self._watermarks.items()
+            ]
+        }
+        tmp = f"{self._state_path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, self._state_path)
+        except OSError:
+            logger.warning("alert.scheduler.state.write_failed", extra={"path": self._state_path})
+
+
+# Singleton service
+alert_scheduler = AlertScheduler()
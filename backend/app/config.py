@@ -3,7 +3,7 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -15,24 +15,139 @@ class Settings(BaseSettings):
     ES_PASSWORD: str = Field(default="")
     LOG_INDEXES: List[str] = Field(default=["logs-*"])
     LOG_DOC_TYPE: Optional[str] = Field(default=None)
+    # 集群注册表：每个 ES 主机一个共享连接池（查询、索引发现、告警调度共用）
+    ES_POOL_MAX_CONNECTIONS: int = Field(default=100, ge=1)
+    ES_POOL_MAX_KEEPALIVE: int = Field(default=20, ge=0)
+    ES_POOL_KEEPALIVE_EXPIRY: float = Field(default=30.0, ge=0)
+    # HTTP/2 多路复用（需安装 httpx[http2]；ES 本身只支持 HTTP/1.1，适用于前置 h2 代理的 https 地址）
+    ES_HTTP2: bool = Field(default=False)
+    # 超时（秒）：建连、等待连接池、各类请求读超时（search 查询 / admin 版本探测与 _cat / write 审计写入）
+    ES_CONNECT_TIMEOUT: float = Field(default=2.0, gt=0)
+    ES_POOL_TIMEOUT: float = Field(default=5.0, gt=0)
+    ES_SEARCH_TIMEOUT: float = Field(default=5.0, gt=0)
+    ES_ADMIN_TIMEOUT: float = Field(default=5.0, gt=0)
+    ES_WRITE_TIMEOUT: float = Field(default=5.0, gt=0)
+    # 按集群覆盖上述设置，键为 ES_HOSTS 中的地址，例如
+    # {"http://es2:9200": {"max_connections": 50, "search_timeout": 30, "http2": false}}
+    ES_CLUSTER_OPTIONS: Dict[str, Dict[str, Any]] = Field(default={})
+    # 连续失败达到阈值后视为集群不可用，冷却期后再放行一次请求探测
+    CLUSTER_DOWN_AFTER_FAILURES: int = Field(default=3, ge=1)
+    CLUSTER_RETRY_SECONDS: float = Field(default=10.0, ge=0)
 
     CACHE_ENABLED: bool = Field(default=True)
     CACHE_TTL_SECONDS: int = Field(default=30)
     CACHE_MAX_SIZE: int = Field(default=1000)
 
+    # RBAC 配置文件（JSON：roles / tokens / token_prefixes / tenants）；为空时按令牌前缀判定角色
     RBAC_CONFIG_PATH: str = Field(default="")
+    # 配置文件变更检查间隔（秒，变更后原子替换）与 (token, tenant, action) 决策缓存容量
+    RBAC_RELOAD_INTERVAL_SECONDS: float = Field(default=5.0, ge=0)
+    RBAC_DECISION_CACHE_SIZE: int = Field(default=10000, ge=0)
     METRICS_ENABLED: bool = Field(default=True)
+    # 快速响应：直接返回 JSON（orjson 可用时使用），跳过 response_model 二次校验
+    FAST_RESPONSE_ENABLED: bool = Field(default=False)
+    # 在响应头 Server-Timing 中返回各阶段耗时（auth/dsl/es_network/normalize/serialize 等）
+    SERVER_TIMING_ENABLED: bool = Field(default=False)
+
+    # 启动预热：并行探测各集群版本、建立连接池并完成首次索引发现，超出预算后转入后台继续
+    STARTUP_WARMUP_ENABLED: bool = Field(default=True)
+    STARTUP_WARMUP_BUDGET_SECONDS: float = Field(default=1.5, gt=0)
+    STARTUP_WARMUP_CONNECTIONS: int = Field(default=2, ge=1, le=32)
+
+    # 租户准入控制（作用于 /api/logs/*）：令牌桶限速 + 租户/全局并发舱壁 + 有界等待队列
+    ADMISSION_ENABLED: bool = Field(default=True)
+    TENANT_RATE_PER_SEC: float = Field(default=50.0, ge=0)  # 0 = 不限速
+    TENANT_BURST: float = Field(default=100.0, ge=1)
+    TENANT_MAX_IN_FLIGHT: int = Field(default=16, ge=1)
+    # 全局并发应低于线程池容量（默认 40），为健康检查等其他路由留出线程
+    GLOBAL_MAX_IN_FLIGHT: int = Field(default=32, ge=1)
+    ADMISSION_MAX_QUEUE: int = Field(default=256, ge=0)
+    ADMISSION_QUEUE_TIMEOUT_MS: int = Field(default=2000, ge=0)
+    # 按租户覆盖，例如 {"t-big": {"rate": 200, "burst": 400, "max_in_flight": 32}}
+    TENANT_LIMIT_OVERRIDES: Dict[str, Dict[str, float]] = Field(default={})
+    # 闲置（无请求且令牌桶已满）超过该秒数的租户状态被回收
+    TENANT_IDLE_EVICT_SECONDS: float = Field(default=300.0, ge=0)
+
+    # 查询成本预估（/query）：按索引目录（文档数、主分片、时间重叠）与 DSL 特征估算 ES took（毫秒）
+    COST_GUARD_ENABLED: bool = Field(default=True)
+    COST_LOW_PRIORITY_MS: float = Field(default=2000.0, ge=0)  # 超过则进入低优先级通道
+    COST_RESHAPE_MS: float = Field(default=5000.0, ge=0)  # 超过则收窄索引 / 近似计数
+    COST_REJECT_MS: float = Field(default=30000.0, ge=0)  # 改写后仍超过则拒绝
+    COST_LOW_PRIORITY_CONCURRENCY: int = Field(default=4, ge=1)
+    COST_LOW_PRIORITY_WAIT_MS: int = Field(default=5000, ge=0)
+    # 以实际 took 持续校准预估（EWMA）
+    COST_AUTO_CALIBRATE: bool = Field(default=True)
+
+    # 请求时间预算（/api/logs/*）：可由 X-Request-Timeout-Ms 头或 timeout_ms 参数指定，不超过上限
+    REQUEST_DEADLINE_ENABLED: bool = Field(default=True)
+    REQUEST_TIMEOUT_MS: int = Field(default=10000, ge=1)
+    REQUEST_TIMEOUT_MAX_MS: int = Field(default=60000, ge=1)
+    # 预留给结果规整与序列化的时间，其余分给 ES 调用
+    REQUEST_DEADLINE_RESERVE_MS: int = Field(default=200, ge=0)
+    # ES 调用预算中作为 search timeout 交给 ES 的比例，余下留给网络与协调节点归并
+    DEADLINE_ES_TIMEOUT_RATIO: float = Field(default=0.8, gt=0, le=1)
+    # 超时时返回部分结果（timed_out: true），否则返回 504
+    ALLOW_PARTIAL_RESULTS: bool = Field(default=True)
 
     # Index discovery configuration (can be changed at runtime via API)
     INDEX_DISCOVERY_ENABLED: bool = Field(default=True)
     INDEX_DISCOVERY_INTERVAL_SECONDS: int = Field(default=60)
     INDEX_INCLUDE_PATTERNS: List[str] = Field(default=[r"^logs-[A-Za-z0-9_-].*"])
     INDEX_EXCLUDE_PATTERNS: List[str] = Field(default=[])
-    # 开发调试开关（用于打印查询 DSL 与索引）
+    # 开发调试开关：每次 ES 查询都输出一条结构化日志（es.query，含 DSL 指纹/耗时/索引数）
     DEBUG_QUERY_LOGS: bool = Field(default=False)
+    # 慢查询记录：按 DSL 形状指纹滚动统计，超过阈值的查询输出 es.query.slow 日志
+    SLOW_QUERY_ENABLED: bool = Field(default=True)
+    SLOW_QUERY_THRESHOLD_MS: float = Field(default=1000.0, ge=0)
+    SLOW_QUERY_MAX_FINGERPRINTS: int = Field(default=500, ge=1)
+    SLOW_QUERY_SAMPLES: int = Field(default=256, ge=1)
     # 响应体控制：分页上限与消息最大长度（避免 Dify 1MB 限制）
     MAX_PAGE_SIZE: int = Field(default=20, ge=1, le=200)
     MAX_MESSAGE_LEN: int = Field(default=4096, ge=256, le=65536)
+    # 由 ES 高亮返回截断后的消息/关键字片段，避免传输完整大消息（字段需可高亮）。
+    # 默认关闭：未映射、index:false 或不可高亮的字段没有高亮结果，开启后消息会丢失
+    ES_SERVER_SIDE_TRUNCATION: bool = Field(default=False)
+    SNIPPET_FRAGMENT_SIZE: int = Field(default=200, ge=20, le=4096)
+    SNIPPET_FRAGMENTS: int = Field(default=3, ge=1, le=20)
+    # 日志脱敏：开关与相同消息的脱敏结果缓存条数（0 关闭缓存）
+    DESENSITIZE_ENABLED: bool = Field(default=True)
+    DESENSITIZE_CACHE_SIZE: int = Field(default=10000, ge=0)
+    # 时间直方图：自动间隔的目标桶数；桶结束超过该秒数后视为不可变并缓存
+    HISTOGRAM_TARGET_BUCKETS: int = Field(default=60, ge=1, le=1000)
+    HISTOGRAM_SETTLE_SECONDS: int = Field(default=60, ge=0)
+    # 日志模板聚类（/patterns）：单次扫描行数上限、每批拉取条数、模板数上限与相似度阈值
+    PATTERNS_MAX_LINES: int = Field(default=10000, ge=1, le=1000000)
+    PATTERNS_BATCH_SIZE: int = Field(default=1000, ge=1, le=10000)
+    PATTERNS_MAX_CLUSTERS: int = Field(default=1000, ge=1)
+    PATTERNS_SIM_THRESHOLD: float = Field(default=0.5, gt=0, le=1)
+
+    # 告警规则文件（JSON）；为空时使用内置的按级别规则
+    ALERT_RULES_PATH: str = Field(default="")
+
+    # 后台告警调度：按规则、集群水位增量评估，结果保存在内存环形缓冲区
+    ALERT_SCHEDULER_ENABLED: bool = Field(default=False)
+    ALERT_SCHEDULER_INTERVAL_SECONDS: int = Field(default=30, ge=1)
+    ALERT_SCHEDULER_RULES: List[str] = Field(default=[])  # 为空 = 全部规则
+    ALERT_SCHEDULER_LOOKBACK_SECONDS: int = Field(default=3600, ge=1)
+    ALERT_SCHEDULER_BATCH_SIZE: int = Field(default=500, ge=1, le=10000)
+    ALERT_SCHEDULER_MAX_PAGES: int = Field(default=20, ge=1)
+    # 容忍写入延迟（秒）：只评估早于 now 减该值的文档，/alerts 也只对结束早于该时刻的窗口使用调度结果
+    ALERT_SCHEDULER_SETTLE_SECONDS: int = Field(default=60, ge=0)
+    ALERT_RING_SIZE: int = Field(default=1000, ge=1)
+    ALERT_COUNTER_MINUTES: int = Field(default=1440, ge=1)
+    # 水位持久化文件（JSON）；为空则只保存在内存
+    ALERT_STATE_PATH: str = Field(default="")
+
+    # 查询审计：每次 ES 查询记录租户、角色、DSL 指纹、索引与耗时，后台批量 _bulk 写入按天索引 <前缀>-YYYY.MM.DD
+    AUDIT_ENABLED: bool = Field(default=True)
+    AUDIT_INDEX_PREFIX: str = Field(default="mcp-audit")
+    AUDIT_DOC_TYPE: str = Field(default="_doc")  # ES6 类型路径；7.x+ 忽略
+    AUDIT_QUEUE_SIZE: int = Field(default=10000, ge=1)  # 内存队列上限，满则丢弃
+    AUDIT_BATCH_SIZE: int = Field(default=500, ge=1, le=10000)
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(default=1000, ge=10)
+    # ES 不可达时批次追加到本地溢出文件（NDJSON），恢复后重放；为空则直接丢弃
+    AUDIT_SPILL_PATH: str = Field(default="")
+    AUDIT_SPILL_MAX_BYTES: int = Field(default=64 * 1024 * 1024, ge=0)
 
     class Config:
         env_file = ".env"
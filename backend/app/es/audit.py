@@ -0,0 +1,355 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from queue import Empty, Full, Queue
+from typing import Any, Callable, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import httpx
+from fastapi import Depends, Request
+
+from ..config import settings
+from ..metrics.metrics import (
+    AUDIT_DROPPED_TOTAL,
+    AUDIT_FLUSHES_TOTAL,
+    AUDIT_QUEUE_DEPTH,
+    AUDIT_SPILL_BYTES,
+    AUDIT_WRITTEN_TOTAL,
+)
+from ..security.auth import authz, rbac
+from .slow_queries import dsl_fingerprint
+
+logger = logging.getLogger("es.audit")
+
+# Backoff after ES refused a batch; meanwhile batches go straight to the spill file
+_RETRY_SECONDS = 5.0
+# Index names recorded per event; `index_count` keeps the full number
+_MAX_INDICES = 50
+
+
+class AuditContext:
+    """Who is searching: set once per API request by `audit_scope`."""
+
+    __slots__ = ("tenant_id", "role", "token_id", "endpoint")
+
+    def __init__(self, tenant_id: str, role: str, token_id: str, endpoint: str) -> None:
+        self.tenant_id = tenant_id
+        self.role = role
+        self.token_id = token_id
+        self.endpoint = endpoint
+
+
+_current: ContextVar[Optional[AuditContext]] = ContextVar("audit_context", default=None)
+
+
+def _ndjson(docs: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(d, ensure_ascii=False, separators=(",", ":")) + "\n" for d in docs).encode("utf-8")
+
+
+def token_id(token: str) -> str:
+    """Stable, non-reversible id of a token (the token itself is never stored)."""
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class AuditWriter:
+    """Background audit trail of user searches, bulk-written to ES.
+
+    - `record()` only enqueues onto a bounded queue (dropped when full), so
+      requests never wait on audit I/O.
+    - One thread drains the queue into batches of up to `batch_size`
+      events or whatever arrived within `flush_interval_s`, and writes one
+      `_bulk` per daily index (`<index_prefix>-YYYY.MM.DD`); ES 6 gets the
+      `/{index}/{doc_type}/_bulk` path.
+    - Batches ES cannot take (unreachable, 5xx, 429) are appended to the
+      spill file (NDJSON, capped at `spill_max_bytes`) and replayed once ES
+      accepts writes again, also across restarts. Without a spill path they
+      are dropped. Only the writer thread touches the spill file.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        index_prefix: str = "mcp-audit",
+        doc_type: Optional[str] = "_doc",
+        queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval_s: float = 1.0,
+        spill_path: str = "",
+        spill_max_bytes: int = 64 * 1024 * 1024,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.index_prefix = index_prefix
+        self.doc_type = doc_type or None
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self._client_factory = client_factory
+        self._queue: "Queue[Dict[str, Any]]" = Queue(maxsize=queue_size)
+        self._retry_at = 0.0
+        self._stop_evt = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # Public API
+    def record(self, event: Dict[str, Any]) -> bool:
+        """Enqueue one audit document without blocking; False when dropped."""
+        if not self.enabled:
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except Full:
+            AUDIT_DROPPED_TOTAL.labels(reason="queue_full").inc()
+            return False
+        return True
+
+    def record_search(
+        self,
+        body: Dict[str, Any],
+        *,
+        indices: List[str],
+        latency_ms: float,
+        cluster: str,
+        status: str,
+        fingerprint: Optional[str] = None,
+        took_ms: Optional[float] = None,
+    ) -> None:
+        """Audit one ES search made on behalf of an API request (no-op otherwise)."""
+        ctx = _current.get()
+        if ctx is None or not self.enabled:
+            return
+        self.record(
+            {
+                "@timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "tenant_id": ctx.tenant_id,
+                "role": ctx.role,
+                "token_id": ctx.token_id,
+                "endpoint": ctx.endpoint,
+                "cluster": cluster,
+                "fingerprint": fingerprint or dsl_fingerprint(body),
+                "indices": list(indices[:_MAX_INDICES]),
+                "index_count": len(indices),
+                "latency_ms": round(latency_ms, 1),
+                "took_ms": took_ms,
+                "status": status,
+            }
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "spill_bytes": self._spill_size(),
+            "retry_in_s": round(max(0.0, self._retry_at - time.monotonic()), 1),
+        }
+
+    # Lifecycle hooks
+    def startup(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_evt.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="AuditWriter", daemon=True)
+        self._thread.start()
+        logger.info("audit.writer.started")
+
+    def shutdown(self, timeout_s: float = 5.0) -> None:
+        self._stop_evt.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout_s)
+        logger.info("audit.writer.stopped")
+
+    # Core logic
+    def _run_loop(self) -> None:
+        while not self._stop_evt.is_set():
+            try:
+                batch = self._collect()
+                if batch:
+                    self.flush(batch)
+                elif self._spill_size() and time.monotonic() >= self._retry_at:
+                    # Idle: retry spilled batches
+                    self.replay()
+            except Exception:
+                logger.exception("audit.writer.error")
+        # Shutdown: write (or spill) whatever is still queued
+        while True:
+            batch = self._collect(block=False)
+            if not batch:
+                break
+            self.flush(batch)
+
+    def _collect(self, block: bool = True) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        until = time.monotonic() + self.flush_interval_s
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    left = until - time.monotonic()
+                    if left <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=left))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        return batch
+
+    def flush(self, docs: List[Dict[str, Any]]) -> None:
+        """Write one batch; what ES cannot take now goes to the spill file."""
+        if time.monotonic() < self._retry_at:
+            self._spill(docs)
+            return
+        failed = self._write(docs)
+        if failed:
+            self._spill(failed)
+        elif self._spill_size():
+            # ES takes writes again: catch up on spilled batches
+            self.replay()
+
+    def _index_for(self, doc: Dict[str, Any]) -> str:
+        day = str(doc.get("@timestamp") or "")[:10].replace("-", ".")
+        return f"{self.index_prefix}-{day or datetime.now(timezone.utc).strftime('%Y.%m.%d')}"
+
+    def _client(self) -> Any:
+        if self._client_factory is not None:
+            return self._client_factory()
+        from .client import cluster_registry
+
+        return cluster_registry.primary()
+
+    def _write(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """`_bulk` per daily index; returns the documents worth retrying."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            groups.setdefault(self._index_for(doc), []).append(doc)
+        client = self._client()
+        failed: List[Dict[str, Any]] = []
+        for index, group in groups.items():
+            try:
+                res = client.bulk_index(index, group, doc_type=self.doc_type)
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status == 429 or status >= 500:
+                    failed.extend(group)
+                    AUDIT_FLUSHES_TOTAL.labels(outcome="error").inc()
+                else:
+                    # Mapping / permission problems: retrying cannot help
+                    AUDIT_DROPPED_TOTAL.labels(reason="rejected").inc(len(group))
+                    logger.warning("audit.bulk.rejected", extra={"index": index, "status": status})
+                continue
+            except httpx.HTTPError as e:
+                failed.extend(group)
+                AUDIT_FLUSHES_TOTAL.labels(outcome="error").inc()
+                logger.warning("audit.bulk.unavailable", extra={"index": index, "error": repr(e)})
+                continue
+            retry: List[Dict[str, Any]] = []
+            rejected = 0
+            if isinstance(res, dict) and res.get("errors"):
+                for doc, item in zip(group, res.get("items") or []):
+                    status = int((item.get("index") or {}).get("status", 200))
+                    if status == 429 or status >= 500:
+                        retry.append(doc)
+                    elif status >= 300:
+                        rejected += 1
+            if rejected:
+                AUDIT_DROPPED_TOTAL.labels(reason="rejected").inc(rejected)
+            failed.extend(retry)
+            AUDIT_WRITTEN_TOTAL.inc(len(group) - len(retry) - rejected)
+            AUDIT_FLUSHES_TOTAL.labels(outcome="ok").inc()
+        if failed:
+            self._retry_at = time.monotonic() + _RETRY_SECONDS
+        return failed
+
+    # Spill file
+    def _spill_size(self) -> int:
+        if not self.spill_path:
+            return 0
+        try:
+            return os.path.getsize(self.spill_path)
+        except OSError:
+            return 0
+
+    def _spill(self, docs: List[Dict[str, Any]]) -> None:
+        if not self.spill_path:
+            AUDIT_DROPPED_TOTAL.labels(reason="es_unavailable").inc(len(docs))
+            return
+        data = _ndjson(docs)
+        size = self._spill_size()
+        if size + len(data) > self.spill_max_bytes:
+            AUDIT_DROPPED_TOTAL.labels(reason="spill_full").inc(len(docs))
+            return
+        try:
+            with open(self.spill_path, "ab") as f:
+                f.write(data)
+        except OSError as e:
+            AUDIT_DROPPED_TOTAL.labels(reason="es_unavailable").inc(len(docs))
+            logger.warning("audit.spill.unwritable", extra={"path": self.spill_path, "error": repr(e)})
+            return
+        AUDIT_FLUSHES_TOTAL.labels(outcome="spilled").inc()
+        AUDIT_SPILL_BYTES.set(size + len(data))
+
+    def replay(self) -> None:
+        """Resend the spill file in batches; keep what still fails."""
+        if not self._spill_size():
+            return
+        with open(self.spill_path, "rb") as f:
+            lines = f.read().splitlines()
+        docs: List[Dict[str, Any]] = []
+        for line in lines:
+            try:
+                docs.append(json.loads(line))
+            except ValueError:
+                AUDIT_DROPPED_TOTAL.labels(reason="corrupt").inc()
+        pending: List[Dict[str, Any]] = []
+        for i in range(0, len(docs), self.batch_size):
+            chunk = docs[i : i + self.batch_size]
+            if pending or time.monotonic() < self._retry_at:
+                # ES refused a batch: keep the rest for the next attempt
+                pending.extend(chunk)
+                continue
+            pending.extend(self._write(chunk))
+        if pending:
+            tmp = f"{self.spill_path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_ndjson(pending))
+            os.replace(tmp, self.spill_path)
+        else:
+            os.remove(self.spill_path)
+        AUDIT_SPILL_BYTES.set(self._spill_size())
+        if len(pending) < len(docs):
+            AUDIT_FLUSHES_TOTAL.labels(outcome="replayed").inc()
+            logger.info("audit.spill.replayed", extra={"sent": len(docs) - len(pending), "pending": len(pending)})
+
+
+audit_writer = AuditWriter(
+    enabled=settings.AUDIT_ENABLED,
+    index_prefix=settings.AUDIT_INDEX_PREFIX,
+    doc_type=settings.AUDIT_DOC_TYPE,
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_s=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+    spill_path=settings.AUDIT_SPILL_PATH,
+    spill_max_bytes=settings.AUDIT_SPILL_MAX_BYTES,
+)
+
+
+async def audit_scope(request: Request, ctx=Depends(authz)) -> None:
+    """Router dependency: tag this request's ES searches for the audit trail.
+
+    Async so the context variable is set on the request task, which the
+    sync route and its fan-out threads inherit.
+    """
+    if not audit_writer.enabled:
+        return
+    token, tenant_id = ctx
+    _current.set(AuditContext(tenant_id, rbac.role_of(token, tenant_id), token_id(token), request.url.path))
@@ -5,70 +5,267 @@ All rights reserved.
 
 from typing import Any, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from functools import cmp_to_key
+from threading import Lock
+from time import perf_counter, time
+from urllib.parse import quote, urlsplit
+import json
+import logging
 import httpx
 
 from ..config import settings
+from ..metrics.metrics import ES_POOL_CONNECTIONS_OPENED, ES_POOL_IN_FLIGHT, ES_POOL_WAIT_MS
+from ..metrics.timing import phase, record
+from ..utils.deadline import DeadlineExceeded, current_deadline
+from .audit import audit_writer
+from .slow_queries import slow_query_log
+
+logger = logging.getLogger("es.client")
+
+_VERSION_RETRY_SECONDS = 30.0
+
+# Per-cluster pool options (ES_CLUSTER_OPTIONS entries override these)
+_POOL_OPTION_KEYS = (
+    "max_connections", "max_keepalive", "keepalive_expiry", "http2",
+    "connect_timeout", "pool_timeout", "search_timeout", "admin_timeout", "write_timeout",
+)
+
+
+def pool_options(host: str) -> Dict[str, Any]:
+    """Pool options for `host`: ES_POOL_*/ES_*_TIMEOUT defaults plus its ES_CLUSTER_OPTIONS entry."""
+    opts: Dict[str, Any] = {
+        "max_connections": settings.ES_POOL_MAX_CONNECTIONS,
+        "max_keepalive": settings.ES_POOL_MAX_KEEPALIVE,
+        "keepalive_expiry": settings.ES_POOL_KEEPALIVE_EXPIRY,
+        "http2": settings.ES_HTTP2,
+        "connect_timeout": settings.ES_CONNECT_TIMEOUT,
+        "pool_timeout": settings.ES_POOL_TIMEOUT,
+        "search_timeout": settings.ES_SEARCH_TIMEOUT,
+        "admin_timeout": settings.ES_ADMIN_TIMEOUT,
+        "write_timeout": settings.ES_WRITE_TIMEOUT,
+    }
+    overrides = settings.ES_CLUSTER_OPTIONS.get(host.rstrip("/")) or settings.ES_CLUSTER_OPTIONS.get(host) or {}
+    unknown = set(overrides) - set(_POOL_OPTION_KEYS)
+    if unknown:
+        logger.warning("es.pool.unknown_options", extra={"host": host, "keys": sorted(unknown)})
+    opts.update({k: v for k, v in overrides.items() if k in _POOL_OPTION_KEYS})
+    return opts
+
+
+def _capped(timeout: httpx.Timeout, seconds: float) -> httpx.Timeout:
+    """`timeout` with every phase limited to `seconds`."""
+    def cap(v: Optional[float]) -> float:
+        return seconds if v is None else min(v, seconds)
+
+    return httpx.Timeout(
+        connect=cap(timeout.connect), read=cap(timeout.read), write=cap(timeout.write), pool=cap(timeout.pool)
+    )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx[http2] extra)
+    except ImportError:
+        return False
+    return True
 
 
 class ESHttpClient:
     """Version-adaptive HTTP client for Elasticsearch 6.5.4 and above.
 
-    - Detects server version on first use (GET /) and adapts paths.
+    - Detects server version at startup warm-up or on first use (GET /) and
+      adapts paths.
     - Supports doc_type for 6.x and omits for 7.x/8.x.
-    - Uses keep-alive connection pooling, small timeout for performance.
+    - Uses keep-alive connection pooling tuned per cluster (`pool_options`):
+      pool limits, optional HTTP/2 and connect/read timeouts per endpoint
+      kind (`search`, `admin` for probes and `_cat`, `write` for `_bulk`).
+    - Every request reports pool wait, new connections and in-flight count
+      to Prometheus, and pool wait to the request timer (`pool_wait`).
+    - Searches inside a request honour its deadline (`utils.deadline`): the
+      httpx timeouts are capped by the remaining budget and ES gets a share
+      of it as the search `timeout`; a `timed_out` answer is a partial
+      result, or DeadlineExceeded when the request does not allow partials.
+    - Tracks cluster health from request outcomes: after
+      CLUSTER_DOWN_AFTER_FAILURES consecutive failures the cluster is
+      unavailable for CLUSTER_RETRY_SECONDS, then one request probes it again.
+    - Instances are owned by `cluster_registry`; use it instead of creating
+      clients per subsystem.
     """
 
-    def __init__(self, base_url: Optional[str] = None) -> None:
+    def __init__(self, base_url: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> None:
         self._client: Optional[httpx.Client] = None
+        self._client_lock = Lock()
         self._version_major: Optional[int] = None
+        self.version: Optional[str] = None
+        # Failed probes are retried after a short backoff instead of pinning 6.x
+        self._version_retry_at: float = 0.0
         self._base_url: str = (base_url or settings.ES_HOSTS[0]).rstrip("/")
+        # Cluster label for phase timing (host:port)
+        self.cluster: str = urlsplit(self._base_url).netloc or self._base_url
+        self.options: Dict[str, Any] = options if options is not None else pool_options(self._base_url)
+        self.limits = httpx.Limits(
+            max_connections=self.options["max_connections"],
+            max_keepalive_connections=self.options["max_keepalive"],
+            keepalive_expiry=self.options["keepalive_expiry"],
+        )
+        self.http2: bool = bool(self.options["http2"])
+        if self.http2 and not _http2_available():
+            logger.warning("es.pool.http2_unavailable", extra={"host": self._base_url})
+            self.http2 = False
+        self._timeouts: Dict[str, httpx.Timeout] = {
+            kind: httpx.Timeout(
+                self.options[f"{kind}_timeout"],
+                connect=self.options["connect_timeout"],
+                pool=self.options["pool_timeout"],
+            )
+            for kind in ("search", "admin", "write")
+        }
+        # Health
+        self.consecutive_failures: int = 0
+        self.last_error: Optional[str] = None
+        self.last_ok_ts: Optional[float] = None
+        self.last_failure_ts: Optional[float] = None
 
     def client(self) -> httpx.Client:
         if self._client is None:
-            auth: Optional[Tuple[str, str]] = None
-            if settings.ES_USERNAME and settings.ES_PASSWORD:
-                auth = httpx.BasicAuth(settings.ES_USERNAME, settings.ES_PASSWORD)
-            self._client = httpx.Client(
-                timeout=5.0,
-                auth=auth,
-                verify=settings.ES_VERIFY_SSL,
-                headers={"Content-Type": "application/json"},
-            )
+            with self._client_lock:
+                # Shared across threads: build the pool once
+                if self._client is None:
+                    auth: Optional[Tuple[str, str]] = None
+                    if settings.ES_USERNAME and settings.ES_PASSWORD:
+                        auth = httpx.BasicAuth(settings.ES_USERNAME, settings.ES_PASSWORD)
+                    self._client = httpx.Client(
+                        timeout=self._timeouts["search"],
+                        limits=self.limits,
+                        http2=self.http2,
+                        auth=auth,
+                        verify=settings.ES_VERIFY_SSL,
+                        headers={"Content-Type": "application/json"},
+                    )
         return self._client
 
+    def request(
+        self, method: str, url: str, kind: str = "search", timeout: Optional[httpx.Timeout] = None, **kwargs: Any
+    ) -> httpx.Response:
+        """Send through the pool with `kind`'s timeouts (or `timeout`), recording pool metrics."""
+        t0 = perf_counter()
+        waited = False
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            nonlocal waited
+            # Pool wait ends when a connection is being opened or a request is written on one
+            if not waited and (event == "connection.connect_tcp.started" or event.endswith("send_request_headers.started")):
+                waited = True
+                wait_ms = (perf_counter() - t0) * 1000
+                ES_POOL_WAIT_MS.labels(cluster=self.cluster).observe(wait_ms)
+                record("pool_wait", wait_ms, self.cluster)
+            elif event == "connection.connect_tcp.complete":
+                ES_POOL_CONNECTIONS_OPENED.labels(cluster=self.cluster).inc()
+
+        in_flight = ES_POOL_IN_FLIGHT.labels(cluster=self.cluster)
+        in_flight.inc()
+        try:
+            return self.client().request(
+                method, url, timeout=timeout or self._timeouts[kind], extensions={"trace": trace}, **kwargs
+            )
+        finally:
+            in_flight.dec()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Open connections in the pool by state (reads httpcore's pool)."""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        conns = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in conns if c.is_idle())
+        return {"active": len(conns) - idle, "idle": idle}
+
+    # Health and capabilities
+    def mark_ok(self) -> None:
+        self.consecutive_failures = 0
+        self.last_ok_ts = time()
+
+    def mark_failed(self, error: BaseException) -> None:
+        self.consecutive_failures += 1
+        self.last_error = repr(error)[:200]
+        self.last_failure_ts = time()
+
+    def available(self) -> bool:
+        """False while the cluster is considered down (retried after a cooldown)."""
+        if self.consecutive_failures < settings.CLUSTER_DOWN_AFTER_FAILURES:
+            return True
+        return time() - (self.last_failure_ts or 0.0) >= settings.CLUSTER_RETRY_SECONDS
+
+    def capabilities(self) -> Dict[str, bool]:
+        """Features of the detected version; ES 6.5.4 is assumed until detected."""
+        try:
+            major, minor = (int(p) for p in (self.version or "6.5.4").split(".")[:2])
+        except ValueError:
+            major, minor = self._version_major or 6, 0
+        return {
+            "doc_type": major <= 6,
+            "composite_aggs": (major, minor) >= (6, 1),
+            "track_total_hits": major >= 7,
+            "pit": (major, minor) >= (7, 10),
+            "fixed_interval": (major, minor) >= (7, 2),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "host": self._base_url,
+            "cluster": self.cluster,
+            "version": self.version,
+            "capabilities": self.capabilities(),
+            "available": self.available(),
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_ok_ts": self.last_ok_ts,
+            "last_failure_ts": self.last_failure_ts,
+            "pool": dict(self.options, http2=self.http2, connections=self.pool_stats()),
+        }
+
     def _detect_version(self) -> int:
         if self._version_major is not None:
             return self._version_major
+        if perf_counter() < self._version_retry_at:
+            return 6
         try:
-            resp = self.client().get(f"{self._base_url}/")
+            resp = self.request("GET", f"{self._base_url}/", kind="admin")
             resp.raise_for_status()
             info = resp.json()
             ver = info.get("version", {}).get("number", "6.5.4")
             major = int(ver.split(".")[0])
-        except Exception:
-            # Be tolerant: default to ES 6.x behavior if detection fails
-            major = 6
+        except Exception as e:
+            # Be tolerant: default to ES 6.x behavior if detection fails, and
+            # probe again later so a cluster down at startup is not pinned to 6.x
+            self._version_retry_at = perf_counter() + _VERSION_RETRY_SECONDS
+            self.mark_failed(e)
+            return 6
+        self.version = ver
         self._version_major = major
+        self.mark_ok()
         return major
 
     def _search_path(self, index: List[str], doc_type: Optional[str]) -> str:
-        idx = ",".join(index)
+        # Quote each name so it stays one path segment (`/`, `..`, `?`, `#`)
+        idx = ",".join(quote(i, safe="*") for i in index)
         major = self._detect_version()
         if major <= 6 and doc_type:
             return f"{self._base_url}/{idx}/{doc_type}/_search"
         return f"{self._base_url}/{idx}/_search"
 
     def _get_path(self, index: str, doc_id: str, doc_type: Optional[str]) -> str:
+        idx = quote(index, safe=",*-_.")
+        doc = quote(str(doc_id), safe="")
         major = self._detect_version()
         if major <= 6 and doc_type:
-            return f"{self._base_url}/{index}/{doc_type}/{doc_id}"
-        return f"{self._base_url}/{index}/_doc/{doc_id}"
+            return f"{self._base_url}/{idx}/{doc_type}/{doc}"
+        return f"{self._base_url}/{idx}/_doc/{doc}"
 
-    def _index_path(self, index: str, doc_type: Optional[str]) -> str:
+    def _bulk_path(self, index: str, doc_type: Optional[str]) -> str:
         major = self._detect_version()
         if major <= 6 and doc_type:
-            return f"{self._base_url}/{index}/{doc_type}"
-        return f"{self._base_url}/{index}/_doc"
+            return f"{self._base_url}/{quote(index, safe='')}/{doc_type}/_bulk"
+        return f"{self._base_url}/{quote(index, safe='')}/_bulk"
 
     def search_logs(
         self,
@@ -77,31 +274,88 @@ class ESHttpClient:
         doc_type: Optional[str] = None,
     ) -> Dict[str, Any]:
         path = self._search_path(index, doc_type)
-        # 调试输出：打印实际请求的 ES 路径与主机
-        from ..config import settings as _settings  # 局部导入避免循环
-        if bool(getattr(_settings, "DEBUG_QUERY_LOGS", False)):
-            try:
-                print("[DEBUG][es] post path =", path)
-                print("[DEBUG][es] target host =", self._base_url)
-                print("[DEBUG][es] body.query =", str(body.get("query"))[:800])
-            except Exception:
-                pass
+        deadline = current_deadline()
+        timeout = self._timeouts["search"]
+        params: Dict[str, str] = {}
+        bounded = False
+        if deadline is not None:
+            budget_s = deadline.es_timeout_s()
+            # ES stops collecting at its share and answers with what it has
+            params["timeout"] = f"{max(1, int(budget_s * settings.DEADLINE_ES_TIMEOUT_RATIO * 1000))}ms"
+            if timeout.read is None or budget_s < timeout.read:
+                timeout, bounded = _capped(timeout, budget_s), True
+        t0 = perf_counter()
         try:
-            resp = self.client().post(path, json=body)
+            with phase("es_network", self.cluster):
+                resp = self.request("POST", path, timeout=timeout, params=params or None, json=body)
             resp.raise_for_status()
         except httpx.HTTPStatusError as e:
-            if bool(getattr(_settings, "DEBUG_QUERY_LOGS", False)):
-                try:
-                    print(
-                        "[ERROR][es] status =",
-                        e.response.status_code,
-                        "text =",
-                        (e.response.text or "")[:200],
-                    )
-                except Exception:
-                    pass
+            logger.warning(
+                "es.search.http_error",
+                extra={
+                    "host": self._base_url,
+                    "status": e.response.status_code,
+                    "text": (e.response.text or "")[:200],
+                },
+            )
+            latency_ms = (perf_counter() - t0) * 1000
+            status = str(e.response.status_code)
+            fingerprint = slow_query_log.record(
+                body, indices=len(index), latency_ms=latency_ms, took_ms=None,
+                response_bytes=len(e.response.content), cluster=self.cluster, status=status,
+            )
+            audit_writer.record_search(
+                body, indices=index, latency_ms=latency_ms, cluster=self.cluster,
+                fingerprint=fingerprint, status=status,
+            )
+            # 4xx is a bad query, not a sick cluster
+            if e.response.status_code >= 500:
+                self.mark_failed(e)
             raise
-        return resp.json()
+        except httpx.HTTPError as e:
+            latency_ms = (perf_counter() - t0) * 1000
+            status = "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+            # Timeouts are usually the slowest queries: keep them in the stats
+            fingerprint = slow_query_log.record(
+                body, indices=len(index), latency_ms=latency_ms, took_ms=None,
+                response_bytes=0, cluster=self.cluster, status=status,
+            )
+            audit_writer.record_search(
+                body, indices=index, latency_ms=latency_ms, cluster=self.cluster,
+                fingerprint=fingerprint, status=status,
+            )
+            if bounded and isinstance(e, httpx.TimeoutException):
+                # Cut short by the request deadline, not a sick cluster
+                raise DeadlineExceeded(f"{self.cluster}: {e!r}") from e
+            self.mark_failed(e)
+            raise
+        self.mark_ok()
+        latency_ms = (perf_counter() - t0) * 1000
+        with phase("decode", self.cluster):
+            res = resp.json()
+        took = res.get("took") if isinstance(res, dict) else None
+        if isinstance(took, (int, float)):
+            record("es_took", float(took), self.cluster)
+        else:
+            took = None
+        fingerprint = slow_query_log.record(
+            body,
+            indices=len(index),
+            latency_ms=latency_ms,
+            took_ms=took,
+            response_bytes=len(resp.content),
+            cluster=self.cluster,
+        )
+        timed_out = isinstance(res, dict) and bool(res.get("timed_out"))
+        audit_writer.record_search(
+            body, indices=index, latency_ms=latency_ms, cluster=self.cluster, fingerprint=fingerprint,
+            took_ms=took, status="timed_out" if timed_out else "ok",
+        )
+        if deadline is not None and timed_out:
+            if not deadline.allow_partial:
+                raise DeadlineExceeded(f"{self.cluster}: search timed out")
+            deadline.mark_partial()
+        return res
 
     def get_doc(
         self,
@@ -110,14 +364,26 @@ class ESHttpClient:
         doc_type: Optional[str] = None,
     ) -> Dict[str, Any]:
         path = self._get_path(index, doc_id, doc_type)
-        resp = self.client().get(path)
+        resp = self.request("GET", path)
         resp.raise_for_status()
         return resp.json()
 
-    def index_audit(self, index: str, doc: Dict[str, Any], doc_type: Optional[str]) -> None:
-        path = self._index_path(index, doc_type)
-        resp = self.client().post(path, json=doc)
+    def bulk_index(self, index: str, docs: List[Dict[str, Any]], doc_type: Optional[str] = None) -> Dict[str, Any]:
+        """Index `docs` into `index` with one `_bulk` request; returns ES's answer (`errors`, `items`)."""
+        path = self._bulk_path(index, doc_type)
+        lines = []
+        for doc in docs:
+            lines.append('{"index":{}}')
+            lines.append(json.dumps(doc, ensure_ascii=False, separators=(",", ":")))
+        resp = self.request(
+            "POST",
+            path,
+            kind="write",
+            content=("\n".join(lines) + "\n").encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
         resp.raise_for_status()
+        return resp.json()
 
 
 def _extract_total(res: Dict[str, Any]) -> int:
@@ -129,16 +395,67 @@ def _extract_total(res: Dict[str, Any]) -> int:
     return 0
 
 
+def _sort_directions(body: Dict[str, Any]) -> List[bool]:
+    """Descending flag per entry of the body's `sort` (ES defaults: `_score` desc, else asc)."""
+    out: List[bool] = []
+    for entry in body.get("sort") or []:
+        if isinstance(entry, str):
+            field, order = entry, None
+        elif isinstance(entry, dict) and entry:
+            field, spec = next(iter(entry.items()))
+            order = spec.get("order") if isinstance(spec, dict) else spec
+        else:
+            continue
+        out.append(str(order).lower() == "desc" if order else field == "_score")
+    return out
+
+
+def _compare_sort_values(a: List[Any], b: List[Any], desc: List[bool]) -> int:
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x == y:
+            continue
+        # Missing values sort last in either direction, like ES
+        if x is None or y is None:
+            return 1 if x is None else -1
+        try:
+            c = -1 if x < y else 1
+        except TypeError:
+            c = -1 if str(x) < str(y) else 1
+        return -c if i < len(desc) and desc[i] else c
+    return 0
+
+
+def _merge_keyed_aggs(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum doc_count of keyed (`filters`) aggregations across clusters.
+
+    List-bucket aggregations (terms, histograms) are not merged here.
+    """
+    merged: Dict[str, Any] = {}
+    for r in results:
+        for name, agg in (r.get("aggregations") or {}).items():
+            buckets = agg.get("buckets") if isinstance(agg, dict) else None
+            if not isinstance(buckets, dict):
+                continue
+            out = merged.setdefault(name, {"buckets": {}})["buckets"]
+            for key, b in buckets.items():
+                slot = out.setdefault(key, {"doc_count": 0})
+                slot["doc_count"] += int(b.get("doc_count", 0))
+    return merged
+
+
 class MultiESClient:
     """Fan-out queries to multiple ES clusters and merge results.
 
     - Executes searches concurrently for performance.
     - Adapts doc_type per-cluster via ESHttpClient.
-    - Merges totals and sorts hits by configured timestamp field.
+    - Merges totals and orders hits by the request's sort (its sort values
+      when hits carry them, else the configured timestamp field).
+    - Clusters cut off by the request deadline are skipped as a partial
+      result when allowed; if none answered, DeadlineExceeded is raised.
     """
 
-    def __init__(self) -> None:
-        self.clients: List[ESHttpClient] = [ESHttpClient(h) for h in settings.ES_HOSTS]
+    def __init__(self, registry: Optional["ClusterRegistry"] = None) -> None:
+        self.clients: List[ESHttpClient] = (registry or cluster_registry).clients()
 
     def search_logs_all(
         self,
@@ -147,33 +464,35 @@ class MultiESClient:
         doc_type: Optional[str] = None,
     ) -> Dict[str, Any]:
         results: List[Dict[str, Any]] = []
-        # 调试输出：并发请求的所有目标主机
-        from ..config import settings as _settings
-        if bool(getattr(_settings, "DEBUG_QUERY_LOGS", False)):
-            try:
-                print("[DEBUG][es] fan-out to hosts =", [c._base_url for c in self.clients])
-                print("[DEBUG][es] indices =", index)
-            except Exception:
-                pass
+        deadline = current_deadline()
+        cut_off = False
+        # Skip clusters marked down; if all are down, try them all anyway
+        clients = [c for c in self.clients if c.available()] or self.clients
         # Run requests concurrently; limit workers to number of clusters.
-        with ThreadPoolExecutor(max_workers=len(self.clients)) as pool:
+        # Each task runs in a copy of the caller's context so phase timing
+        # reaches the request timer.
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
             futures = {
-                pool.submit(c.search_logs, index=index, body=body, doc_type=doc_type): c
-                for c in self.clients
+                pool.submit(copy_context().run, c.search_logs, index=index, body=body, doc_type=doc_type): c
+                for c in clients
             }
             for fut in as_completed(futures):
                 try:
                     results.append(fut.result())
+                except DeadlineExceeded:
+                    if deadline is None or not deadline.allow_partial:
+                        raise
+                    cut_off = True
                 except Exception as e:
-                    if bool(getattr(_settings, "DEBUG_QUERY_LOGS", False)):
-                        try:
-                            client = futures.get(fut)
-                            host = getattr(client, "_base_url", "?")
-                            print("[WARN][es] cluster failed =", host, "err =", repr(e))
-                        except Exception:
-                            pass
                     # Skip failed clusters to be resilient during outages
-                    pass
+                    logger.warning(
+                        "es.cluster.search_failed",
+                        extra={"host": futures[fut]._base_url, "error": repr(e)},
+                    )
+        if cut_off:
+            if not results:
+                raise DeadlineExceeded("no cluster answered within the deadline")
+            deadline.mark_partial()
         # Merge totals
         total = sum(_extract_total(r) for r in results)
         # Merge hits and sort by timestamp
@@ -189,18 +508,121 @@ class MultiESClient:
                 or src.get("timestamp")
                 or (hit.get("sort", [None])[0] or "")
             )
-        # Descending by timestamp; ISO-8601 strings sort correctly lexicographically
-        all_hits.sort(key=ts_key, reverse=True)
+        desc = _sort_directions(body)
+        if all_hits and all(hit.get("sort") for hit in all_hits):
+            # Same sort spec on every cluster: merge on the sort values in the
+            # requested order, so the last hit is a valid search_after cursor
+            all_hits.sort(key=cmp_to_key(lambda a, b: _compare_sort_values(a["sort"], b["sort"], desc)))
+        else:
+            # By timestamp (descending unless the sort says otherwise);
+            # ISO-8601 strings sort correctly lexicographically
+            all_hits.sort(key=ts_key, reverse=desc[0] if desc else True)
         # Respect requested page size
         size = int(body.get("size", 50))
         merged_hits = all_hits[:size]
-        return {
+        # Capped counting (track_total_hits) on any cluster makes the sum a lower bound
+        relation = "eq"
+        for r in results:
+            t = r.get("hits", {}).get("total")
+            if isinstance(t, dict) and t.get("relation") == "gte":
+                relation = "gte"
+        merged: Dict[str, Any] = {
+            "timed_out": cut_off or any(bool(r.get("timed_out")) for r in results),
             "hits": {
-                "total": {"value": total, "relation": "eq"},
+                "total": {"value": total, "relation": relation},
                 "hits": merged_hits,
             }
         }
+        tooks = [r["took"] for r in results if isinstance(r.get("took"), (int, float))]
+        if tooks:
+            # Clusters run in parallel: the slowest one bounds the search
+            merged["took"] = max(tooks)
+        aggs = _merge_keyed_aggs(results)
+        if aggs:
+            merged["aggregations"] = aggs
+        return merged
+
+
+class ClusterRegistry:
+    """One pooled ESHttpClient per configured host, shared by all subsystems.
+
+    - Search (`es_client`, `multi_es_client`), index discovery, the alert
+      scheduler and startup warm-up resolve clusters here, so each host has
+      a single connection pool, version probe and health view.
+    - Hosts are deduplicated after stripping trailing slashes.
+    """
+
+    def __init__(self, hosts: List[str]) -> None:
+        self._clients: Dict[str, ESHttpClient] = {}
+        for h in hosts:
+            self.get(h)
+
+    def get(self, host: str) -> ESHttpClient:
+        """Client for `host`, registering it on first use."""
+        key = host.rstrip("/")
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = ESHttpClient(key)
+        return client
+
+    def clients(self) -> List[ESHttpClient]:
+        return list(self._clients.values())
+
+    def primary(self) -> ESHttpClient:
+        """First configured host: the single-cluster search target."""
+        return next(iter(self._clients.values()))
+
+    def capabilities(self, probe: bool = True) -> Dict[str, bool]:
+        """Features every registered cluster supports (lowest common denominator).
+
+        With `probe`, clusters whose version is still unknown (warm-up did not
+        reach them) are probed first; clusters marked down are not waited on.
+        """
+        common: Dict[str, bool] = {}
+        for i, client in enumerate(self._clients.values()):
+            if probe and client._version_major is None and client.available():
+                client._detect_version()
+            caps = client.capabilities()
+            common = caps if i == 0 else {k: v and caps[k] for k, v in common.items()}
+        return common
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [c.status() for c in self._clients.values()]
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+class _PoolCollector:
+    """Scrape-time pool utilization gauges for every registered cluster."""
+
+    def __init__(self, registry: ClusterRegistry) -> None:
+        self._registry = registry
+
+    def collect(self) -> Any:
+        from prometheus_client.core import GaugeMetricFamily
+
+        conns = GaugeMetricFamily(
+            "mcp_es_pool_connections", "Open ES pool connections", labels=["cluster", "state"]
+        )
+        limit = GaugeMetricFamily(
+            "mcp_es_pool_max_connections", "ES pool connection limit", labels=["cluster"]
+        )
+        for c in self._registry.clients():
+            for state, n in c.pool_stats().items():
+                conns.add_metric([c.cluster, state], n)
+            limit.add_metric([c.cluster], c.limits.max_connections or 0)
+        yield conns
+        yield limit
+
+
+cluster_registry = ClusterRegistry(settings.ES_HOSTS)
+es_client = cluster_registry.primary()
+multi_es_client = MultiESClient()
 
+try:
+    from prometheus_client import REGISTRY
 
-es_client = ESHttpClient()
-multi_es_client = MultiESClient()
\ No newline at end of file
+    REGISTRY.register(_PoolCollector(cluster_registry))
+except Exception:
+    pass
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
+import re
+
+from ..config import settings
+
+# Daily/monthly suffix of an index name: logs-app-2025.01.03, logs-2025-01, logs_20250103
+_INDEX_DATE_RX = re.compile(r"(\d{4})[.\-_]?(\d{2})(?:[.\-_]?(\d{2}))?(?:-\d+)?$")
+_DAY_MS = 86_400_000
+
+DECISIONS = ("ok", "low_priority", "reshaped", "rejected")
+
+
+def index_time_span(name: str) -> Optional[Tuple[int, int]]:
+    """[start_ms, end_ms) covered by a date-suffixed index name, None if undated."""
+    m = _INDEX_DATE_RX.search(name)
+    if not m:
+        return None
+    year, month, day = int(m.group(1)), int(m.group(2)), m.group(3)
+    try:
+        if day is None:
+            start = datetime(year, month, 1, tzinfo=timezone.utc)
+            end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+            return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+        start = datetime(year, month, int(day), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    ms = int(start.timestamp() * 1000)
+    return ms, ms + _DAY_MS
+
+
+def _overlap(span: Optional[Tuple[int, int]], start_ms: Optional[int], end_ms: Optional[int], margin_ms: int) -> float:
+    """Fraction of an index's span inside [start, end] (1.0 when unknown)."""
+    if span is None or start_ms is None or end_ms is None:
+        return 1.0
+    lo, hi = span[0] - margin_ms, span[1] + margin_ms
+    inter = min(hi, end_ms) - max(lo, start_ms)
+    return max(0.0, min(1.0, inter / (hi - lo))) if inter > 0 else 0.0
+
+
+class CostModel:
+    """Pre-flight estimate of a search's ES `took` (ms).
+
+    - Index term: primary shards searched and documents in the time window,
+      from the discovery catalog (`docs.count`, `pri`); date-suffixed
+      indices only count the part overlapping the query range.
+    - DSL term: full-text keyword scoring, aggregations and the hits ES must
+      collect (`from + size`).
+    - Calibration: each completed search feeds `observe(estimate, took)`;
+      an EWMA of log(took / raw estimate) rescales later estimates.
+    """
+
+    def __init__(
+        self,
+        *,
+        per_shard_ms: float = 2.0,
+        per_million_docs_ms: float = 20.0,
+        per_hit_ms: float = 0.02,
+        keyword_factor: float = 3.0,
+        aggs_factor: float = 1.5,
+        margin_ms: int = 3_600_000,
+        alpha: float = 0.05,
+        auto_calibrate: bool = True,
+    ) -> None:
+        self.per_shard_ms = per_shard_ms
+        self.per_million_docs_ms = per_million_docs_ms
+        self.per_hit_ms = per_hit_ms
+        self.keyword_factor = keyword_factor
+        self.aggs_factor = aggs_factor
+        self.margin_ms = margin_ms
+        self.alpha = alpha
+        self.auto_calibrate = auto_calibrate
+        self._log_ratio = 0.0
+        self.samples = 0
+        self._lock = Lock()
+        # Wildcard expansions for the current catalog object (replaced on refresh)
+        self._expanded: Dict[str, List[str]] = {}
+        self._expanded_for: Optional[int] = None
+
+    @property
+    def calibration(self) -> float:
+        return math.exp(self._log_ratio) if self.auto_calibrate else 1.0
+
+    def resolve(self, targets: List[str], catalog: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Catalog indices behind `targets` (wildcards expanded); unknown names kept."""
+        if self._expanded_for != id(catalog):
+            self._expanded, self._expanded_for = {}, id(catalog)
+        out: List[str] = []
+        seen = set()
+        for t in targets:
+            if any(c in t for c in "*?"):
+                names = self._expanded.get(t)
+                if names is None:
+                    names = self._expanded[t] = [n for n in catalog if fnmatchcase(n, t)]
+            else:
+                names = [t]
+            for n in names:
+                if n not in seen:
+                    seen.add(n)
+                    out.append(n)
+        return out
+
+    def estimate(
+        self,
+        *,
+        indices: List[str],
+        catalog: Dict[str, Tuple[int, int]],
+        body: Dict[str, Any],
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+    ) -> Dict[str, Any]:
+        shards = 0
+        docs = 0.0
+        idle: List[str] = []
+        for name in indices:
+            overlap = _overlap(index_time_span(name), start_ms, end_ms, self.margin_ms)
+            if overlap == 0.0:
+                idle.append(name)
+                continue
+            doc_count, pri = catalog.get(name, (0, 1))
+            shards += pri
+            docs += doc_count * overlap
+        features: List[str] = []
+        docs_ms = docs / 1e6 * self.per_million_docs_ms
+        if _has_keyword(body.get("query")):
+            features.append("keyword")
+            docs_ms *= self.keyword_factor
+        if body.get("aggs") or body.get("aggregations"):
+            features.append("aggs")
+            docs_ms *= self.aggs_factor
+        hits = int(body.get("from", 0) or 0) + int(body.get("size", 10) or 0)
+        if hits > 10_000:
+            features.append("deep_page")
+        raw = shards * self.per_shard_ms + docs_ms + hits * shards * self.per_hit_ms
+        return {
+            "estimate_ms": round(raw * self.calibration, 1),
+            "raw_ms": round(raw, 1),
+            "indices": len(indices),
+            "indices_outside_range": idle,
+            "shards": shards,
+            "docs": int(docs),
+            "collect_hits": hits,
+            "features": features,
+        }
+
+    def observe(self, raw_ms: float, took_ms: float) -> None:
+        """Feed back the actual ES `took` of a search estimated at `raw_ms`."""
+        if raw_ms <= 0 or took_ms < 0:
+            return
+        ratio = math.log(max(took_ms, 1.0) / max(raw_ms, 1.0))
+        with self._lock:
+            self.samples += 1
+            # Average the first samples, then move to an EWMA
+            weight = max(self.alpha, 1.0 / self.samples)
+            self._log_ratio += weight * (ratio - self._log_ratio)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "per_shard_ms": self.per_shard_ms,
+            "per_million_docs_ms": self.per_million_docs_ms,
+            "per_hit_ms": self.per_hit_ms,
+            "keyword_factor": self.keyword_factor,
+            "aggs_factor": self.aggs_factor,
+            "calibration": round(self.calibration, 4),
+            "samples": self.samples,
+        }
+
+
+def _has_keyword(node: Any) -> bool:
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k in ("multi_match", "match", "query_string", "match_phrase", "wildcard", "regexp"):
+                return True
+            if _has_keyword(v):
+                return True
+    elif isinstance(node, list):
+        return any(_has_keyword(v) for v in node)
+    return False
+
+
+class CostGuard:
+    """Admit, reshape, deprioritize or reject a search by estimated cost.
+
+    - Below `low_priority_ms`: run as is.
+    - From `reshape_ms`: skip dated indices outside the time range (at most
+      `max_indices` of them) and, on clusters that support it, cap hit
+      counting (`track_total_hits`); then re-estimate. Wildcard targets are
+      kept and followed by `-<index>` exclusions, so indices created after
+      the last discovery refresh are still searched.
+    - From `low_priority_ms`: run in the low-priority lane, at most
+      `low_priority_concurrency` at a time (waiting up to `lane_wait_s`).
+    - From `reject_ms` (after reshaping): reject with the estimate and hints.
+    """
+
+    def __init__(
+        self,
+        model: CostModel,
+        *,
+        enabled: bool = True,
+        low_priority_ms: float = 2000.0,
+        reshape_ms: float = 5000.0,
+        reject_ms: float = 30000.0,
+        low_priority_concurrency: int = 4,
+        lane_wait_s: float = 5.0,
+        count_limit: int = 10_000,
+        max_indices: int = 200,
+    ) -> None:
+        self.model = model
+        self.enabled = enabled
+        self.low_priority_ms = low_priority_ms
+        self.reshape_ms = reshape_ms
+        self.reject_ms = reject_ms
+        self.lane_wait_s = lane_wait_s
+        self.count_limit = count_limit
+        self.max_indices = max_indices
+        self.lane = BoundedSemaphore(low_priority_concurrency)
+
+    def plan(
+        self,
+        *,
+        indices: List[str],
+        catalog: Dict[str, Tuple[int, int]],
+        body: Dict[str, Any],
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+        approximate_count: bool,
+    ) -> Dict[str, Any]:
+        """Decide for one search; may narrow `indices` and edit `body` in place.
+
+        Returns {decision, low_priority, indices, estimate, reshaped, hints}.
+        """
+        resolved = self.model.resolve(indices, catalog)
+        est = self.model.estimate(indices=resolved, catalog=catalog, body=body, start_ms=start_ms, end_ms=end_ms)
+        out: Dict[str, Any] = {"decision": "ok", "indices": indices, "estimate": est, "reshaped": [], "hints": []}
+        if est["estimate_ms"] >= self.reshape_ms:
+            idle = set(est["indices_outside_range"])
+            if idle and len(idle) < len(resolved):
+                narrowed = self._exclude(indices, resolved, idle)
+                if narrowed is not None:
+                    out["indices"] = narrowed
+                    out["reshaped"].append("narrow_indices")
+            if approximate_count and "track_total_hits" not in body:
+                body["track_total_hits"] = self.count_limit
+                out["reshaped"].append("approximate_count")
+            if out["reshaped"]:
+                out["decision"] = "reshaped"
+                searched = [n for n in resolved if n not in idle] if "narrow_indices" in out["reshaped"] else resolved
+                est = out["estimate"] = self.model.estimate(
+                    indices=searched,
+                    catalog=catalog, body=body, start_ms=start_ms, end_ms=end_ms,
+                )
+        if est["estimate_ms"] >= self.reject_ms:
+            out["decision"] = "rejected"
+            if "deep_page" in est["features"]:
+                out["hints"].append("use mode=cursor or /paginate sessions instead of deep pages")
+            out["hints"].append("narrow time_range or index_keyword")
+            if "keyword" in est["features"]:
+                out["hints"].append("add level/service filters to the keyword search")
+        out["low_priority"] = out["decision"] != "rejected" and est["estimate_ms"] >= self.low_priority_ms
+        if out["low_priority"] and out["decision"] == "ok":
+            out["decision"] = "low_priority"
+        return out
+
+    def _exclude(self, targets: List[str], resolved: List[str], idle: Set[str]) -> Optional[List[str]]:
+        """`targets` without the idle indices: concrete names are dropped,
+        wildcards get trailing `-<index>` exclusions. None if over `max_indices`."""
+        wildcards = [t for t in targets if any(c in t for c in "*?")]
+        kept = [t for t in targets if t in wildcards or t not in idle]
+        excluded = [
+            "-" + n for n in resolved if n in idle and any(fnmatchcase(n, w) for w in wildcards)
+        ]
+        if not kept or len(excluded) > self.max_indices:
+            return None
+        # ES applies an exclusion to the wildcards before it
+        return kept + excluded
+
+
+cost_model = CostModel(auto_calibrate=settings.COST_AUTO_CALIBRATE)
+cost_guard = CostGuard(
+    cost_model,
+    enabled=settings.COST_GUARD_ENABLED,
+    low_priority_ms=settings.COST_LOW_PRIORITY_MS,
+    reshape_ms=settings.COST_RESHAPE_MS,
+    reject_ms=settings.COST_REJECT_MS,
+    low_priority_concurrency=settings.COST_LOW_PRIORITY_CONCURRENCY,
+    lane_wait_s=settings.COST_LOW_PRIORITY_WAIT_MS / 1000,
+)
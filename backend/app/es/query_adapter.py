@@ -3,10 +3,31 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 from ..config import settings
+from ..metrics.timing import timed
 
 
+# Fixed histogram intervals (UTC-aligned), smallest first
+_HISTOGRAM_INTERVALS: List[Tuple[str, int]] = [
+    ("1s", 1_000),
+    ("5s", 5_000),
+    ("10s", 10_000),
+    ("30s", 30_000),
+    ("1m", 60_000),
+    ("5m", 300_000),
+    ("10m", 600_000),
+    ("30m", 1_800_000),
+    ("1h", 3_600_000),
+    ("3h", 10_800_000),
+    ("12h", 43_200_000),
+    ("1d", 86_400_000),
+]
+_INTERVAL_UNITS_MS = {"s": 1_000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+@timed("dsl")
 def adapt_query_to_es6(payload: dict = None, **kwargs):
     """Build ES 6.x compatible search DSL.
 
@@ -24,11 +45,16 @@ def adapt_query_to_es6(payload: dict = None, **kwargs):
     sort = query.get("sort") or {}
     mode = str(query.get("mode") or "page")
     cursor_after = query.get("cursor_after")
+    truncate_message = query.get("truncate_message")
+    if truncate_message is None:
+        truncate_message = settings.ES_SERVER_SIDE_TRUNCATION
 
     page = max(1, int(pagination.get("page", 1)))
+    # Byte-budgeted callers pack the page themselves and may lift MAX_PAGE_SIZE
+    max_page_size = int(query.get("max_page_size") or settings.MAX_PAGE_SIZE)
     size = max(
         1,
-        min(int(pagination.get("page_size", 50)), settings.MAX_PAGE_SIZE, 200),
+        min(int(pagination.get("page_size", 50)), max_page_size, 200),
     )
     from_ = (page - 1) * size
 
@@ -146,12 +172,38 @@ def adapt_query_to_es6(payload: dict = None, **kwargs):
         "host",
         "fields.service",
     ]
+    if truncate_message:
+        # 消息体由 ES 截断/高亮后返回，不再传输完整 message
+        includes = [f for f in includes if f not in ("message", "log")]
+        body["highlight"] = build_message_highlight(bool(isinstance(keyword, str) and keyword.strip()))
     body["_source"] = {"includes": sorted(set(includes))}
 
     # Aggregations for stats will be built in another function.
     return body
 
 
+def build_message_highlight(keyword: bool) -> Dict[str, Any]:
+    """Highlight spec that makes ES return the message pre-truncated.
+
+    - No keyword: `no_match_size` yields the first MAX_MESSAGE_LEN chars.
+    - Keyword: up to SNIPPET_FRAGMENTS fragments around the matches.
+    - Empty tags keep the text plain, so normalized output is unchanged.
+    """
+    field: Dict[str, Any] = {"no_match_size": settings.MAX_MESSAGE_LEN}
+    if keyword:
+        field["fragment_size"] = settings.SNIPPET_FRAGMENT_SIZE
+        field["number_of_fragments"] = settings.SNIPPET_FRAGMENTS
+    else:
+        field["fragment_size"] = settings.MAX_MESSAGE_LEN
+        field["number_of_fragments"] = 1
+    return {
+        "pre_tags": [""],
+        "post_tags": [""],
+        "require_field_match": True,
+        "fields": {"message": dict(field), "log": dict(field)},
+    }
+
+
 def build_aggregation_es6(*, field: str) -> Dict[str, Any]:
     return {
         "aggs": {
@@ -160,3 +212,144 @@ def build_aggregation_es6(*, field: str) -> Dict[str, Any]:
             }
         }
     }
+
+
+def build_composite_aggregation_es6(
+    *,
+    field: str,
+    size: int = 100,
+    after_key: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build a paged `composite` aggregation (ES 6.1+).
+
+    - Buckets are returned in key order, `size` at a time.
+    - Pass the previous page's `after_key` to continue; ES keeps no state.
+    - Uses the same `group_stats` name as the terms variant.
+    """
+    composite: Dict[str, Any] = {
+        "size": max(1, int(size)),
+        "sources": [{field: {"terms": {"field": field}}}],
+    }
+    if after_key:
+        composite["after"] = after_key
+    return {"aggs": {"group_stats": {"composite": composite}}}
+
+
+def parse_composite_buckets(
+    agg: Dict[str, Any], *, field: str, size: int
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Flatten composite buckets to the terms shape and compute the next cursor.
+
+    - Each bucket becomes `{"key": <value>, "doc_count": n}`.
+    - ES < 6.3 does not return `after_key`; fall back to the last bucket key.
+    - A short page means the last page: the cursor is None.
+    """
+    raw = agg.get("buckets", []) or []
+    buckets = [
+        {"key": (b.get("key") or {}).get(field), "doc_count": b.get("doc_count", 0)}
+        for b in raw
+    ]
+    if len(raw) < size:
+        return buckets, None
+    after_key = agg.get("after_key") or (raw[-1].get("key") if raw else None)
+    return buckets, after_key
+
+
+def parse_timestamp_ms(value: Any) -> Optional[int]:
+    """Parse an ISO-8601 string (or epoch millis) into epoch millis.
+
+    Returns None for values ES would accept but we cannot evaluate locally
+    (e.g. date math like `now-1h`).
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value or "").strip()
+    if not text:
+        return None
+    if text.isdigit():
+        return int(text)
+    try:
+        dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def format_timestamp_ms(ms: int) -> str:
+    """Format epoch millis as a UTC ISO-8601 string with milliseconds."""
+    dt = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{ms % 1000:03d}Z"
+
+
+def interval_to_ms(interval: str) -> Optional[int]:
+    """Convert a fixed interval such as `5m` to millis; None if unsupported."""
+    text = str(interval or "").strip()
+    unit = _INTERVAL_UNITS_MS.get(text[-1:])
+    if unit is None or not text[:-1].isdigit() or int(text[:-1]) <= 0:
+        return None
+    return int(text[:-1]) * unit
+
+
+def auto_histogram_interval(start_ms: Optional[int], end_ms: Optional[int], target_buckets: int = 60) -> str:
+    """Pick the smallest standard interval that yields at most `target_buckets`."""
+    if start_ms is None or end_ms is None or end_ms <= start_ms:
+        return "1h"
+    span = end_ms - start_ms
+    for name, ms in _HISTOGRAM_INTERVALS:
+        if span / ms <= target_buckets:
+            return name
+    return _HISTOGRAM_INTERVALS[-1][0]
+
+
+def build_date_histogram_es6(
+    *,
+    interval: str,
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+    group_by: Optional[str] = None,
+    group_size: int = 10,
+    fixed_interval: bool = False,
+) -> Dict[str, Any]:
+    """Build a `date_histogram` aggregation with empty buckets filled in.
+
+    - `extended_bounds` + `min_doc_count: 0` returns every bucket in range,
+      so closed buckets can be cached even when they are empty.
+    - `fixed_interval` (ES 7.2+) replaces the legacy `interval` key, which
+      ES 8 rejects; the intervals used here (s/m/h/d) are all fixed.
+    - Optional `group_by` adds a terms split inside each bucket.
+    """
+    histogram: Dict[str, Any] = {
+        "date_histogram": {
+            "field": settings.TIMESTAMP_FIELD,
+            "fixed_interval" if fixed_interval else "interval": interval,
+            "min_doc_count": 0,
+        }
+    }
+    if start_ms is not None and end_ms is not None:
+        histogram["date_histogram"]["extended_bounds"] = {"min": start_ms, "max": end_ms}
+    if group_by:
+        histogram["aggs"] = {
+            "groups": {"terms": {"field": group_by, "size": max(1, int(group_size))}}
+        }
+    return {"aggs": {"histogram": histogram}}
+
+
+def parse_histogram_buckets(agg: Dict[str, Any], *, group_by: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Flatten ES histogram buckets into `{key, key_as_string, doc_count[, groups]}`."""
+    out: List[Dict[str, Any]] = []
+    for b in agg.get("buckets", []) or []:
+        key = int(b.get("key", 0))
+        item: Dict[str, Any] = {
+            "key": key,
+            "key_as_string": b.get("key_as_string") or format_timestamp_ms(key),
+            "doc_count": b.get("doc_count", 0),
+        }
+        if group_by:
+            item["groups"] = [
+                {"key": g.get("key"), "doc_count": g.get("doc_count", 0)}
+                for g in (b.get("groups", {}) or {}).get("buckets", [])
+            ]
+        out.append(item)
+    return out
@@ -0,0 +1,191 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+import hashlib
+import json
+import logging
+import time
+
+from ..config import settings
+
+logger = logging.getLogger("es.queries")
+
+SORT_KEYS = ("total_ms", "p99_ms", "count", "avg_took_ms", "max_bytes")
+
+
+def dsl_shape(node: Any) -> Any:
+    """DSL with literal values replaced by "?" and repeated list shapes collapsed."""
+    if isinstance(node, dict):
+        return {k: dsl_shape(v) for k, v in node.items()}
+    if isinstance(node, list):
+        shapes: List[Any] = []
+        for v in node:
+            s = dsl_shape(v)
+            if s not in shapes:
+                shapes.append(s)
+        return shapes
+    return "?"
+
+
+def dsl_fingerprint(body: Dict[str, Any]) -> str:
+    """Stable id of a DSL's shape: same query with other values -> same fingerprint."""
+    return _fingerprint_of(json.dumps(dsl_shape(body), sort_keys=True, separators=(",", ":")))
+
+
+def _fingerprint_of(shape_json: str) -> str:
+    return hashlib.blake2b(shape_json.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+class _ShapeStats:
+    __slots__ = (
+        "shape", "count", "slow", "errors", "last_error", "latencies", "latency_total", "took_count",
+        "took_total", "took_max", "indices_max", "bytes_total", "bytes_max", "last_seen",
+    )
+
+    def __init__(self, shape: str, samples: int) -> None:
+        self.shape = shape
+        self.count = 0
+        self.slow = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.latencies: Deque[float] = deque(maxlen=samples)
+        self.latency_total = 0.0
+        self.took_count = 0
+        self.took_total = 0.0
+        self.took_max = 0.0
+        self.indices_max = 0
+        self.bytes_total = 0
+        self.bytes_max = 0
+        self.last_seen = 0.0
+
+
+class SlowQueryLog:
+    """Rolling per-fingerprint stats of ES searches.
+
+    - Each search body is fingerprinted by shape (`dsl_shape`), so the same
+      query template with other tenants, times or keywords is one entry.
+    - Bounded: at most `max_fingerprints` entries (least recently seen are
+      evicted) and the last `samples` latencies each for p50/p99.
+    - Searches slower than `threshold_ms` are logged as `es.query.slow`;
+      with DEBUG_QUERY_LOGS every search is logged as `es.query`.
+    - Failed searches (timeouts, HTTP errors) are recorded too, with their
+      `status`: they are often the slowest ones.
+    """
+
+    def __init__(self, enabled: bool = True, threshold_ms: float = 1000.0,
+                 max_fingerprints: int = 500, samples: int = 256) -> None:
+        self.enabled = enabled
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.samples = samples
+        self._stats: "OrderedDict[str, _ShapeStats]" = OrderedDict()
+        self._lock = Lock()
+
+    def record(
+        self,
+        body: Dict[str, Any],
+        *,
+        indices: int,
+        latency_ms: float,
+        took_ms: Optional[float],
+        response_bytes: int,
+        cluster: str = "",
+        status: str = "ok",
+    ) -> Optional[str]:
+        if not self.enabled:
+            return None
+        shape = json.dumps(dsl_shape(body), sort_keys=True, separators=(",", ":"))
+        fp = _fingerprint_of(shape)
+        slow = latency_ms >= self.threshold_ms
+        with self._lock:
+            st = self._stats.get(fp)
+            if st is None:
+                st = self._stats[fp] = _ShapeStats(shape, self.samples)
+                while len(self._stats) > self.max_fingerprints:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(fp)
+            st.count += 1
+            st.slow += 1 if slow else 0
+            if status != "ok":
+                st.errors += 1
+                st.last_error = status
+            st.latencies.append(latency_ms)
+            st.latency_total += latency_ms
+            if took_ms is not None:
+                st.took_count += 1
+                st.took_total += took_ms
+                st.took_max = max(st.took_max, took_ms)
+            st.indices_max = max(st.indices_max, indices)
+            st.bytes_total += response_bytes
+            st.bytes_max = max(st.bytes_max, response_bytes)
+            st.last_seen = time.time()
+        if slow or settings.DEBUG_QUERY_LOGS:
+            logger.log(
+                logging.WARNING if slow else logging.INFO,
+                "es.query.slow" if slow else "es.query",
+                extra={
+                    "fingerprint": fp,
+                    "cluster": cluster,
+                    "latency_ms": round(latency_ms, 1),
+                    "took_ms": took_ms,
+                    "indices": indices,
+                    "bytes": response_bytes,
+                    "status": status,
+                },
+            )
+        return fp
+
+    def top(self, limit: int = 20, sort_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Fingerprints ranked by `sort_by` (one of SORT_KEYS), largest first."""
+        with self._lock:
+            rows = []
+            for fp, st in self._stats.items():
+                lat = sorted(st.latencies)
+                rows.append(
+                    {
+                        "fingerprint": fp,
+                        "count": st.count,
+                        "slow": st.slow,
+                        "errors": st.errors,
+                        "last_error": st.last_error,
+                        "total_ms": round(st.latency_total, 1),
+                        "p50_ms": round(_percentile(lat, 0.5), 1),
+                        "p99_ms": round(_percentile(lat, 0.99), 1),
+                        "max_ms": round(lat[-1], 1) if lat else 0.0,
+                        "avg_took_ms": round(st.took_total / st.took_count, 1) if st.took_count else 0.0,
+                        "max_took_ms": st.took_max,
+                        "max_indices": st.indices_max,
+                        "avg_bytes": st.bytes_total // st.count,
+                        "max_bytes": st.bytes_max,
+                        "last_seen": datetime.fromtimestamp(st.last_seen, tz=timezone.utc).isoformat(),
+                        "dsl": st.shape[:2000],
+                    }
+                )
+        rows.sort(key=lambda r: r[sort_by], reverse=True)
+        return rows[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+slow_query_log = SlowQueryLog(
+    enabled=settings.SLOW_QUERY_ENABLED,
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    max_fingerprints=settings.SLOW_QUERY_MAX_FINGERPRINTS,
+    samples=settings.SLOW_QUERY_SAMPLES,
+)
@@ -0,0 +1,175 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+import logging
+import os
+import threading
+import time
+
+from ..config import settings
+from .client import ESHttpClient, cluster_registry
+
+logger = logging.getLogger("es.warmup")
+
+# Fallback when /proc is unavailable: close enough, imports dominate cold start
+_IMPORT_TS = time.time()
+
+
+def process_start_ts() -> float:
+    """Wall-clock start of this process (Linux /proc), else module import time."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # Process age from the boot-relative clock; btime drifts on some VMs
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return _IMPORT_TS
+
+
+class StartupWarmup:
+    """Parallel cluster warm-up run once at startup, under a time budget.
+
+    - For every registered cluster: detect the version (`GET /`) and open up
+      to `connections` keep-alive connections, so the first user request
+      neither pays the serial version probes nor connection setup.
+    - The first index discovery runs concurrently with the probes.
+    - Steps still running when the budget expires keep going in the
+      background; readiness is reported once all steps finish or the budget
+      expires (`timed_out`), whichever comes first.
+    """
+
+    def __init__(self, budget_s: float = 2.0, connections: int = 2) -> None:
+        self.budget_s = budget_s
+        self.connections = max(1, connections)
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_ts: Optional[float] = None
+        self._ready_ts: Optional[float] = None
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._timed_out = False
+
+    # Public API
+    def is_ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        proc_ts = process_start_ts()
+        return {
+            "ready": self._done.is_set(),
+            "timed_out": self._timed_out,
+            "budget_s": self.budget_s,
+            "warmup_s": round(self._ready_ts - self._started_ts, 3) if self._ready_ts and self._started_ts else None,
+            "cold_start_s": round(self._ready_ts - proc_ts, 3) if self._ready_ts else None,
+            "steps": {k: dict(v) for k, v in self._steps.items()},
+        }
+
+    # Lifecycle hooks
+    def startup(
+        self,
+        clients: Optional[List[ESHttpClient]] = None,
+        discovery: Optional[Callable[[], None]] = None,
+    ) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        if clients is None:
+            clients = cluster_registry.clients()
+        self._thread = threading.Thread(target=self.run, args=(clients, discovery), name="Warmup", daemon=True)
+        self._thread.start()
+
+    def step_status(self, name: str) -> Optional[str]:
+        """`running`, `ok` or `error` for a warm-up step; None if not scheduled."""
+        step = self._steps.get(name)
+        return step["status"] if step else None
+
+    def mark_ready(self) -> None:
+        """Skip warm-up (disabled): report ready immediately."""
+        self._started_ts = self._started_ts or time.time()
+        self._finish()
+
+    # Core logic
+    def run(self, clients: List[ESHttpClient], discovery: Optional[Callable[[], None]] = None) -> None:
+        self._started_ts = time.time()
+        tasks: Dict[str, Callable[[], Any]] = {}
+        for c in clients:
+            tasks[f"version:{c.cluster}"] = lambda c=c: self._warm_client(c)
+        if discovery is not None:
+            tasks["index_discovery"] = discovery
+        pool = ThreadPoolExecutor(max_workers=len(tasks) or 1, thread_name_prefix="warmup")
+        for name in tasks:
+            self._steps[name] = {"status": "running", "seconds": None}
+        try:
+            futures = {pool.submit(self._timed_step, name, fn): name for name, fn in tasks.items()}
+            _, pending = wait(futures, timeout=self.budget_s)
+            self._timed_out = bool(pending)
+            if pending:
+                logger.warning(
+                    "es.warmup.budget_exceeded",
+                    extra={"budget_s": self.budget_s, "pending": sorted(futures[f] for f in pending)},
+                )
+        finally:
+            # Do not wait for stragglers: they finish in the background
+            pool.shutdown(wait=False)
+        self._finish()
+
+    def _warm_client(self, client: ESHttpClient) -> int:
+        # Concurrent probes each check out their own keep-alive connection
+        if self.connections == 1:
+            return client._detect_version()
+        with ThreadPoolExecutor(max_workers=self.connections) as pool:
+            majors = list(pool.map(lambda _: client._detect_version(), range(self.connections)))
+        return majors[0]
+
+    def _timed_step(self, name: str, fn: Callable[[], Any]) -> None:
+        t0 = time.perf_counter()
+        status = "ok"
+        try:
+            # A step returning False (e.g. a refresh that reached no cluster) failed
+            if fn() is False:
+                status = "error"
+        except Exception as e:
+            status = "error"
+            logger.warning("es.warmup.step_failed", extra={"step": name, "error": repr(e)})
+        seconds = time.perf_counter() - t0
+        self._steps[name] = {"status": status, "seconds": round(seconds, 3)}
+        try:
+            from ..metrics.metrics import STARTUP_STEP_SECONDS
+
+            STARTUP_STEP_SECONDS.labels(step=name).set(seconds)
+        except Exception:
+            pass
+
+    def _finish(self) -> None:
+        self._ready_ts = time.time()
+        self._done.set()
+        status = self.get_status()
+        try:
+            from ..metrics.metrics import STARTUP_COLD_START_SECONDS, STARTUP_READY_TIMESTAMP
+
+            STARTUP_READY_TIMESTAMP.set(self._ready_ts)
+            if status["cold_start_s"] is not None:
+                STARTUP_COLD_START_SECONDS.set(status["cold_start_s"])
+        except Exception:
+            pass
+        logger.info(
+            "es.warmup.ready",
+            extra={
+                "warmup_s": status["warmup_s"],
+                "cold_start_s": status["cold_start_s"],
+                "timed_out": self._timed_out,
+            },
+        )
+
+
+startup_warmup = StartupWarmup(
+    budget_s=settings.STARTUP_WARMUP_BUDGET_SECONDS,
+    connections=settings.STARTUP_WARMUP_CONNECTIONS,
+)
@@ -3,7 +3,7 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import threading
 import time
 import logging
@@ -12,11 +12,15 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 import httpx
 
 from ..config import settings
-from ..es.client import ESHttpClient
+from ..es.client import ESHttpClient, cluster_registry
+from ..metrics.timing import timed
 
 
 logger = logging.getLogger("index_discovery")
 
+# After a refresh that reached no cluster, retry sooner than the interval
+_RETRY_SECONDS = 10
+
 
 class IndexDiscoveryService:
     """Index auto-discovery with in-memory cache and periodic refresh.
@@ -27,8 +31,9 @@ class IndexDiscoveryService:
     - Fault-tolerant: skips unavailable hosts and logs warnings.
     """
 
-    def __init__(self) -> None:
-        self._clients: List[ESHttpClient] = [ESHttpClient(h) for h in settings.ES_HOSTS]
+    def __init__(self, clients: Optional[List[ESHttpClient]] = None) -> None:
+        # Registry clients: shared pools, detected versions and health
+        self._clients: List[ESHttpClient] = clients if clients is not None else cluster_registry.clients()
         self._interval_seconds: int = getattr(settings, "INDEX_DISCOVERY_INTERVAL_SECONDS", 60)
         self._include_patterns: List[str] = getattr(
             settings,
@@ -39,6 +44,8 @@ class IndexDiscoveryService:
         self._enabled: bool = getattr(settings, "INDEX_DISCOVERY_ENABLED", True)
 
         self._cache: Set[str] = set()
+        # name -> (docs.count, primary shards), summed across clusters; replaced per refresh
+        self._catalog: Dict[str, Tuple[int, int]] = {}
         self._last_refresh_ts: Optional[float] = None
         self._last_added_count: int = 0
         self._last_removed_count: int = 0
@@ -49,6 +56,10 @@ class IndexDiscoveryService:
     def get_indices(self) -> List[str]:
         return sorted(self._cache)
 
+    def get_catalog(self) -> Dict[str, Tuple[int, int]]:
+        """Per-index `(docs, primary_shards)` from the last refresh (for cost estimates)."""
+        return self._catalog
+
     def get_status(self) -> Dict[str, Optional[float]]:
         return {"last_refresh_ts": self._last_refresh_ts, "enabled": self._enabled}
 
@@ -71,11 +82,19 @@ class IndexDiscoveryService:
         logger.info("index.discovery.config.updated")
 
     # Lifecycle hooks
-    def startup(self) -> None:
+    def startup(self, warmup_status: Optional[Callable[[], Optional[str]]] = None) -> None:
+        """Start the refresh loop.
+
+        `warmup_status` reports the warm-up's own first refresh (`running`,
+        `ok`, `error`); the loop skips its first refresh only when that one
+        succeeded.
+        """
         if self._thread and self._thread.is_alive():
             return
         self._stop_evt.clear()
-        self._thread = threading.Thread(target=self._run_loop, name="IndexDiscovery", daemon=True)
+        self._thread = threading.Thread(
+            target=self._run_loop, args=(warmup_status,), name="IndexDiscovery", daemon=True
+        )
         self._thread.start()
         logger.info("index.discovery.started")
 
@@ -86,47 +105,77 @@ class IndexDiscoveryService:
         logger.info("index.discovery.stopped")
 
     # Core logic
-    def _run_loop(self) -> None:
+    def _await_warmup(self, warmup_status: Callable[[], Optional[str]]) -> Optional[str]:
+        """Final status of the warm-up refresh; None if it is still running after one interval."""
+        deadline = time.monotonic() + self._interval_seconds
+        while not self._stop_evt.is_set() and time.monotonic() < deadline:
+            status = warmup_status()
+            if status not in (None, "running"):
+                return status
+            self._stop_evt.wait(0.2)
+        return None
+
+    def _run_loop(self, warmup_status: Optional[Callable[[], Optional[str]]] = None) -> None:
+        skip = warmup_status is not None and self._await_warmup(warmup_status) == "ok"
         while not self._stop_evt.is_set():
-            if self._enabled:
+            ok = True
+            if skip:
+                skip = False
+            elif self._enabled:
                 try:
-                    self.refresh_once()
+                    ok = self.refresh_once()
                 except Exception:
+                    ok = False
                     logger.exception("index.discovery.refresh.error")
-            # Sleep in short steps to allow quick shutdown
-            remaining = self._interval_seconds
-            while remaining > 0 and not self._stop_evt.is_set():
-                time.sleep(min(1.0, remaining))
-                remaining -= 1
-
-    def refresh_once(self) -> None:
-        """Fetch indices from all hosts concurrently and update cache."""
+            # Wakes up immediately on shutdown
+            self._stop_evt.wait(self._interval_seconds if ok else min(self._interval_seconds, _RETRY_SECONDS))
+
+    def refresh_once(self) -> bool:
+        """Fetch indices from all hosts concurrently and update cache.
+
+        Returns False (cache untouched) when no host answered.
+        """
         discovered: Set[str] = set()
+        catalog: Dict[str, Tuple[int, int]] = {}
+        answered = 0
 
-        def fetch_indices(client: ESHttpClient) -> List[str]:
-            # Use cat indices with minimal fields for speed
-            url = f"{client._base_url}/_cat/indices?h=index&s=index&format=json"
+        def fetch_indices(client: ESHttpClient) -> Optional[List[Dict[str, str]]]:
+            # Use cat indices with minimal fields for speed (doc counts and shards feed the cost model)
+            url = f"{client._base_url}/_cat/indices?h=index,docs.count,pri&s=index&format=json"
             try:
-                resp = client.client().get(url, timeout=5.0)
+                resp = client.request("GET", url, kind="admin")
                 resp.raise_for_status()
                 data = resp.json()
-                return [row.get("index", "") for row in data if row.get("index")]
-            except httpx.HTTPError:
+                client.mark_ok()
+                return [row for row in data if row.get("index")]
+            except httpx.HTTPError as e:
+                client.mark_failed(e)
                 logger.warning("index.discovery.host.unavailable", extra={"host": client._base_url})
-                return []
+                return None
 
         with ThreadPoolExecutor(max_workers=len(self._clients) or 1) as pool:
             futures = {pool.submit(fetch_indices, c): c for c in self._clients}
             for fut in as_completed(futures):
-                for name in fut.result():
+                rows = fut.result()
+                if rows is None:
+                    continue
+                answered += 1
+                for row in rows:
+                    name = row["index"]
                     if self._is_valid(name):
                         discovered.add(name)
+                        docs, pri = catalog.get(name, (0, 0))
+                        catalog[name] = (docs + _as_int(row.get("docs.count")), pri + _as_int(row.get("pri"), 1))
 
+        if self._clients and not answered:
+            # Keep the last known indices rather than an empty cache
+            return False
         # incremental diff
         prev = set(self._cache)
         added = discovered - prev
         removed = prev - discovered
         self._cache = discovered
+        self._catalog = catalog
         self._last_refresh_ts = time.time()
         self._last_added_count = len(added)
         self._last_removed_count = len(removed)
@@ -146,6 +195,7 @@ class IndexDiscoveryService:
                 "removed": self._last_removed_count,
             },
         )
+        return True
 
     # Validation
     def _is_valid(self, name: str) -> bool:
@@ -161,6 +211,7 @@ class IndexDiscoveryService:
         return any(re.search(p, name) for p in self._include_patterns)
 
     # Matching
+    @timed("index_resolution")
     def find_indices(self, *, keyword: str, use_regex: bool = False, fuzzy: bool = True) -> List[str]:
         """Return indices whose names match keyword.
 
@@ -200,5 +251,13 @@ class IndexDiscoveryService:
         return matches
 
 
+def _as_int(value: Optional[str], default: int = 0) -> int:
+    # _cat reports null counts for closed indices
+    try:
+        return int(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
 # Singleton service
 index_discovery = IndexDiscoveryService()
@@ -0,0 +1,120 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Always dictionary-encoded; other columns only when at most half their
+# values are distinct.
+_DICT_COLUMNS = frozenset({"level", "service", "tenant_id", "host", "severity", "rule", "message"})
+
+
+def _encode(values: List[Any]) -> Optional[Tuple[List[Optional[int]], List[Any]]]:
+    """Dictionary-encode a column; None stays None. Returns None if unhashable.
+
+    Keys include the type: `True == 1` and `1 == 1.0` must stay distinct.
+    """
+    index: Dict[Tuple[type, Any], int] = {}
+    codes: List[Optional[int]] = []
+    append = codes.append
+    try:
+        for v in values:
+            if v is None:
+                append(None)
+                continue
+            key = (type(v), v)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(index)
+            append(code)
+    except TypeError:
+        return None
+    return codes, [v for _, v in index]
+
+
+def _column(key: str, values: List[Any], dict_name: str, dicts: Dict[str, List[Any]]) -> List[Any]:
+    if key == "timestamp":
+        return values
+    encoded = _encode(values)
+    if encoded is None or (key not in _DICT_COLUMNS and len(encoded[1]) * 2 > len(values)):
+        return values
+    dicts[dict_name] = encoded[1]
+    return encoded[0]
+
+
+def to_columnar(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn normalized log items into a compact column-oriented payload.
+
+    - `columns[key]` holds one value per row, in row order.
+    - A column listed in `dicts` holds indexes into `dicts[key]` instead of
+      values (None stays None): always `level`/`service`/`tenant_id`/`host`/
+      `severity`/`rule`/`message`, and any other repetitive column. Identical
+      messages are thus sent once, with their number of rows in
+      `message_counts`.
+    - `columns["extra"]` is itself columnar: `{extra_key: [value per row]}`,
+      with None where a row lacks the key; its dictionaries are
+      `dicts["extra.<key>"]`. `extra_absent[extra_key]` lists the rows that
+      lack the key, so they can be told apart from an explicit None.
+    """
+    keys: Dict[str, None] = {}
+    extra_keys: Dict[str, None] = {}
+    for item in items:
+        for k in item:
+            keys.setdefault(k)
+        extra = item.get("extra")
+        if extra:
+            for k in extra:
+                extra_keys.setdefault(k)
+
+    columns: Dict[str, Any] = {}
+    dicts: Dict[str, List[Any]] = {}
+    message_counts: List[int] = []
+    for key in keys:
+        if key == "extra":
+            continue
+        columns[key] = _column(key, [item.get(key) for item in items], key, dicts)
+    if "message" in dicts:
+        message_counts = [0] * len(dicts["message"])
+        for code in columns["message"]:
+            if code is not None:
+                message_counts[code] += 1
+    extra_absent: Dict[str, List[int]] = {}
+    if "extra" in keys:
+        extras = [item.get("extra") or {} for item in items]
+        columns["extra"] = {}
+        for k in extra_keys:
+            columns["extra"][k] = _column(k, [e.get(k) for e in extras], "extra." + k, dicts)
+            absent = [i for i, e in enumerate(extras) if k not in e]
+            if absent:
+                extra_absent[k] = absent
+    return {
+        "format": "columnar",
+        "rows": len(items),
+        "columns": columns,
+        "dicts": dicts,
+        "message_counts": message_counts,
+        "extra_absent": extra_absent,
+    }
+
+
+def from_columnar(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild row items from `to_columnar` output."""
+    columns = data["columns"]
+    dicts = data["dicts"]
+    rows: List[Dict[str, Any]] = [{} for _ in range(data["rows"])]
+    for key, values in columns.items():
+        if key == "extra":
+            continue
+        lookup = dicts.get(key)
+        for row, v in zip(rows, values):
+            row[key] = lookup[v] if lookup is not None and v is not None else v
+    if "extra" in columns:
+        extra = {
+            k: [dicts["extra." + k][v] if v is not None else None for v in vals] if "extra." + k in dicts else vals
+            for k, vals in columns["extra"].items()
+        }
+        absent = {k: set(v) for k, v in (data.get("extra_absent") or {}).items()}
+        for i, row in enumerate(rows):
+            row["extra"] = {k: vals[i] for k, vals in extra.items() if i not in absent.get(k, ())}
+    return rows
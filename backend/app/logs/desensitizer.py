@@ -0,0 +1,176 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+import re
+
+from ..config import settings
+
+
+# Masking rules, in priority order where they overlap (JWT before k/v, ID
+# numbers before phones). Leading look-behinds are written after the first
+# character so `re` can still skip ahead on that character.
+_RULES = [
+    ("email", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"),
+    ("jwt", r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+"),
+    ("bearer", r"(?P<bearer_k>[Bb](?i:earer)\s+)[A-Za-z0-9\-._~+/]+=*"),
+    (
+        "kv",
+        r"(?P<kv_k>(?i:access_token|refresh_token|token|api[_-]?key|secret|password|passwd|pwd)"
+        r"\s*[=:]\s*\"?)[^\s\"'&,;]+",
+    ),
+    (
+        "idcard",
+        r"[1-9](?<![0-9][1-9])[0-9]{5}(?:19|20)[0-9]{2}(?:0[1-9]|1[0-2])"
+        r"(?:0[1-9]|[12][0-9]|3[01])[0-9]{3}[0-9Xx](?![0-9])",
+    ),
+    ("phone", r"1(?<![0-9]1)[3-9][0-9]{9}(?![0-9])"),
+    (
+        "ip",
+        r"[0-9](?<![0-9.][0-9])[0-9]{0,2}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}(?![0-9.])",
+    ),
+]
+_RULE_BITS = {name: 1 << i for i, (name, _) in enumerate(_RULES)}
+_DIGIT_RULES = _RULE_BITS["idcard"] | _RULE_BITS["phone"] | _RULE_BITS["ip"]
+_KV_LITERALS = ("token", "key", "secret", "passw", "pwd")
+_DIGIT_RX = re.compile(r"[0-9]")
+_combined: Dict[int, "re.Pattern[str]"] = {}
+
+
+def _rules_for(text: str) -> int:
+    """Literal prefilter: bitmask of rules that could match `text`."""
+    mask = _DIGIT_RULES if _DIGIT_RX.search(text) else 0
+    if "@" in text:
+        mask |= _RULE_BITS["email"]
+    if "eyJ" in text:
+        mask |= _RULE_BITS["jwt"]
+    low = text.lower()
+    if "bearer" in low:
+        mask |= _RULE_BITS["bearer"]
+    if any(k in low for k in _KV_LITERALS):
+        mask |= _RULE_BITS["kv"]
+    return mask
+
+
+def _regex_for(mask: int) -> "re.Pattern[str]":
+    """One alternation of the rules in `mask` (at most 2**7 variants, cached)."""
+    rx = _combined.get(mask)
+    if rx is None:
+        rx = re.compile(
+            "|".join(f"(?P<{name}>{pat})" for name, pat in _RULES if mask & _RULE_BITS[name])
+        )
+        _combined[mask] = rx
+    return rx
+
+
+# Values under these keys are masked entirely, whatever they contain.
+_SENSITIVE_KEYS = frozenset(
+    {"password", "passwd", "pwd", "secret", "token", "access_token", "refresh_token",
+     "api_key", "apikey", "authorization", "cookie"}
+)
+_FULL_MASK = "******"
+
+
+def _mask_email(m: "re.Match[str]") -> str:
+    local, _, domain = m.group("email").partition("@")
+    return f"{local[:1]}***@{domain}"
+
+
+def _mask_ip(m: "re.Match[str]") -> str:
+    a, b, _, _ = m.group("ip").split(".")
+    return f"{a}.{b}.*.*"
+
+
+_REPLACERS: Dict[str, Callable[["re.Match[str]"], str]] = {
+    "email": _mask_email,
+    "jwt": lambda m: "eyJ******",
+    "bearer": lambda m: m.group("bearer_k") + _FULL_MASK,
+    "kv": lambda m: m.group("kv_k") + _FULL_MASK,
+    "idcard": lambda m: m.group("idcard")[:3] + "*" * 11 + m.group("idcard")[-4:],
+    "phone": lambda m: m.group("phone")[:3] + "****" + m.group("phone")[-4:],
+    "ip": _mask_ip,
+}
+
+
+def _replace(m: "re.Match[str]") -> str:
+    return _REPLACERS[m.lastgroup](m)
+
+
+def _mask_text_uncached(text: str) -> str:
+    mask = _rules_for(text)
+    if not mask:
+        return text
+    return _regex_for(mask).sub(_replace, text)
+
+
+class LogDesensitizer:
+    """Masks phones, emails, ID numbers, tokens and IPs in normalized logs.
+
+    - A literal prefilter picks the rules that could match; those run as one
+      combined regex pass. Strings no rule can match are returned untouched.
+    - Results are memoized (LRU): identical messages repeat a lot in logs.
+    - Walks `message` and nested `extra`; non-string values are left as is.
+    """
+
+    def __init__(self, enabled: bool = True, cache_size: int = 10000) -> None:
+        self.enabled = enabled
+        self._mask_text: Callable[[str], str] = (
+            lru_cache(maxsize=cache_size)(_mask_text_uncached) if cache_size > 0 else _mask_text_uncached
+        )
+
+    def mask_text(self, text: str) -> str:
+        return self._mask_text(text)
+
+    def _mask_value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._mask_text(value)
+        if isinstance(value, dict):
+            return self._mask_dict(value)
+        if isinstance(value, list):
+            return [self._mask_value(v) for v in value]
+        return value
+
+    def _mask_dict(self, d: Dict[str, Any]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for k, v in d.items():
+            if v is not None and str(k).lower() in _SENSITIVE_KEYS:
+                out[k] = _FULL_MASK
+            else:
+                out[k] = self._mask_value(v)
+        return out
+
+    def desensitize_log(self, log: Dict[str, Any]) -> Dict[str, Any]:
+        """Mask one normalized log in place and return it."""
+        if not self.enabled:
+            return log
+        msg = log.get("message")
+        if isinstance(msg, str):
+            log["message"] = self._mask_text(msg)
+        extra = log.get("extra")
+        if extra:
+            log["extra"] = self._mask_dict(extra)
+        return log
+
+    def desensitize_batch(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mask a page of normalized logs in place and return it."""
+        if not self.enabled:
+            return logs
+        mask_text = self._mask_text
+        mask_dict = self._mask_dict
+        for log in logs:
+            msg = log.get("message")
+            if isinstance(msg, str):
+                log["message"] = mask_text(msg)
+            extra = log.get("extra")
+            if extra:
+                log["extra"] = mask_dict(extra)
+        return logs
+
+
+log_desensitizer = LogDesensitizer(
+    enabled=settings.DESENSITIZE_ENABLED,
+    cache_size=settings.DESENSITIZE_CACHE_SIZE,
+)
@@ -3,47 +3,163 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from ..metrics.timing import timed
 
-def normalize(hit: Dict[str, Any]) -> Dict[str, Any]:
-    from ..config import settings
-    # 导入脱敏器
-    from .desensitizer import log_desensitizer
-    
-    src = hit.get("_source", {})
-    msg = src.get("message") or src.get("log")
-    if msg is not None:
-        msg = str(msg)
-        if len(msg) > settings.MAX_MESSAGE_LEN:
-            msg = msg[: settings.MAX_MESSAGE_LEN]
-    
-    # 构建原始日志数据
-    raw_log = {
-        "timestamp": src.get("@timestamp")
-        or src.get("timestamp")
-        or hit.get("sort", [None])[0],
-        "level": src.get("level"),
-        "message": msg,
-        "service": src.get("service"),
-        "tenant_id": src.get("tenant_id"),
-        "host": src.get("host"),
-        "extra": {
-            k: v
-            for k, v in src.items()
-            if k
-            not in {
-                "@timestamp",
-                "timestamp",
-                "level",
-                "message",
-                "log",
-                "service",
-                "tenant_id",
-                "host",
-            }
-        },
+# Source keys promoted to top-level fields; everything else goes to `extra`.
+_CORE_KEYS = frozenset(
+    {
+        "@timestamp",
+        "timestamp",
+        "level",
+        "message",
+        "log",
+        "service",
+        "tenant_id",
+        "host",
     }
-    
-    # 对日志数据进行脱敏处理
-    return log_desensitizer.desensitize_log(raw_log)
\ No newline at end of file
+)
+
+_SNIPPET_SEP = " … "
+# Hits normalized per step when packing against a byte budget.
+_PACK_CHUNK = 16
+
+
+class _FieldPlan:
+    """Per-settings normalization plan, compiled once and reused per batch.
+
+    - Holds the message length cap and the batch desensitizer entry point so
+      the per-hit loop does no imports or attribute lookups on settings.
+    """
+
+    __slots__ = ("max_len", "desensitize")
+
+    def __init__(
+        self,
+        max_len: int,
+        desensitize: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]],
+    ) -> None:
+        self.max_len = max_len
+        self.desensitize = desensitize
+
+
+_plan: Optional[_FieldPlan] = None
+
+
+def _get_plan(desensitize: bool) -> _FieldPlan:
+    global _plan
+    from ..config import settings
+
+    if _plan is None or _plan.max_len != settings.MAX_MESSAGE_LEN:
+        _plan = _FieldPlan(settings.MAX_MESSAGE_LEN, None)
+    if desensitize and _plan.desensitize is None:
+        # 导入脱敏器
+        from .desensitizer import log_desensitizer
+
+        _plan.desensitize = log_desensitizer.desensitize_batch
+    return _plan
+
+
+@timed("normalize")
+def normalize_batch(hits: List[Dict[str, Any]], *, desensitize: bool = True) -> List[Dict[str, Any]]:
+    """Normalize a page of ES hits into standard log dicts.
+
+    Same output as calling `normalize` per hit, with the plan resolved once
+    per batch instead of once per hit.
+    """
+    plan = _get_plan(desensitize)
+    max_len = plan.max_len
+    core = _CORE_KEYS
+    mask = plan.desensitize if desensitize else None
+    out: List[Dict[str, Any]] = []
+    append = out.append
+    for hit in hits:
+        src = hit.get("_source") or {}
+        # ES-side truncation: message arrives as highlight fragments
+        hl = hit.get("highlight")
+        frags = (hl.get("message") or hl.get("log")) if hl else None
+        msg = _SNIPPET_SEP.join(frags) if frags else (src.get("message") or src.get("log"))
+        if msg is not None:
+            msg = str(msg)
+            if len(msg) > max_len:
+                msg = msg[:max_len]
+        ts = src.get("@timestamp") or src.get("timestamp")
+        if not ts:
+            sort = hit.get("sort")
+            ts = sort[0] if sort else None
+        # 构建原始日志数据
+        raw_log = {
+            "timestamp": ts,
+            "level": src.get("level"),
+            "message": msg,
+            "service": src.get("service"),
+            "tenant_id": src.get("tenant_id"),
+            "host": src.get("host"),
+            "extra": {k: v for k, v in src.items() if k not in core},
+        }
+        append(raw_log)
+    # 对日志数据进行脱敏处理（整页一次）
+    return mask(out) if mask is not None else out
+
+
+def normalize(hit: Dict[str, Any]) -> Dict[str, Any]:
+    return normalize_batch([hit])[0]
+
+
+def estimate_json_bytes(value: Any) -> int:
+    """Estimate the compact UTF-8 JSON size of `value` without serializing it.
+
+    Matches `json.dumps(..., ensure_ascii=False, separators=(",", ":"))` and
+    orjson for the types logs contain; rare control-char escapes are
+    undercounted by a few bytes each.
+    """
+    if isinstance(value, str):
+        n = len(value) if value.isascii() else len(value.encode("utf-8"))
+        # quotes, plus one extra byte per two-char escape
+        return (
+            n + 2 + value.count('"') + value.count("\\")
+            + value.count("\n") + value.count("\t") + value.count("\r")
+        )
+    if value is None:
+        return 4
+    if value is True:
+        return 4
+    if value is False:
+        return 5
+    if isinstance(value, dict):
+        if not value:
+            return 2
+        total = 1 + len(value)  # braces and separators
+        for k, v in value.items():
+            total += estimate_json_bytes(k if isinstance(k, str) else str(k)) + 1 + estimate_json_bytes(v)
+        return total
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        return 1 + len(value) + sum(estimate_json_bytes(v) for v in value)
+    if isinstance(value, (int, float)):
+        return len(repr(value))
+    return estimate_json_bytes(str(value))
+
+
+def normalize_within_budget(
+    hits: List[Dict[str, Any]], max_bytes: int, *, desensitize: bool = True
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Normalize hits in order until their JSON array would exceed `max_bytes`.
+
+    Returns `(items, used_bytes)`; `items[i]` comes from `hits[i]`, so the
+    caller resumes after `hits[len(items) - 1]`. The first item is always
+    kept, so a single oversized log cannot stall paging. Hits past the budget
+    are never normalized or desensitized.
+    """
+    items: List[Dict[str, Any]] = []
+    used = 2  # "[]"
+    for start in range(0, len(hits), _PACK_CHUNK):
+        for item in normalize_batch(hits[start:start + _PACK_CHUNK], desensitize=desensitize):
+            size = estimate_json_bytes(item) + (1 if items else 0)
+            if items and used + size > max_bytes:
+                return items, used
+            items.append(item)
+            used += size
+    return items, used
@@ -0,0 +1,158 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from typing import Any, Dict, List, Optional
+import re
+
+WILDCARD = "<*>"
+
+# Variable tokens: any run holding a digit (numbers, ids, IPs, durations,
+# timestamps). Keys before "=" / ":" are kept, so "user=42" -> "user=<*>".
+_VAR_RX = re.compile(r"[^\s=:,;\"'()\[\]{}]*[0-9][^\s=:,;\"'()\[\]{}]*")
+_DIGIT_RX = re.compile(r"[0-9]")
+
+
+class _Cluster:
+    __slots__ = ("id", "tokens", "count", "first_ts", "last_ts", "example_ids")
+
+    def __init__(self, cid: int, tokens: List[str]) -> None:
+        self.id = cid
+        self.tokens = tokens
+        self.count = 0
+        self.first_ts: Any = None
+        self.last_ts: Any = None
+        self.example_ids: List[str] = []
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class LogPatternMiner:
+    """Incremental Drain-style template miner.
+
+    - Lines are masked (digit-bearing tokens -> `<*>`) and routed through a
+      fixed-depth tree: token count, then the first `depth - 2` tokens.
+      Each leaf holds clusters; a line joins the most similar one (share of
+      equal non-wildcard tokens >= `sim_threshold`), whose template then
+      turns differing tokens into `<*>`.
+    - Memory is bounded: at most `max_clusters` templates and
+      `max_children` branches per node (extra tokens share a `<*>` branch);
+      lines that would open a cluster past the cap are counted in `other`.
+    - Masked lines already placed are memoized, so repeated shapes cost one
+      regex pass and a dict lookup.
+    - Feed lines in time order: first/last timestamps are first/last seen.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        sim_threshold: float = 0.5,
+        max_children: int = 100,
+        max_clusters: int = 1000,
+        max_examples: int = 3,
+        cache_size: int = 100000,
+    ) -> None:
+        self.prefix_len = max(1, depth - 2)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_examples = max_examples
+        self.cache_size = cache_size
+        self.clusters: List[_Cluster] = []
+        self.lines = 0
+        self.other = 0
+        self._root: Dict[int, Dict[str, Any]] = {}
+        self._cache: Dict[str, _Cluster] = {}
+
+    def _leaf(self, tokens: List[str]) -> List[_Cluster]:
+        node = self._root.get(len(tokens))
+        if node is None:
+            node = self._root[len(tokens)] = {}
+        for tok in tokens[: self.prefix_len]:
+            if WILDCARD in tok:
+                tok = WILDCARD
+            child = node.get(tok)
+            if child is None:
+                if len(node) >= self.max_children:
+                    tok = WILDCARD
+                    child = node.get(tok)
+                if child is None:
+                    child = node[tok] = {}
+            node = child
+        leaf = node.get("")
+        if leaf is None:
+            leaf = node[""] = []
+        return leaf
+
+    def _match(self, leaf: List[_Cluster], tokens: List[str]) -> Optional[_Cluster]:
+        best: Optional[_Cluster] = None
+        best_sim = -1.0
+        best_params = -1
+        n = len(tokens)
+        for cluster in leaf:
+            same = params = 0
+            for t, u in zip(cluster.tokens, tokens):
+                if t == WILDCARD:
+                    params += 1
+                elif t == u:
+                    same += 1
+            sim = same / n if n else 1.0
+            if sim > best_sim or (sim == best_sim and params > best_params):
+                best, best_sim, best_params = cluster, sim, params
+        if best is not None and best_sim >= self.sim_threshold:
+            return best
+        return None
+
+    def _place(self, masked: str) -> Optional[_Cluster]:
+        tokens = masked.split()
+        leaf = self._leaf(tokens)
+        cluster = self._match(leaf, tokens)
+        if cluster is not None:
+            if cluster.tokens != tokens:
+                cluster.tokens = [t if t == u else WILDCARD for t, u in zip(cluster.tokens, tokens)]
+        elif len(self.clusters) < self.max_clusters:
+            cluster = _Cluster(len(self.clusters), tokens)
+            self.clusters.append(cluster)
+            leaf.append(cluster)
+        else:
+            return None
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[masked] = cluster
+        return cluster
+
+    def add(self, line: str, ts: Any = None, doc_id: Optional[str] = None) -> Optional[_Cluster]:
+        """Place one line; returns its cluster (None when over `max_clusters`)."""
+        self.lines += 1
+        masked = _VAR_RX.sub(WILDCARD, line) if _DIGIT_RX.search(line) else line
+        cluster = self._cache.get(masked)
+        if cluster is None:
+            cluster = self._place(masked)
+            if cluster is None:
+                self.other += 1
+                return None
+        cluster.count += 1
+        if cluster.first_ts is None:
+            cluster.first_ts = ts
+        cluster.last_ts = ts
+        if doc_id is not None and len(cluster.example_ids) < self.max_examples:
+            cluster.example_ids.append(doc_id)
+        return cluster
+
+    def top(self, n: int = 20) -> List[Dict[str, Any]]:
+        """The `n` most frequent templates, largest first."""
+        ranked = sorted(self.clusters, key=lambda c: c.count, reverse=True)[:n]
+        return [
+            {
+                "template": c.template,
+                "count": c.count,
+                "ratio": round(c.count / self.lines, 6) if self.lines else 0.0,
+                "first_ts": c.first_ts,
+                "last_ts": c.last_ts,
+                "example_ids": list(c.example_ids),
+            }
+            for c in ranked
+        ]
@@ -3,15 +3,22 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
 from .routes.logs import router as logs_router
 from .routes.health import router as health_router
 from .routes.indices import router as indices_router
+from .routes.debug import router as debug_router
 from .metrics.metrics import metrics_app
+from .metrics.timing import RequestTimingMiddleware
 from .indexes.service import index_discovery
+from .es.warmup import startup_warmup
+from .alerts.scheduler import alert_scheduler
+from .es.audit import audit_scope, audit_writer
+from .tenancy.admission import admit
+from .utils.deadline import DeadlineExceeded, deadline_exceeded_handler, request_deadline
 
 
 def create_app() -> FastAPI:
@@ -25,21 +32,46 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Per-request phase timing (Prometheus + optional Server-Timing header)
+    app.add_middleware(RequestTimingMiddleware)
 
     app.include_router(health_router, tags=["health"])
-    app.include_router(logs_router, prefix="/api/logs", tags=["logs"])
+    # ES-backed routes start their time budget, tag their searches for the
+    # audit trail, then pass per-tenant admission control
+    app.include_router(
+        logs_router,
+        prefix="/api/logs",
+        tags=["logs"],
+        dependencies=[Depends(request_deadline), Depends(audit_scope), Depends(admit)],
+    )
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
     app.include_router(indices_router, prefix="/api/indices", tags=["indices"])
+    app.include_router(debug_router, prefix="/api/debug", tags=["debug"])
 
     if settings.METRICS_ENABLED:
         app.mount("/metrics", metrics_app)
 
     @app.on_event("startup")
     def _startup():
-        index_discovery.startup()
+        if settings.STARTUP_WARMUP_ENABLED:
+            # Warm-up runs the first index refresh; the discovery loop starts after it
+            first_refresh = index_discovery.refresh_once if settings.INDEX_DISCOVERY_ENABLED else None
+            startup_warmup.startup(discovery=first_refresh)
+            # The loop skips its first refresh only if the warm-up one succeeded
+            index_discovery.startup(
+                warmup_status=(lambda: startup_warmup.step_status("index_discovery")) if first_refresh else None
+            )
+        else:
+            startup_warmup.mark_ready()
+            index_discovery.startup()
+        alert_scheduler.startup()
+        audit_writer.startup()
 
     @app.on_event("shutdown")
     def _shutdown():
         index_discovery.shutdown()
+        alert_scheduler.shutdown()
+        audit_writer.shutdown()
 
     return app
 
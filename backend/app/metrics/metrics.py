@@ -9,10 +9,64 @@ REQUESTS_TOTAL = Counter("mcp_requests_total", "Total API requests", ["endpoint"
 REQUEST_LATENCY = Histogram("mcp_request_latency_ms", "API latency (ms)", ["endpoint"]) 
 ES_BACKEND_LATENCY = Histogram("mcp_es_backend_latency_ms", "ES backend latency (ms)", ["endpoint"]) 
 CACHE_HIT_RATIO = Gauge("mcp_cache_hit_ratio", "Cache hit ratio")
+# Per-request phase breakdown (auth, dsl, index_resolution, es_network, es_took, decode, normalize, serialize)
+PHASE_LATENCY = Histogram(
+    "mcp_request_phase_ms", "Request phase time (ms)", ["endpoint", "phase", "cluster"]
+)
+
+# ES connection pools (utilization gauges are collected at scrape time in es/client.py)
+ES_POOL_WAIT_MS = Histogram(
+    "mcp_es_pool_wait_ms", "Time waiting for a pooled ES connection (ms)", ["cluster"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+ES_POOL_CONNECTIONS_OPENED = Counter("mcp_es_pool_connections_opened_total", "New ES connections", ["cluster"])
+ES_POOL_IN_FLIGHT = Gauge("mcp_es_pool_in_flight", "ES requests in flight", ["cluster"])
+
+# Per-tenant admission control (reason: rate_limited | queue_full | queue_timeout)
+ADMISSION_REJECTED_TOTAL = Counter("mcp_admission_rejected_total", "Rejected requests", ["tenant", "reason"])
+ADMISSION_QUEUE_DEPTH = Gauge("mcp_admission_queue_depth", "Requests waiting for a slot", ["tenant"])
+ADMISSION_IN_FLIGHT = Gauge("mcp_admission_in_flight", "Admitted requests in flight", ["tenant"])
+ADMISSION_QUEUE_WAIT_MS = Histogram("mcp_admission_queue_wait_ms", "Time queued for a slot (ms)", ["tenant"])
+
+# Pre-flight query cost (decision: ok | low_priority | reshaped | rejected)
+QUERY_COST_DECISIONS = Counter("mcp_query_cost_decisions_total", "Cost guard decisions", ["decision"])
+QUERY_COST_ESTIMATE_MS = Histogram(
+    "mcp_query_cost_estimate_ms", "Estimated ES took (ms)",
+    buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 2000, 5000, 10000, 30000, 60000),
+)
+# actual took / estimate; calibrated models cluster around 1
+QUERY_COST_ACCURACY = Histogram(
+    "mcp_query_cost_accuracy_ratio", "Actual ES took divided by the estimate",
+    buckets=(0.1, 0.25, 0.5, 0.8, 1.25, 2, 4, 10),
+)
+
+# Requests that ran out of time budget (outcome: partial | exceeded)
+REQUEST_DEADLINE_TOTAL = Counter("mcp_request_deadline_total", "Requests that hit their time budget", ["outcome"])
+
+# Startup warm-up (cold start = ready timestamp - process_start_time_seconds)
+STARTUP_STEP_SECONDS = Gauge("mcp_startup_step_seconds", "Warm-up step duration", ["step"])
+STARTUP_COLD_START_SECONDS = Gauge("mcp_startup_cold_start_seconds", "Process start to ready (s)")
+STARTUP_READY_TIMESTAMP = Gauge("mcp_startup_ready_timestamp_seconds", "Unix time the service became ready")
 
 # Index discovery and matching metrics
 INDEX_REFRESH_TOTAL = Counter("mcp_index_refresh_total", "Index discovery refreshes", [])
 INDEX_COUNT_GAUGE = Gauge("mcp_index_count", "Discovered indices count")
 INDEX_MATCH_RATIO = Gauge("mcp_index_match_ratio", "Index match success ratio")
 
+# Alert scheduler metrics
+ALERT_SCHEDULER_RUNS = Counter("mcp_alert_scheduler_runs_total", "Alert scheduler evaluation ticks", [])
+ALERT_MATCHED_TOTAL = Counter("mcp_alert_matched_total", "Alerts matched by scheduler", ["rule"])
+ALERT_WATERMARK_LAG = Gauge("mcp_alert_watermark_lag_seconds", "Now minus rule watermark", ["rule"])
+
+# Query audit trail (dropped reason: queue_full | rejected | es_unavailable | spill_full | corrupt;
+# flush outcome: ok | error | spilled | replayed)
+AUDIT_DROPPED_TOTAL = Counter("mcp_audit_dropped_total", "Audit events dropped", ["reason"])
+AUDIT_FLUSHES_TOTAL = Counter("mcp_audit_flushes_total", "Audit bulk flushes", ["outcome"])
+AUDIT_WRITTEN_TOTAL = Counter("mcp_audit_written_total", "Audit events indexed")
+AUDIT_QUEUE_DEPTH = Gauge("mcp_audit_queue_depth", "Audit events waiting to be written")
+AUDIT_SPILL_BYTES = Gauge("mcp_audit_spill_bytes", "Size of the audit spill file")
+
+# RBAC policy file reloads (outcome: ok | error)
+RBAC_RELOADS_TOTAL = Counter("mcp_rbac_reloads_total", "RBAC policy reloads", ["outcome"])
+
 metrics_app = make_asgi_app()
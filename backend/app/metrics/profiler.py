@@ -0,0 +1,124 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from collections import Counter
+from threading import Lock, enumerate as enumerate_threads, get_ident
+from time import perf_counter, sleep
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+
+# Leaf frames of parked threads (idle pool workers, event loop select)
+_IDLE_LEAVES = frozenset(
+    {
+        ("threading.py", "wait"),
+        ("threading.py", "_wait_for_tstate_lock"),
+        ("queue.py", "get"),
+        ("selectors.py", "select"),
+    }
+)
+
+
+def _frame_label(code: Any) -> Tuple[str, str]:
+    return os.path.basename(code.co_filename), code.co_name
+
+
+class StackSampler:
+    """Wall-clock sampling profiler over all Python threads.
+
+    - Every `interval_s` it reads `sys._current_frames()` and counts each
+      thread's stack (root first), so threadpool workers running sync
+      routes and background threads (IndexDiscovery, AlertScheduler) are
+      all covered. The sampling thread itself is skipped.
+    - Parked threads (waiting on a queue, lock or selector) are dropped
+      unless `include_idle`.
+    - One profile at a time; overhead is a frame walk per thread per tick.
+    """
+
+    def __init__(self, max_depth: int = 128) -> None:
+        self.max_depth = max_depth
+        self._busy = Lock()
+
+    def sample(
+        self, seconds: float, interval_s: float = 0.01, include_idle: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Profile for `seconds`; None when another profile is running."""
+        if not self._busy.acquire(blocking=False):
+            return None
+        try:
+            return self._run(seconds, interval_s, include_idle)
+        finally:
+            self._busy.release()
+
+    def _run(self, seconds: float, interval_s: float, include_idle: bool) -> Dict[str, Any]:
+        me = get_ident()
+        stacks: Counter = Counter()
+        threads: Counter = Counter()
+        ticks = 0
+        t0 = perf_counter()
+        deadline = t0 + seconds
+        while True:
+            names = {t.ident: t.name for t in enumerate_threads()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels: List[Tuple[str, str]] = []
+                f = frame
+                while f is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(f.f_code))
+                    f = f.f_back
+                if not labels or (not include_idle and labels[0] in _IDLE_LEAVES):
+                    continue
+                name = names.get(ident, f"thread-{ident}")
+                labels.reverse()
+                stacks[(name, tuple(labels))] += 1
+                threads[name] += 1
+            ticks += 1
+            now = perf_counter()
+            if now >= deadline:
+                break
+            sleep(min(interval_s, deadline - now))
+        return {
+            "duration_s": round(perf_counter() - t0, 3),
+            "ticks": ticks,
+            "samples": sum(stacks.values()),
+            "threads": dict(threads.most_common()),
+            "stacks": stacks,
+        }
+
+
+def collapse(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed format: `thread;file:func;... count` per line."""
+    lines = []
+    for (thread, frames), n in stacks.most_common():
+        path = ";".join([thread.replace(" ", "_")] + [f"{f}:{fn}".replace(" ", "_") for f, fn in frames])
+        lines.append(f"{path} {n}")
+    return "\n".join(lines)
+
+
+def top_functions(stacks: Counter, limit: int = 30) -> List[Dict[str, Any]]:
+    """Functions by self samples (leaf) with their inclusive (on-stack) samples."""
+    own: Counter = Counter()
+    total: Counter = Counter()
+    samples = 0
+    for (_, frames), n in stacks.items():
+        samples += n
+        own[frames[-1]] += n
+        for fr in set(frames):
+            total[fr] += n
+    ranked = sorted(total, key=lambda fr: (own[fr], total[fr]), reverse=True)[:limit]
+    return [
+        {
+            "function": f"{f}:{fn}",
+            "self": own[(f, fn)],
+            "total": total[(f, fn)],
+            "self_pct": round(100 * own[(f, fn)] / samples, 2) if samples else 0.0,
+            "total_pct": round(100 * total[(f, fn)] / samples, 2) if samples else 0.0,
+        }
+        for f, fn in ranked
+    ]
+
+
+stack_sampler = StackSampler()
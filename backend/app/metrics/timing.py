@@ -0,0 +1,170 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+
+from fastapi.routing import APIRoute
+
+from ..config import settings
+from .metrics import PHASE_LATENCY, REQUEST_LATENCY
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class RequestTimer:
+    """Per-request span recorder.
+
+    - Phases: auth, dsl, index_resolution, es_network (per cluster),
+      es_took (ES's own `took`, not wall time), decode, normalize, serialize.
+    - Accumulates milliseconds per (phase, cluster); repeated phases (paged
+      loops, per-cluster fan-out) add up.
+    - Thread-safe: multi-cluster searches record from worker threads.
+    - `handler_done` is stamped by `respond()`; everything from there to the
+      response start is the serialize phase.
+    """
+
+    __slots__ = ("started", "spans", "handler_done", "_lock")
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.spans: Dict[Tuple[str, str], float] = {}
+        self.handler_done: Optional[float] = None
+        self._lock = Lock()
+
+    def add(self, phase: str, ms: float, cluster: str = "") -> None:
+        key = (phase, cluster)
+        with self._lock:
+            self.spans[key] = self.spans.get(key, 0.0) + ms
+
+    @contextmanager
+    def phase(self, phase: str, cluster: str = "") -> Iterator[None]:
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, (perf_counter() - t0) * 1000, cluster)
+
+    def mark_handler_done(self) -> None:
+        self.handler_done = perf_counter()
+
+    def close_serialize(self) -> None:
+        if self.handler_done is not None:
+            self.add("serialize", (perf_counter() - self.handler_done) * 1000)
+            self.handler_done = None
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value, e.g. `dsl;dur=0.12, es_network;dur=8.1;desc="es1:9200"`."""
+        parts = []
+        for (phase, cluster), ms in self.spans.items():
+            item = f"{phase};dur={ms:.2f}"
+            if cluster:
+                item += f';desc="{cluster}"'
+            parts.append(item)
+        parts.append(f"total;dur={(perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str, cluster: str = "") -> Iterator[None]:
+    """Time a block into the current request's timer; no-op outside requests."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name, cluster):
+        yield
+
+
+def record(name: str, ms: float, cluster: str = "") -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, ms, cluster)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator form of `phase`."""
+
+    def deco(fn: F) -> F:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timer = _current.get()
+            if timer is None:
+                return fn(*args, **kwargs)
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timer.add(name, (perf_counter() - t0) * 1000)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+def _endpoint_label(scope: Dict[str, Any]) -> Optional[str]:
+    """Metric label from the matched route: /api/logs/paginate/get -> paginate_get."""
+    route = scope.get("route")
+    if not isinstance(route, APIRoute):
+        return None
+    path = route.path.strip("/")
+    for prefix in ("api/logs/", "api/"):
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    return path.replace("/", "_") or None
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware owning one `RequestTimer` per HTTP request.
+
+    - Observes REQUEST_LATENCY and per-phase PHASE_LATENCY for every API
+      route, labeled by endpoint.
+    - Adds a `Server-Timing` header when SERVER_TIMING_ENABLED.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = RequestTimer()
+        token = _current.set(timer)
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                timer.close_serialize()
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", timer.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            endpoint = _endpoint_label(scope)
+            if endpoint is not None:
+                _observe(endpoint, timer)
+
+
+def _observe(endpoint: str, timer: RequestTimer) -> None:
+    REQUEST_LATENCY.labels(endpoint=endpoint).observe((perf_counter() - timer.started) * 1000)
+    for (name, cluster), ms in timer.spans.items():
+        PHASE_LATENCY.labels(endpoint=endpoint, phase=name, cluster=cluster).observe(ms)
@@ -42,6 +42,11 @@ class LogQueryRequest(BaseModel):
     index_keyword: Optional[str] = None
     use_regex: Optional[bool] = False
     override_indexes: Optional[List[str]] = None
+    # Byte budget for the response: items are packed until it is reached and
+    # the rest is reachable through next_cursor_after; lifts MAX_PAGE_SIZE
+    max_response_bytes: Optional[int] = Field(default=None, ge=4096, le=1048576)
+    # Response layout: row items, or dictionary-encoded columns
+    format: Optional[str] = Field(default="rows", pattern=r"^(rows|columnar)$")
 
 
 class AlertRuleRef(BaseModel):
@@ -54,12 +59,39 @@ class AlertsQueryRequest(BaseModel):
     time_range: TimeRange
     severity: Optional[List[str]] = None
     rules: Optional[List[AlertRuleRef]] = None
+    pagination: Pagination = Field(default_factory=lambda: Pagination(page=1, page_size=100))
+    mode: Optional[str] = Field(default="page", pattern=r"^(page|cursor)$")
+    cursor_after: Optional[List[Any]] = None
+    format: Optional[str] = Field(default="rows", pattern=r"^(rows|columnar)$")
 
 
 class StatsRequest(BaseModel):
     tenant_id: str
     time_range: TimeRange
     group_by: str = Field(..., pattern=r"^(service|level|host)$")
+    # Aggregation mode: "terms" (top 1000) or paged "composite" with after_key cursor
+    mode: Optional[str] = Field(default="terms", pattern=r"^(terms|composite)$")
+    page_size: int = Field(100, ge=1, le=1000)
+    after_key: Optional[Dict[str, Any]] = None
+
+
+class HistogramRequest(BaseModel):
+    tenant_id: str
+    time_range: TimeRange
+    filters: LogQueryFilters = Field(default_factory=LogQueryFilters)
+    # Fixed interval such as "30s", "5m", "1h"; derived from time_range when omitted
+    interval: Optional[str] = Field(default=None, pattern=r"^[1-9][0-9]*[smhd]$")
+    group_by: Optional[str] = Field(default=None, pattern=r"^(service|level|host)$")
+    group_size: int = Field(10, ge=1, le=100)
+
+
+class PatternsRequest(BaseModel):
+    tenant_id: str
+    time_range: TimeRange
+    filters: LogQueryFilters = Field(default_factory=LogQueryFilters)
+    # Lines to scan (capped by PATTERNS_MAX_LINES) and templates to return
+    max_lines: Optional[int] = Field(default=None, ge=1, le=1000000)
+    top: int = Field(20, ge=1, le=200)
 
 
 class StandardLog(BaseModel):
@@ -0,0 +1,133 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from fastapi import APIRouter, Depends, Query
+
+from ..utils.error_codes import ErrorCode
+from ..utils.i18n import I18NKeys
+from ..security.auth import authz, rbac
+from ..es.client import cluster_registry
+from ..es.cost import cost_guard
+from ..es.slow_queries import SORT_KEYS, slow_query_log
+from ..metrics.profiler import collapse, stack_sampler, top_functions
+from ..models.schemas import QueryResponse
+
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=QueryResponse)
+def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort_by: str = Query("total_ms", pattern="^(" + "|".join(SORT_KEYS) + ")$"),
+    ctx=Depends(authz),
+):
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="debug"):
+        return {
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+            "data": {},
+        }
+    return {
+        "code": ErrorCode.OK,
+        "i18n_key": I18NKeys.INFO_DEBUG_OK,
+        "data": {
+            "items": slow_query_log.top(limit=limit, sort_by=sort_by),
+            "threshold_ms": slow_query_log.threshold_ms,
+            "enabled": slow_query_log.enabled,
+        },
+    }
+
+
+@router.get("/rbac", response_model=QueryResponse)
+def rbac_status(ctx=Depends(authz)):
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="debug"):
+        return {
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+            "data": {},
+        }
+    return {
+        "code": ErrorCode.OK,
+        "i18n_key": I18NKeys.INFO_DEBUG_OK,
+        "data": rbac.get_status(),
+    }
+
+
+@router.get("/clusters", response_model=QueryResponse)
+def clusters(ctx=Depends(authz)):
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="debug"):
+        return {
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+            "data": {},
+        }
+    return {
+        "code": ErrorCode.OK,
+        "i18n_key": I18NKeys.INFO_DEBUG_OK,
+        "data": {"items": cluster_registry.status()},
+    }
+
+
+@router.get("/cost-model", response_model=QueryResponse)
+def cost_model(ctx=Depends(authz)):
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="debug"):
+        return {
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+            "data": {},
+        }
+    return {
+        "code": ErrorCode.OK,
+        "i18n_key": I18NKeys.INFO_DEBUG_OK,
+        "data": {
+            "enabled": cost_guard.enabled,
+            "low_priority_ms": cost_guard.low_priority_ms,
+            "reshape_ms": cost_guard.reshape_ms,
+            "reject_ms": cost_guard.reject_ms,
+            "model": cost_guard.model.snapshot(),
+        },
+    }
+
+
+@router.get("/profile", response_model=QueryResponse)
+def profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: int = Query(10, ge=1, le=1000),
+    top: int = Query(30, ge=1, le=200),
+    include_idle: bool = Query(False),
+    ctx=Depends(authz),
+):
+    """Sample all thread stacks for `seconds`; returns collapsed stacks for flamegraph.pl."""
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="debug"):
+        return {
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+            "data": {},
+        }
+    # Runs in a threadpool worker, so sampling does not block the event loop
+    result = stack_sampler.sample(seconds, interval_s=interval_ms / 1000, include_idle=include_idle)
+    if result is None:
+        return {
+            "code": ErrorCode.PROFILER_BUSY,
+            "i18n_key": I18NKeys.ERROR_PROFILER_BUSY,
+            "data": {},
+        }
+    stacks = result.pop("stacks")
+    return {
+        "code": ErrorCode.OK,
+        "i18n_key": I18NKeys.INFO_DEBUG_OK,
+        "data": dict(
+            result,
+            interval_ms=interval_ms,
+            top_functions=top_functions(stacks, limit=top),
+            collapsed=collapse(stacks),
+        ),
+    }
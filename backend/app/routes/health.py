@@ -4,7 +4,10 @@ All rights reserved.
 """
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
 from ..utils.error_codes import ErrorCode
+from ..es.warmup import startup_warmup
 
 router = APIRouter()
 
@@ -14,3 +17,14 @@ def healthz():
     # Basic health response; ES connectivity could be checked on demand.
     return {"code": ErrorCode.OK, "i18n_key": "info.health.ok", "data": {"status": "ok"}}
 
+
+@router.get("/readyz")
+def readyz():
+    # 200 once startup warm-up finished (or ran out of budget), 503 before
+    status = startup_warmup.get_status()
+    body = {
+        "code": ErrorCode.OK if status["ready"] else ErrorCode.INTERNAL_ERROR,
+        "i18n_key": "info.ready.ok" if status["ready"] else "info.ready.warming_up",
+        "data": status,
+    }
+    return JSONResponse(body, status_code=200 if status["ready"] else 503)
@@ -27,7 +27,11 @@ def list_indices(ctx=Depends(authz)):
     return {
         "code": ErrorCode.OK,
         "i18n_key": I18NKeys.INFO_INDICES_OK,
-        "data": {"items": index_discovery.get_indices(), "status": index_discovery.get_status()},
+        "data": {
+            # Only the indices this tenant may search
+            "items": rbac.scope_indices(tenant_id, index_discovery.get_indices()),
+            "status": index_discovery.get_status(),
+        },
     }
 
 
@@ -68,10 +72,19 @@ def refresh(ctx=Depends(authz)):
             "i18n_key": I18NKeys.ERROR_RBAC_DENY,
             "data": {},
         }
-    index_discovery.refresh_once()
+    if not index_discovery.refresh_once():
+        return {
+            "code": ErrorCode.ES_CONNECTION,
+            "i18n_key": I18NKeys.ERROR_ES_CONNECTION,
+            "data": {"status": index_discovery.get_status()},
+        }
     return {
         "code": ErrorCode.OK,
         "i18n_key": I18NKeys.INFO_INDICES_REFRESH_OK,
-        "data": {"items": index_discovery.get_indices(), "status": index_discovery.get_status()},
+        "data": {
+            # Only the indices this tenant may search
+            "items": rbac.scope_indices(tenant_id, index_discovery.get_indices()),
+            "status": index_discovery.get_status(),
+        },
     }
 
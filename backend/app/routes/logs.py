@@ -3,6 +3,8 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
+import json
+import time
 from time import perf_counter
 from fastapi import APIRouter, Depends
 import httpx
@@ -14,196 +16,569 @@ from ..models.schemas import (
     QueryResponse,
     AlertsQueryRequest,
     StatsRequest,
+    HistogramRequest,
+    PatternsRequest,
 )
-from ..security.auth import authz, rbac
+from ..security.auth import authz, rbac, resolve_tenant, tenant_scope
 from ..config import settings
-from ..es.client import es_client, multi_es_client
+from ..es.client import cluster_registry, es_client, multi_es_client
+from ..es.cost import cost_guard
 from ..indexes.service import index_discovery
-from ..es.query_adapter import adapt_query_to_es6, build_aggregation_es6
-from ..logs.normalizer import normalize
-from ..metrics.metrics import REQUESTS_TOTAL, REQUEST_LATENCY, ES_BACKEND_LATENCY
-from ..alerts.engine import evaluate_alerts
+from ..es.query_adapter import (
+    adapt_query_to_es6,
+    build_aggregation_es6,
+    build_composite_aggregation_es6,
+    parse_composite_buckets,
+    build_date_histogram_es6,
+    parse_histogram_buckets,
+    auto_histogram_interval,
+    interval_to_ms,
+    parse_timestamp_ms,
+    format_timestamp_ms,
+)
+from ..logs.normalizer import normalize_batch, normalize_within_budget
+from ..logs.columnar import to_columnar
+from ..logs.patterns import LogPatternMiner
+from ..metrics.metrics import (
+    REQUESTS_TOTAL,
+    ES_BACKEND_LATENCY,
+    CACHE_HIT_RATIO,
+    QUERY_COST_ACCURACY,
+    QUERY_COST_DECISIONS,
+    QUERY_COST_ESTIMATE_MS,
+)
+from ..metrics.timing import phase
+from ..utils.deadline import DeadlineExceeded, current_deadline
+from ..utils.histogram_cache import histogram_cache
+from ..utils.responses import respond
+from ..alerts.engine import compile_alert_plan, label_alerts
+from ..alerts.scheduler import alert_scheduler
 
 
 router = APIRouter()
 
+# Bytes kept free for the response envelope (code, i18n_key, total, cursor)
+_ENVELOPE_BYTES = 1024
+
+
+def _pack_page(hits, max_response_bytes):
+    """Normalize a page of hits, within `max_response_bytes` when given.
+
+    Returns `(items, truncated)`; items map 1:1 onto the leading hits.
+    """
+    if not max_response_bytes:
+        return normalize_batch(hits), False
+    items, _ = normalize_within_budget(hits, max_response_bytes - _ENVELOPE_BYTES)
+    return items, len(items) < len(hits)
+
+
+def _shape(data, fmt):
+    """Replace `items` with the columnar layout when `format=columnar`."""
+    if fmt == "columnar":
+        with phase("serialize"):
+            data.update(to_columnar(data.pop("items")))
+    return data
+
+
+def _target_indices(tenant_id, *, override_indexes=None, index_keyword=None, use_regex=False):
+    """Indices to search (override list, keyword discovery, else LOG_INDEXES),
+    narrowed to the tenant's RBAC index patterns; empty when none is allowed."""
+    if override_indexes:
+        targets = override_indexes
+    elif index_keyword is not None:
+        targets = index_discovery.find_indices(keyword=index_keyword or "", use_regex=bool(use_regex), fuzzy=True)
+    else:
+        targets = None
+    return rbac.scope_indices(tenant_id, targets or settings.LOG_INDEXES)
+
+
+def _search(indices, body):
+    if len(settings.ES_HOSTS) > 1:
+        return multi_es_client.search_logs_all(index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None))
+    return es_client.search_logs(index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None))
+
+
+def _plan_cost(indices, body, time_range):
+    """Cost guard plan for a search (None when disabled); may edit `body`."""
+    if not cost_guard.enabled:
+        return None
+    cost = cost_guard.plan(
+        indices=indices,
+        catalog=index_discovery.get_catalog(),
+        body=body,
+        start_ms=parse_timestamp_ms(time_range.start),
+        end_ms=parse_timestamp_ms(time_range.end),
+        # Integer track_total_hits needs 7.x on every cluster searched
+        approximate_count=cluster_registry.capabilities(probe=False)["track_total_hits"],
+    )
+    QUERY_COST_DECISIONS.labels(decision=cost["decision"]).inc()
+    QUERY_COST_ESTIMATE_MS.observe(cost["estimate"]["estimate_ms"])
+    return cost
+
+
+def _observe_cost(cost, took_ms):
+    est = cost["estimate"]
+    if est["estimate_ms"] > 0:
+        QUERY_COST_ACCURACY.observe(took_ms / est["estimate_ms"])
+    cost_guard.model.observe(est["raw_ms"], took_ms)
+
+
+def _cost_info(cost):
+    est = cost["estimate"]
+    return {
+        "decision": cost["decision"],
+        "estimate_ms": est["estimate_ms"],
+        "indices": est["indices"],
+        "shards": est["shards"],
+        "docs": est["docs"],
+        "features": est["features"],
+        "reshaped": cost["reshaped"],
+    }
+
 
 @router.post("/query", response_model=QueryResponse)
-def query_logs(payload: LogQueryRequest, ctx=Depends(authz)):
+def query_logs(payload: LogQueryRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
     token, tenant_id = ctx
     if not rbac.allow(token=token, tenant_id=tenant_id, action="query"):
         return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
 
     REQUESTS_TOTAL.labels(endpoint="query").inc()
-    t0 = perf_counter()
     body = adapt_query_to_es6(
-        tenant_id=payload.tenant_id,
+        tenant_id=tenant,
         pagination=payload.pagination.model_dump(),
         time_range=payload.time_range.model_dump(),
         filters=payload.filters.model_dump(),
         sort=payload.sort.model_dump(),
+        mode=payload.mode,
+        cursor_after=payload.cursor_after,
+        max_page_size=200 if payload.max_response_bytes else None,
     )
-    # Dynamic target indices
-    target_indexes = (
-        payload.override_indexes
-        if payload.override_indexes
-        else (
-            index_discovery.find_indices(
-                keyword=(payload.index_keyword or ""),
-                use_regex=bool(payload.use_regex),
-                fuzzy=True,
-            )
-            if payload.index_keyword is not None
-            else settings.LOG_INDEXES
-        )
+    # Dynamic target indices, limited to what the tenant may read
+    indices = _target_indices(
+        tenant_id,
+        override_indexes=payload.override_indexes,
+        index_keyword=payload.index_keyword,
+        use_regex=payload.use_regex,
     )
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
 
-    # Debug: print indices and DSL when DEBUG_QUERY_LOGS is enabled
-    _dbg = bool(getattr(settings, "DEBUG_QUERY_LOGS", False))
-    if _dbg:
-        try:
-            indices_dbg = target_indexes or settings.LOG_INDEXES
-            print("[DEBUG][query] indices =", indices_dbg)
-            print(
-                "[DEBUG][query] from/size/sort =",
-                body.get("from"),
-                body.get("size"),
-                body.get("sort"),
-            )
-            print("[DEBUG][query] dsl =", str(body.get("query"))[:2000])
-        except Exception:
-            pass
+    # Degrade if too many indices
+    if len(indices) > 200:
+        indices = indices[:200]
+    cost = _plan_cost(indices, body, payload.time_range)
+    if cost is not None:
+        if cost["decision"] == "rejected":
+            return {
+                "code": ErrorCode.QUERY_TOO_EXPENSIVE,
+                "i18n_key": I18NKeys.ERROR_QUERY_TOO_EXPENSIVE,
+                "data": {"cost": _cost_info(cost), "hints": cost["hints"]},
+            }
+        indices = cost["indices"]
+    low_priority = cost is not None and cost["low_priority"]
+    deadline = current_deadline()
+    lane_wait_s = cost_guard.lane_wait_s
+    if deadline is not None:
+        lane_wait_s = max(0.0, min(lane_wait_s, deadline.remaining_s()))
+    if low_priority and not cost_guard.lane.acquire(timeout=lane_wait_s):
+        return {"code": ErrorCode.OVERLOADED, "i18n_key": I18NKeys.ERROR_OVERLOADED, "data": {"cost": _cost_info(cost)}}
 
     es_t0 = perf_counter()
     try:
-        # Degrade if too many indices
-        indices = target_indexes or settings.LOG_INDEXES
-        if len(indices) > 200:
-            indices = indices[:200]
-        if len(settings.ES_HOSTS) > 1:
-            res = multi_es_client.search_logs_all(
-                index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
-            )
-        else:
-            res = es_client.search_logs(index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None))
+        res = _search(indices, body)
     except httpx.HTTPError:
-        # Fallback: try with fewer indices if possible
+        # Fallback: try with fewer indices if possible, within what is left
+        # of the deadline (DeadlineExceeded is answered with 504)
         try:
-            indices = (target_indexes or settings.LOG_INDEXES)[:50]
-            if len(settings.ES_HOSTS) > 1:
-                res = multi_es_client.search_logs_all(
-                    index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
-                )
-            else:
-                res = es_client.search_logs(index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None))
+            res = _search(indices[:50], body)
         except httpx.HTTPError:
             return {
                 "code": ErrorCode.ES_CONNECTION,
                 "i18n_key": I18NKeys.ERROR_ES_CONNECTION,
                 "data": {},
             }
+    finally:
+        if low_priority:
+            cost_guard.lane.release()
     es_t1 = perf_counter()
     ES_BACKEND_LATENCY.labels(endpoint="query").observe((es_t1 - es_t0) * 1000)
+    # A timed-out search's took says nothing about the full cost
+    if cost is not None and isinstance(res.get("took"), (int, float)) and not res.get("timed_out"):
+        _observe_cost(cost, res["took"])
     hits = res.get("hits", {}).get("hits", [])
     total_raw = res.get("hits", {}).get("total")
     total = total_raw.get("value") if isinstance(total_raw, dict) else total_raw
 
-    if _dbg:
-        try:
-            sample = hits[0] if hits else {}
-            src = sample.get("_source", {})
-            print("[DEBUG][res] total/hits_len =", total, len(hits))
-            print("[DEBUG][res] sample.keys =", list(src.keys())[:25])
-            print(
-                "[DEBUG][res] sample.type/loglevel/service =",
-                src.get("type"),
-                src.get("loglevel"),
-                src.get("service"),
-            )
-            fields_service = (src.get("fields", {}) or {}).get("service")
-            print("[DEBUG][res] sample.fields.service =", fields_service)
-        except Exception:
-            pass
-
+    items, truncated = _pack_page(hits, payload.max_response_bytes)
     data = {
         "total": total,
-        "items": [normalize(h) for h in hits],
+        "items": items,
     }
-    # Cursor mode: expose next_cursor_after for client to continue
+    if isinstance(total_raw, dict) and total_raw.get("relation") == "gte":
+        data["total_relation"] = "gte"
+    if cost is not None and cost["decision"] != "ok":
+        data["cost"] = _cost_info(cost)
+    if payload.max_response_bytes:
+        data["truncated"] = truncated
+    # Cursor mode, or a page cut short by the byte budget: expose
+    # next_cursor_after (after the last returned item) for client to continue
     try:
-        if getattr(payload, "mode", "page") == "cursor":
-            last = hits[-1] if hits else None
+        if getattr(payload, "mode", "page") == "cursor" or truncated:
+            last = hits[len(items) - 1] if items else None
             next_after = last.get("sort") if isinstance(last, dict) else None
             data["next_cursor_after"] = next_after
             data["page_size"] = payload.pagination.page_size
     except Exception:
         pass
-    t1 = perf_counter()
-    REQUEST_LATENCY.labels(endpoint="query").observe((t1 - t0) * 1000)
-    return {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": data}
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": _shape(data, payload.format)})
 
 
 @router.post("/alerts", response_model=QueryResponse)
-def alerts(payload: AlertsQueryRequest, ctx=Depends(authz)):
+def alerts(payload: AlertsQueryRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
     token, tenant_id = ctx
     if not rbac.allow(token=token, tenant_id=tenant_id, action="alerts"):
         return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
 
     REQUESTS_TOTAL.labels(endpoint="alerts").inc()
+    indices = _target_indices(tenant_id)
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
+    # Severity map / rules are compiled into ES filters so only alerts are fetched
+    try:
+        plan = compile_alert_plan(
+            payload.severity or None,
+            [r.model_dump() for r in payload.rules] if payload.rules else None,
+        )
+    except KeyError:
+        return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
+    if not plan.filters:
+        return {
+            "code": ErrorCode.OK,
+            "i18n_key": I18NKeys.INFO_ALERTS_OK,
+            "data": _shape({"total": 0, "items": [], "counts": {}}, payload.format),
+        }
+    # Serve from the background scheduler state when it covers the window
+    # The scheduler scans LOG_INDEXES as a whole: only for unrestricted scopes
+    if payload.mode != "cursor" and indices == list(settings.LOG_INDEXES):
+        rule_ids = alert_scheduler.rule_ids_for(plan)
+        start_ms = parse_timestamp_ms(payload.time_range.start)
+        end_ms = parse_timestamp_ms(payload.time_range.end)
+        if rule_ids is not None and alert_scheduler.covers(rule_ids, start_ms, end_ms):
+            data = alert_scheduler.query(
+                plan=plan,
+                rule_ids=rule_ids,
+                tenant_id=tenant,
+                start_ms=start_ms,
+                end_ms=end_ms,
+                page=payload.pagination.page,
+                page_size=min(payload.pagination.page_size, settings.MAX_PAGE_SIZE),
+            )
+            data["source"] = "scheduler"
+            return respond(
+                {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_ALERTS_OK, "data": _shape(data, payload.format)}
+            )
     body = adapt_query_to_es6(
-        tenant_id=payload.tenant_id,
-        pagination={"page": 1, "page_size": 100},
+        tenant_id=tenant,
+        pagination=payload.pagination.model_dump(),
         time_range=payload.time_range.model_dump(),
         filters={},
         sort={"field": settings.TIMESTAMP_FIELD, "order": "desc"},
+        mode=payload.mode,
+        cursor_after=payload.cursor_after,
+        # Message rules are verified in Python and need the full text
+        truncate_message=False if plan.needs_message else None,
     )
+    body["query"]["bool"]["filter"].append(plan.query_filter())
+    body["aggs"] = plan.aggregation()
     es_t0 = perf_counter()
     try:
         if len(settings.ES_HOSTS) > 1:
             res = multi_es_client.search_logs_all(
-                index=settings.LOG_INDEXES, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+                index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
             )
         else:
             res = es_client.search_logs(
-                index=settings.LOG_INDEXES, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+                index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
             )
     except httpx.HTTPError:
         return {"code": ErrorCode.ES_CONNECTION, "i18n_key": I18NKeys.ERROR_ES_CONNECTION, "data": {}}
     es_t1 = perf_counter()
     ES_BACKEND_LATENCY.labels(endpoint="alerts").observe((es_t1 - es_t0) * 1000)
     hits = res.get("hits", {}).get("hits", [])
-    evaluated = evaluate_alerts(hits, payload.severity or [])
-    items = [normalize(e["hit"]) | {"severity": e["severity"]} for e in evaluated]
-    return {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_ALERTS_OK, "data": {"items": items}}
+    total_raw = res.get("hits", {}).get("total")
+    total = total_raw.get("value") if isinstance(total_raw, dict) else total_raw
+    count_buckets = res.get("aggregations", {}).get("severity_counts", {}).get("buckets", {})
+    counts = {sev: b.get("doc_count", 0) for sev, b in count_buckets.items()}
+    evaluated = label_alerts(hits, plan)
+    items = [
+        item | {"severity": e["severity"]}
+        for item, e in zip(normalize_batch([e["hit"] for e in evaluated]), evaluated)
+    ]
+    data = {"total": total, "items": items, "counts": counts}
+    if not plan.exact:
+        # Message rules are decided here: ES counts/total are upper bounds
+        data["counts_approximate"] = True
+    if payload.mode == "cursor":
+        last = hits[-1] if hits else None
+        data["next_cursor_after"] = last.get("sort") if isinstance(last, dict) else None
+        data["page_size"] = payload.pagination.page_size
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_ALERTS_OK, "data": _shape(data, payload.format)})
 
 
 @router.post("/stats", response_model=QueryResponse)
-def stats(payload: StatsRequest, ctx=Depends(authz)):
+def stats(payload: StatsRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
     token, tenant_id = ctx
     if not rbac.allow(token=token, tenant_id=tenant_id, action="stats"):
         return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
 
     REQUESTS_TOTAL.labels(endpoint="stats").inc()
+    indices = _target_indices(tenant_id)
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
     base = adapt_query_to_es6(
-        tenant_id=payload.tenant_id,
+        tenant_id=tenant,
         pagination={"page": 1, "page_size": 0},
         time_range=payload.time_range.model_dump(),
         filters={},
         sort={"field": "timestamp", "order": "desc"},
     )
-    base.update(build_aggregation_es6(field=payload.group_by))
+    base["size"] = 0  # 仅需聚合结果，不返回命中文档
+    composite = payload.mode == "composite"
+    if composite:
+        base.update(
+            build_composite_aggregation_es6(
+                field=payload.group_by, size=payload.page_size, after_key=payload.after_key
+            )
+        )
+    else:
+        base.update(build_aggregation_es6(field=payload.group_by))
     try:
-        res = es_client.search_logs(index=settings.LOG_INDEXES, body=base, doc_type=(settings.LOG_DOC_TYPE or None))
+        res = es_client.search_logs(index=indices, body=base, doc_type=(settings.LOG_DOC_TYPE or None))
     except httpx.HTTPError:
         return {"code": ErrorCode.ES_CONNECTION, "i18n_key": I18NKeys.ERROR_ES_CONNECTION, "data": {}}
-    buckets = res.get("aggregations", {}).get("group_stats", {}).get("buckets", [])
-    data = {"buckets": buckets}
-    return {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_STATS_OK, "data": data}
+    agg = res.get("aggregations", {}).get("group_stats", {})
+    if composite:
+        # Paged mode: client passes after_key back until it is null
+        buckets, after_key = parse_composite_buckets(
+            agg, field=payload.group_by, size=payload.page_size
+        )
+        data = {"buckets": buckets, "after_key": after_key, "page_size": payload.page_size}
+    else:
+        data = {"buckets": agg.get("buckets", [])}
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_STATS_OK, "data": data})
+
+
+@router.post("/histogram", response_model=QueryResponse)
+def histogram(payload: HistogramRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="stats"):
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
+
+    REQUESTS_TOTAL.labels(endpoint="histogram").inc()
+    indices = _target_indices(tenant_id)
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
+    start_ms = parse_timestamp_ms(payload.time_range.start)
+    end_ms = parse_timestamp_ms(payload.time_range.end)
+    interval = payload.interval or auto_histogram_interval(
+        start_ms, end_ms, settings.HISTOGRAM_TARGET_BUCKETS
+    )
+    interval_ms = interval_to_ms(interval)
+    filters = payload.filters.model_dump()
+
+    # Closed buckets are immutable: serve them from cache and only query ES
+    # from the first missing bucket onwards (usually just the trailing one).
+    # Buckets sit on interval boundaries: a start inside a bucket makes the
+    # first bucket partial, so it is always queried and never cached.
+    cached: list = []
+    head_ms = None
+    resume_from = None
+    cache_key = None
+    if start_ms is not None and end_ms is not None and interval_ms and end_ms >= start_ms:
+        head_ms = start_ms - start_ms % interval_ms
+        full_from = head_ms if head_ms == start_ms else head_ms + interval_ms
+        if settings.CACHE_ENABLED:
+            cache_key = (
+                tenant,
+                interval,
+                payload.group_by,
+                payload.group_size,
+                json.dumps(filters, sort_keys=True),
+                tuple(indices),
+            )
+            cached = histogram_cache.get_range(
+                cache_key, start_ms=full_from, end_ms=end_ms, interval_ms=interval_ms
+            )
+        resume_from = full_from + len(cached) * interval_ms
+    partial_head = head_ms is not None and head_ms != start_ms
+
+    head: list = []
+    fresh: list = []
+    if resume_from is None or partial_head or resume_from <= end_ms:
+        body = adapt_query_to_es6(
+            tenant_id=tenant,
+            pagination={"page": 1, "page_size": 1},
+            time_range={
+                # The user's start bounds the range; only whole cached buckets are skipped
+                "start": (
+                    format_timestamp_ms(resume_from)
+                    if resume_from is not None and not partial_head
+                    else payload.time_range.start
+                ),
+                "end": payload.time_range.end,
+            },
+            filters=filters,
+            sort={"field": settings.TIMESTAMP_FIELD, "order": "desc"},
+        )
+        body["size"] = 0
+        if partial_head and cached:
+            # Partial head bucket plus the uncached tail in one search
+            skip = {"gte": format_timestamp_ms(full_from), "lt": format_timestamp_ms(resume_from)}
+            body["query"]["bool"].setdefault("must_not", []).extend(
+                {"range": {f: skip}} for f in sorted({settings.TIMESTAMP_FIELD, "@timestamp", "timestamp"})
+            )
+        # ES 7.2+ deprecates (8.0 removes) the legacy `interval`; one body
+        # must suit every cluster, so use what all of them support
+        body.update(
+            build_date_histogram_es6(
+                interval=interval,
+                start_ms=head_ms if partial_head else resume_from,
+                end_ms=end_ms if resume_from is not None else None,
+                group_by=payload.group_by,
+                group_size=payload.group_size,
+                fixed_interval=cluster_registry.capabilities()["fixed_interval"],
+            )
+        )
+        es_t0 = perf_counter()
+        try:
+            res = es_client.search_logs(
+                index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+            )
+        except httpx.HTTPError:
+            return {"code": ErrorCode.ES_CONNECTION, "i18n_key": I18NKeys.ERROR_ES_CONNECTION, "data": {}}
+        ES_BACKEND_LATENCY.labels(endpoint="histogram").observe((perf_counter() - es_t0) * 1000)
+        fresh = parse_histogram_buckets(
+            res.get("aggregations", {}).get("histogram", {}), group_by=payload.group_by
+        )
+        if resume_from is not None:
+            if partial_head:
+                head = [b for b in fresh if b["key"] == head_ms]
+            fresh = [b for b in fresh if resume_from <= b["key"] <= end_ms]
+        # Buckets of a timed-out search are incomplete: never cache them
+        if cache_key is not None and not res.get("timed_out"):
+            now_ms = int(time.time() * 1000)
+            histogram_cache.store(
+                cache_key,
+                fresh,
+                interval_ms=interval_ms,
+                closed_before_ms=min(now_ms - settings.HISTOGRAM_SETTLE_SECONDS * 1000, end_ms + 1),
+            )
+
+    buckets = head + cached + fresh
+    if cache_key is not None:
+        CACHE_HIT_RATIO.set(len(cached) / (len(buckets) or 1))
+    data = {"interval": interval, "buckets": buckets, "cached_buckets": len(cached)}
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_HISTOGRAM_OK, "data": data})
+
+
+@router.post("/patterns", response_model=QueryResponse)
+def patterns(payload: PatternsRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
+    """Summarize matching logs as message templates (Drain-style clustering).
+
+    Streams hits oldest first through search_after until `max_lines`, and
+    mines the first line of each message; templates are desensitized.
+    """
+    token, tenant_id = ctx
+    if not rbac.allow(token=token, tenant_id=tenant_id, action="query"):
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
+
+    REQUESTS_TOTAL.labels(endpoint="patterns").inc()
+    indices = _target_indices(tenant_id)
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
+    max_lines = min(payload.max_lines or settings.PATTERNS_MAX_LINES, settings.PATTERNS_MAX_LINES)
+    batch = min(settings.PATTERNS_BATCH_SIZE, max_lines)
+    body = adapt_query_to_es6(
+        tenant_id=tenant,
+        pagination={"page": 1, "page_size": batch},
+        time_range=payload.time_range.model_dump(),
+        filters=payload.filters.model_dump(),
+        sort={"field": settings.TIMESTAMP_FIELD, "order": "asc"},
+        mode="cursor",
+        truncate_message=False,
+    )
+    body["size"] = batch
+    body["_source"] = {"includes": sorted({settings.TIMESTAMP_FIELD, "@timestamp", "timestamp", "message", "log"})}
+    miner = LogPatternMiner(
+        sim_threshold=settings.PATTERNS_SIM_THRESHOLD,
+        max_clusters=settings.PATTERNS_MAX_CLUSTERS,
+    )
+    max_len = settings.MAX_MESSAGE_LEN
+    total = None
+    es_ms = 0.0
+    scanned = 0
+    deadline = current_deadline()
+    while scanned < max_lines:
+        body["size"] = min(batch, max_lines - scanned)
+        es_t0 = perf_counter()
+        try:
+            if len(settings.ES_HOSTS) > 1:
+                res = multi_es_client.search_logs_all(
+                    index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+                )
+            else:
+                res = es_client.search_logs(
+                    index=indices, body=body, doc_type=(settings.LOG_DOC_TYPE or None)
+                )
+        except DeadlineExceeded:
+            # Out of time after some batches: mine what was scanned
+            if not scanned or deadline is None or not deadline.allow_partial:
+                raise
+            deadline.mark_partial()
+            break
+        except httpx.HTTPError:
+            return {"code": ErrorCode.ES_CONNECTION, "i18n_key": I18NKeys.ERROR_ES_CONNECTION, "data": {}}
+        es_ms += (perf_counter() - es_t0) * 1000
+        if total is None:
+            total_raw = res.get("hits", {}).get("total")
+            total = total_raw.get("value") if isinstance(total_raw, dict) else total_raw
+        hits = res.get("hits", {}).get("hits", [])
+        add = miner.add
+        for hit in hits:
+            src = hit.get("_source") or {}
+            msg = src.get("message") or src.get("log")
+            if msg is None:
+                continue
+            line = str(msg)[:max_len].split("\n", 1)[0]
+            ts = src.get("@timestamp") or src.get(settings.TIMESTAMP_FIELD) or src.get("timestamp")
+            add(line, ts, hit.get("_id"))
+        scanned += len(hits)
+        sort_values = hits[-1].get("sort") if hits else None
+        if len(hits) < body["size"] or not sort_values:
+            break
+        body["search_after"] = sort_values
+    ES_BACKEND_LATENCY.labels(endpoint="patterns").observe(es_ms)
+
+    top = miner.top(payload.top)
+    if settings.DESENSITIZE_ENABLED:
+        from ..logs.desensitizer import log_desensitizer
+
+        for p in top:
+            p["template"] = log_desensitizer.mask_text(p["template"])
+    data = {
+        "total": total,
+        "scanned": scanned,
+        "truncated": scanned >= max_lines and (total or 0) > scanned,
+        "clusters": len(miner.clusters),
+        "unclustered": miner.other,
+        "patterns": top,
+    }
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_PATTERNS_OK, "data": data})
 
 
 # 分页会话初始化接口
 @router.post("/paginate/init", response_model=QueryResponse)
-def init_pagination(payload: LogQueryRequest, ctx=Depends(authz)):
+def init_pagination(payload: LogQueryRequest, ctx=Depends(authz), tenant=Depends(tenant_scope)):
     """
     初始化分页会话
     
@@ -228,7 +603,7 @@ def init_pagination(payload: LogQueryRequest, ctx=Depends(authz)):
     
     # 构建查询参数，设置page_size=0仅获取总数
     query_params = {
-        "tenant_id": payload.tenant_id,
+        "tenant_id": tenant,
         "pagination": payload.pagination.model_dump(),
         "time_range": payload.time_range.model_dump(),
         "filters": payload.filters.model_dump(),
@@ -236,31 +611,29 @@ def init_pagination(payload: LogQueryRequest, ctx=Depends(authz)):
         "mode": "page",  # 分页模式固定为page
         "index_keyword": payload.index_keyword,
         "use_regex": payload.use_regex,
-        "override_indexes": payload.override_indexes
+        "override_indexes": payload.override_indexes,
+        "max_response_bytes": payload.max_response_bytes,
+        # 有字节预算时按会话 page_size 取数，不受 MAX_PAGE_SIZE 限制
+        "max_page_size": 200 if payload.max_response_bytes else None,
+        "format": payload.format,
     }
     
     # 构建ES查询DSL，仅获取总数
     body = adapt_query_to_es6(**query_params)
     body["size"] = 0  # 不返回实际数据，仅获取总数
     
-    # 获取目标索引
-    target_indexes = (
-        payload.override_indexes
-        if payload.override_indexes
-        else (
-            index_discovery.find_indices(
-                keyword=(payload.index_keyword or ""),
-                use_regex=bool(payload.use_regex),
-                fuzzy=True,
-            )
-            if payload.index_keyword is not None
-            else settings.LOG_INDEXES
-        )
+    # 获取目标索引（按租户可访问的索引模式收敛）
+    indices = _target_indices(
+        tenant_id,
+        override_indexes=payload.override_indexes,
+        index_keyword=payload.index_keyword,
+        use_regex=payload.use_regex,
     )
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
     
     # 执行ES查询，仅获取总数
     try:
-        indices = target_indexes or settings.LOG_INDEXES
         if len(indices) > 200:
             indices = indices[:200]
         
@@ -284,7 +657,7 @@ def init_pagination(payload: LogQueryRequest, ctx=Depends(authz)):
     # 创建分页会话
     from ..utils.pagination_session import pagination_session_manager
     session = pagination_session_manager.create_session(
-        tenant_id=payload.tenant_id,
+        tenant_id=tenant,
         query_params=query_params,
         total_items=total_items,
         page_size=page_size
@@ -298,7 +671,7 @@ def init_pagination(payload: LogQueryRequest, ctx=Depends(authz)):
         "page_size": session.page_size
     }
     
-    return {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": data}
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": data})
 
 
 # 分页数据获取接口
@@ -314,11 +687,15 @@ def get_paginated_data(payload: dict, ctx=Depends(authz)):
     参数说明：
     - session_id: 分页会话ID
     - page: 页码
+    - offset: 页内偏移（可选，续取被字节预算截断的页）
+    - max_response_bytes: 响应字节预算（可选，默认沿用会话设置）
+    - format: rows | columnar（可选，默认沿用会话设置）
     
     返回说明：
     - items: 当前页的数据列表
     - current_page: 当前页码
     - total_pages: 总页数
+    - truncated / next_offset: 启用字节预算时返回，truncated 为 true 时用 next_offset 续取本页
     """
     token, tenant_id = ctx
     if not rbac.allow(token=token, tenant_id=tenant_id, action="query"):
@@ -329,9 +706,12 @@ def get_paginated_data(payload: dict, ctx=Depends(authz)):
     # 验证请求参数
     session_id = payload.get("session_id")
     page = payload.get("page")
+    offset = payload.get("offset") or 0
     
     if not session_id or not page:
         return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
+    if not isinstance(offset, int) or offset < 0:
+        return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
     
     # 获取分页会话
     from ..utils.pagination_session import pagination_session_manager
@@ -340,40 +720,47 @@ def get_paginated_data(payload: dict, ctx=Depends(authz)):
     # 检查会话是否有效
     if not session:
         return {"code": ErrorCode.SESSION_EXPIRED, "i18n_key": I18NKeys.ERROR_SESSION_EXPIRED, "data": {}}
+
+    # 会话的租户过滤须仍对当前调用方有效（否则 403）
+    resolve_tenant(token, tenant_id, session.query_params.get("tenant_id"))
     
     # 检查页码是否有效
     if not session.is_valid_page(page):
         return {"code": ErrorCode.INVALID_PAGE, "i18n_key": I18NKeys.ERROR_INVALID_PAGE, "data": {}}
     
-    # 获取目标索引
-    index_keyword = session.query_params.get("index_keyword")
-    use_regex = session.query_params.get("use_regex", False)
-    override_indexes = session.query_params.get("override_indexes")
-    
-    target_indexes = (
-        override_indexes
-        if override_indexes
-        else (
-            index_discovery.find_indices(
-                keyword=(index_keyword or ""),
-                use_regex=bool(use_regex),
-                fuzzy=True,
-            )
-            if index_keyword is not None
-            else settings.LOG_INDEXES
-        )
+    # 获取目标索引（按当前租户重新收敛，策略热更新后立即生效）
+    indices = _target_indices(
+        tenant_id,
+        override_indexes=session.query_params.get("override_indexes"),
+        index_keyword=session.query_params.get("index_keyword"),
+        use_regex=session.query_params.get("use_regex", False),
     )
+    if not indices:
+        return {"code": ErrorCode.RBAC_DENIED, "i18n_key": I18NKeys.ERROR_RBAC_DENY, "data": {}}
     
     # 构建查询参数，更新页码
     query_params = session.query_params.copy()
     query_params["pagination"]["page"] = page
+    max_response_bytes = payload.get("max_response_bytes") or query_params.get("max_response_bytes")
+    fmt = payload.get("format") or query_params.get("format") or "rows"
+    if fmt not in ("rows", "columnar"):
+        return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
+    if max_response_bytes is not None and (
+        not isinstance(max_response_bytes, int) or not 4096 <= max_response_bytes <= 1048576
+    ):
+        return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
     
     # 构建ES查询DSL
     body = adapt_query_to_es6(**query_params)
+    # 页内偏移：从上次截断处续取本页剩余数据
+    if offset:
+        if offset >= body["size"]:
+            return {"code": ErrorCode.INVALID_PARAM, "i18n_key": I18NKeys.ERROR_INVALID_PARAM, "data": {}}
+        body["from"] = body.get("from", 0) + offset
+        body["size"] -= offset
     
     # 执行ES查询
     try:
-        indices = target_indexes or settings.LOG_INDEXES
         if len(indices) > 200:
             indices = indices[:200]
         
@@ -388,7 +775,7 @@ def get_paginated_data(payload: dict, ctx=Depends(authz)):
     
     # 解析结果
     hits = res.get("hits", {}).get("hits", [])
-    items = [normalize(h) for h in hits]
+    items, truncated = _pack_page(hits, max_response_bytes)
     
     # 返回分页数据
     data = {
@@ -396,5 +783,8 @@ def get_paginated_data(payload: dict, ctx=Depends(authz)):
         "current_page": page,
         "total_pages": session.total_pages
     }
+    if max_response_bytes:
+        data["truncated"] = truncated
+        data["next_offset"] = offset + len(items) if truncated else None
     
-    return {"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": data}
+    return respond({"code": ErrorCode.OK, "i18n_key": I18NKeys.INFO_QUERY_OK, "data": _shape(data, fmt)})
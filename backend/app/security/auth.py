@@ -3,35 +3,303 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
-from typing import Dict, Optional
-from fastapi import Header, HTTPException
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import re
 
+from fastapi import Depends, Header, HTTPException, Request
+
+from ..config import settings
 from ..utils.error_codes import ErrorCode
 from ..utils.i18n import I18NKeys
+from ..metrics.metrics import RBAC_RELOADS_TOTAL
+from ..metrics.timing import timed
+
+
+logger = logging.getLogger("rbac")
+
+# Actions checked by the routes; a role listing "*" gets all of them.
+# `cross_tenant`: filter logs by another tenant than X-Tenant-Id, or by none (`all`)
+ACTIONS = (
+    "query",
+    "alerts",
+    "stats",
+    "indices_read",
+    "indices_config",
+    "indices_refresh",
+    "debug",
+    "cross_tenant",
+)
+
+# Used when RBAC_CONFIG_PATH is not configured: `admin-*` tokens are admins,
+# any other token is a viewer, on every tenant and every index.
+BUILTIN_POLICY: Dict[str, Any] = {
+    "roles": {
+        "admin": ["*"],
+        "viewer": ["query", "alerts", "stats", "indices_read"],
+    },
+    "token_prefixes": {"admin-": "admin", "": "viewer"},
+}
+
+_HASHED = "sha256:"
+
+# Characters ES forbids in index names, path/URL syntax (`..`, `%`-escapes,
+# `?`, `#`) and `:` (cross-cluster `remote:index`); `*` stays for wildcards
+_BAD_INDEX = re.compile(r'[/\\?#%"<>|:\s]|\.\.')
+
+
+def _token_digest(token: str) -> str:
+    return _HASHED + sha256(token.encode("utf-8")).hexdigest()
+
+
+class CompiledPolicy:
+    """RBAC config compiled into lookup tables.
+
+    - `grants[(token, tenant)]` -> role; tenant `*` covers every tenant and
+      tokens may be listed as `sha256:<hex>` instead of in clear text.
+    - `token_prefixes` (longest first) give a role on every tenant to tokens
+      not listed explicitly.
+    - `index_patterns[tenant]` (tenant `*` = default) limits the indices a
+      tenant may search; no `tenants` section means no restriction.
+    - `decide()` is LRU-cached per (token, tenant, action). A reload builds a
+      new policy, so cached decisions never outlive the rules they came from.
+    """
+
+    def __init__(self, raw: Dict[str, Any], *, cache_size: int = 10000) -> None:
+        self.roles: Dict[str, FrozenSet[str]] = {}
+        for name, actions in (raw.get("roles") or {}).items():
+            if isinstance(actions, dict):
+                actions = actions.get("actions") or []
+            unknown = set(actions) - set(ACTIONS) - {"*"}
+            if unknown:
+                raise ValueError(f"role {name!r}: unknown actions {sorted(unknown)}")
+            self.roles[name] = frozenset(ACTIONS) if "*" in actions else frozenset(actions)
+
+        self.grants: Dict[Tuple[str, str], str] = {}
+        self.hashed = False
+        for token, tenants in (raw.get("tokens") or {}).items():
+            if isinstance(tenants, str):
+                tenants = {"*": tenants}
+            for tenant, role in tenants.items():
+                self._check_role(role)
+                self.grants[(token, tenant)] = role
+            self.hashed = self.hashed or token.startswith(_HASHED)
+
+        prefixes = raw.get("token_prefixes") or {}
+        for role in prefixes.values():
+            self._check_role(role)
+        self.prefixes: List[Tuple[str, str]] = sorted(prefixes.items(), key=lambda kv: -len(kv[0]))
+
+        tenants_cfg = raw.get("tenants")
+        self.index_patterns: Optional[Dict[str, Tuple[str, ...]]] = None
+        if tenants_cfg is not None:
+            self.index_patterns = {
+                tenant: tuple(cfg.get("index_patterns") or ()) for tenant, cfg in tenants_cfg.items()
+            }
+        self.decide = lru_cache(maxsize=cache_size)(self._decide)
+
+    def _check_role(self, role: str) -> None:
+        if role not in self.roles:
+            raise ValueError(f"unknown role {role!r}")
+
+    def role(self, token: str, tenant_id: str) -> Optional[str]:
+        keys = (token, _token_digest(token)) if self.hashed else (token,)
+        for key in keys:
+            role = self.grants.get((key, tenant_id))
+            if role is None:
+                role = self.grants.get((key, "*"))
+            if role is not None:
+                return role
+        for prefix, role in self.prefixes:
+            if token.startswith(prefix):
+                return role
+        return None
+
+    def granted_tenant(self, token: str, tenant_id: str) -> Optional[str]:
+        """`tenant_id` when the token is granted that tenant by name, else None.
+
+        Grants on tenant `*` and token prefixes accept any tenant id the
+        caller sends, so they identify no tenant.
+        """
+        if tenant_id == "*":
+            return None
+        keys = (token, _token_digest(token)) if self.hashed else (token,)
+        if any((key, tenant_id) in self.grants for key in keys):
+            return tenant_id
+        return None
+
+    def _decide(self, token: str, tenant_id: str, action: str) -> bool:
+        role = self.role(token, tenant_id)
+        return role is not None and action in self.roles[role]
+
+    def patterns_for(self, tenant_id: str) -> Optional[Tuple[str, ...]]:
+        if self.index_patterns is None:
+            return None
+        found = self.index_patterns.get(tenant_id)
+        return found if found is not None else self.index_patterns.get("*", ())
+
+
+def scope_indices(targets: Iterable[str], patterns: Optional[Tuple[str, ...]]) -> List[str]:
+    """Narrow index targets to the allowed patterns (None = no restriction).
+
+    - Comma lists are split; exclusions (`-x`) and `_all` are dropped or
+      widened to `*`, and names with path or URL syntax (`/`, `..`, `%`,
+      `?`, `#`, whitespace, ...) are dropped before matching, so nothing
+      outside the patterns reaches the ES URL.
+    - A concrete name stays when it matches a pattern.
+    - A wildcard target stays when it is inside a pattern (`logs-t1-app-*`
+      under `logs-t1-*`), otherwise it is replaced by the patterns inside it
+      (`logs-*` becomes `logs-t1-*`); partial overlaps are dropped.
+    """
+    if patterns is None:
+        return list(targets)
+    scoped: List[str] = []
+    for target in targets:
+        for part in str(target).split(","):
+            part = part.strip()
+            if part == "_all":
+                part = "*"
+            if not part or part[0] in "-+" or _BAD_INDEX.search(part):
+                continue
+            if any(fnmatchcase(part, p) for p in patterns):
+                picked: Iterable[str] = (part,)
+            elif "*" in part:
+                picked = [p for p in patterns if fnmatchcase(p, part)]
+            else:
+                picked = ()
+            for name in picked:
+                if name not in scoped:
+                    scoped.append(name)
+    return scoped
+
+
+def load_policy(path: str = "", *, cache_size: int = 10000) -> CompiledPolicy:
+    """Compile the JSON file at `path`; the built-in policy when empty."""
+    if not path:
+        return CompiledPolicy(BUILTIN_POLICY, cache_size=cache_size)
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    policy = CompiledPolicy(raw, cache_size=cache_size)
+    logger.info("rbac.policy.loaded", extra={"path": path, "grants": len(policy.grants)})
+    return policy
 
 
 class RBAC:
-    def __init__(self, rules: Optional[Dict] = None) -> None:
-        self.rules = rules or {}
+    """Role and index-scope checks backed by RBAC_CONFIG_PATH.
+
+    - Every request goes through `allow()` against the compiled policy.
+    - Hot reload: at most every `reload_interval_s` one request stats the
+      file; when mtime or size changed it compiles the new file and swaps it
+      in with a single assignment, so readers see the old or the new policy,
+      never a mix. A broken file keeps the previous policy until it changes
+      again. At startup a broken file fails loudly, like the alert rules.
+    """
+
+    def __init__(
+        self,
+        path: str = "",
+        *,
+        cache_size: int = 10000,
+        reload_interval_s: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.reload_interval_s = reload_interval_s
+        self._lock = Lock()
+        self._next_check = 0.0
+        self._signature = self._stat()
+        self._loaded_at = monotonic() if path else None
+        self._policy = load_policy(path, cache_size=cache_size)
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        if not self.path:
+            return None
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _maybe_reload(self) -> None:
+        if not self.path or monotonic() < self._next_check:
+            return
+        # Other requests keep deciding on the current policy meanwhile
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = monotonic() + self.reload_interval_s
+            signature = self._stat()
+            if signature is not None and signature != self._signature:
+                self._signature = signature
+                self.reload()
+        finally:
+            self._lock.release()
+
+    def reload(self) -> bool:
+        try:
+            policy = load_policy(self.path, cache_size=self.cache_size)
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            RBAC_RELOADS_TOTAL.labels(outcome="error").inc()
+            logger.warning("rbac.policy.reload_failed", extra={"path": self.path, "error": str(exc)})
+            return False
+        self._policy = policy
+        self._loaded_at = monotonic()
+        RBAC_RELOADS_TOTAL.labels(outcome="ok").inc()
+        return True
 
+    def role_of(self, token: str, tenant_id: str) -> str:
+        return self._policy.role(token, tenant_id) or "none"
+
+    @timed("auth")
     def allow(self, *, token: str, tenant_id: str, action: str) -> bool:
-        # Minimal in-memory RBAC; replace with file-backed if provided.
         if not token:
             return False
-        # Example: token prefix maps to tenant role
-        role = "viewer"
-        if token.startswith("admin-"):
-            role = "admin"
-        if action in ("query", "alerts", "stats", "indices_read"):
-            return True if role in ("admin", "viewer") else False
-        if action in ("indices_config", "indices_refresh"):
-            return True if role in ("admin",) else False
-        return False
+        self._maybe_reload()
+        return self._policy.decide(token, tenant_id, action)
+
+    def granted_tenant(self, token: str, tenant_id: str) -> Optional[str]:
+        """The tenant the policy grants this token by name (None = wildcard or no grant)."""
+        if not token:
+            return None
+        self._maybe_reload()
+        return self._policy.granted_tenant(token, tenant_id)
+
+    def index_patterns(self, tenant_id: str) -> Optional[Tuple[str, ...]]:
+        """Index patterns the tenant may search; None when unrestricted."""
+        return self._policy.patterns_for(tenant_id)
+
+    def scope_indices(self, tenant_id: str, targets: Iterable[str]) -> List[str]:
+        return scope_indices(targets, self._policy.patterns_for(tenant_id))
+
+    def get_status(self) -> Dict[str, Any]:
+        policy = self._policy
+        info = policy.decide.cache_info()
+        return {
+            "path": self.path or None,
+            "roles": sorted(policy.roles),
+            "grants": len(policy.grants),
+            "token_prefixes": [p for p, _ in policy.prefixes],
+            "tenants": sorted(policy.index_patterns) if policy.index_patterns is not None else None,
+            "loaded_ago_s": round(monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            "decision_cache": {"hits": info.hits, "misses": info.misses, "size": info.currsize},
+        }
 
 
-rbac = RBAC()
+rbac = RBAC(
+    settings.RBAC_CONFIG_PATH,
+    cache_size=settings.RBAC_DECISION_CACHE_SIZE,
+    reload_interval_s=settings.RBAC_RELOAD_INTERVAL_SECONDS,
+)
 
 
+@timed("auth")
 def authz(
     authorization: Optional[str] = Header(None),
     x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-Id"),
@@ -54,3 +322,35 @@ def authz(
             },
         )
     return token, x_tenant_id
+
+
+def resolve_tenant(token: str, tenant_id: str, requested: Optional[str]) -> str:
+    """Tenant the ES tenant filter is built for; raises 403 when not allowed.
+
+    - Defaults to the X-Tenant-Id the request is authorized for.
+    - Another tenant, or `all` / empty (no tenant filter at all), needs the
+      `cross_tenant` action on the authorized tenant.
+    """
+    effective = tenant_id if requested is None else str(requested)
+    if effective == tenant_id and effective.lower() != "all":
+        return effective
+    if rbac.allow(token=token, tenant_id=tenant_id, action="cross_tenant"):
+        return effective
+    raise HTTPException(
+        status_code=403,
+        detail={
+            "code": ErrorCode.RBAC_DENIED,
+            "i18n_key": I18NKeys.ERROR_RBAC_DENY,
+        },
+    )
+
+
+async def tenant_scope(request: Request, ctx=Depends(authz)) -> str:
+    """Route dependency: the effective tenant for the body's `tenant_id`."""
+    token, tenant_id = ctx
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    requested = body.get("tenant_id") if isinstance(body, dict) else None
+    return resolve_tenant(token, tenant_id, requested)
@@ -0,0 +1,280 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import asyncio
+import math
+import time
+
+from fastapi import Depends, HTTPException
+
+from ..config import settings
+from ..metrics.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_QUEUE_WAIT_MS,
+    ADMISSION_REJECTED_TOTAL,
+)
+from ..security.auth import authz, rbac
+from ..utils.deadline import current_deadline
+from ..utils.error_codes import ErrorCode
+from ..utils.i18n import I18NKeys
+
+# Bucket shared by every caller without a tenant granted by name
+SHARED_TENANT = "*"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_s: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+class _TenantState:
+    __slots__ = ("rate", "burst", "max_in_flight", "tokens", "updated", "last_used", "in_flight", "waiting")
+
+    def __init__(self, rate: float, burst: float, max_in_flight: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.tokens = burst
+        self.updated = self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def idle(self, now: float, ttl_s: float) -> bool:
+        """Unused for `ttl_s` with a full bucket: dropping it loses nothing."""
+        if self.in_flight or self.waiting or now - self.last_used < ttl_s:
+            return False
+        return self.rate <= 0 or self.tokens + (now - self.updated) * self.rate >= self.burst
+
+    def take_token(self, now: float) -> Optional[float]:
+        """Consume one token; None on success, else seconds until one is available."""
+        if self.rate <= 0:
+            return None
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-tenant admission in front of ES-backed routes.
+
+    - Token bucket per tenant (`rate` requests/s, `burst` capacity).
+    - Bulkheads: at most `tenant_max_in_flight` admitted requests per tenant
+      and `global_max_in_flight` overall; requests over a limit wait in one
+      FIFO queue bounded by `max_queue` for up to `queue_timeout_s`.
+      Released slots go to the first waiter whose tenant is under its limit,
+      so one saturated tenant does not block the others.
+    - Rejections carry a retry-after hint; they never occupy a worker thread.
+    - State lives on the event loop thread (async acquire / release), so no
+      locks are needed. Tenants unused for `idle_ttl_s` with a full bucket
+      are evicted, and idle ones beyond `max_tenants` too.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = 50.0,
+        burst: float = 100.0,
+        tenant_max_in_flight: int = 16,
+        global_max_in_flight: int = 32,
+        max_queue: int = 256,
+        queue_timeout_s: float = 5.0,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_tenants: int = 10000,
+        idle_ttl_s: float = 300.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tenant_max_in_flight = tenant_max_in_flight
+        self.global_max_in_flight = global_max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.overrides = overrides or {}
+        self.max_tenants = max_tenants
+        self.idle_ttl_s = idle_ttl_s
+        self.in_flight = 0
+        self._tenants: "OrderedDict[str, _TenantState]" = OrderedDict()
+        self._queue: Deque[Tuple[str, "asyncio.Future[None]"]] = deque()
+
+    def _state(self, tenant: str) -> _TenantState:
+        now = time.monotonic()
+        self._evict_idle(now, tenant)
+        st = self._tenants.get(tenant)
+        if st is None:
+            o = self.overrides.get(tenant, {})
+            st = self._tenants[tenant] = _TenantState(
+                float(o.get("rate", self.rate)),
+                float(o.get("burst", self.burst)),
+                int(o.get("max_in_flight", self.tenant_max_in_flight)),
+            )
+            if len(self._tenants) > self.max_tenants:
+                for name, old in list(self._tenants.items()):
+                    if old.in_flight == 0 and old.waiting == 0 and name != tenant:
+                        self._forget(name)
+                        break
+        else:
+            self._tenants.move_to_end(tenant)
+        st.last_used = now
+        return st
+
+    def _evict_idle(self, now: float, keep: str) -> None:
+        # Least recently used first: stop at the first tenant still in use
+        while self._tenants:
+            name, st = next(iter(self._tenants.items()))
+            if name == keep or not st.idle(now, self.idle_ttl_s):
+                return
+            self._forget(name)
+
+    def _forget(self, tenant: str) -> None:
+        del self._tenants[tenant]
+        for gauge in (ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH):
+            try:
+                gauge.remove(tenant)
+            except KeyError:
+                pass
+
+    def _can_run(self, st: _TenantState) -> bool:
+        return self.in_flight < self.global_max_in_flight and st.in_flight < st.max_in_flight
+
+    def _grant(self, tenant: str, st: _TenantState) -> None:
+        st.in_flight += 1
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.labels(tenant=tenant).set(st.in_flight)
+
+    def _reject(self, tenant: str, reason: str, retry_after_s: float) -> AdmissionRejected:
+        ADMISSION_REJECTED_TOTAL.labels(tenant=tenant, reason=reason).inc()
+        return AdmissionRejected(reason, retry_after_s)
+
+    async def acquire(self, tenant: str, timeout_s: Optional[float] = None) -> None:
+        """Admit or raise AdmissionRejected; every success needs a `release`.
+
+        `timeout_s` shortens the queue wait (e.g. to the request deadline).
+        """
+        st = self._state(tenant)
+        wait_s = st.take_token(time.monotonic())
+        if wait_s is not None:
+            raise self._reject(tenant, "rate_limited", wait_s)
+        if self._can_run(st):
+            self._grant(tenant, st)
+            return
+        if len(self._queue) >= self.max_queue:
+            raise self._reject(tenant, "queue_full", self.queue_timeout_s)
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        entry = (tenant, fut)
+        self._queue.append(entry)
+        st.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(tenant=tenant).set(st.waiting)
+        t0 = time.perf_counter()
+        max_wait_s = self.queue_timeout_s if timeout_s is None else max(0.0, min(self.queue_timeout_s, timeout_s))
+        try:
+            await asyncio.wait({fut}, timeout=max_wait_s)
+        except asyncio.CancelledError:
+            # Client went away while queued; a grant that raced in is handed back
+            self._leave_queue(tenant, st, entry)
+            if fut.done() and not fut.cancelled():
+                self.release(tenant)
+            raise
+        ADMISSION_QUEUE_WAIT_MS.labels(tenant=tenant).observe((time.perf_counter() - t0) * 1000)
+        if not fut.done():
+            self._leave_queue(tenant, st, entry)
+            raise self._reject(tenant, "queue_timeout", self.queue_timeout_s)
+
+    def _leave_queue(self, tenant: str, st: _TenantState, entry: Tuple[str, "asyncio.Future[None]"]) -> None:
+        try:
+            self._queue.remove(entry)
+        except ValueError:
+            return  # already granted (and dequeued) by _drain
+        st.waiting -= 1
+        ADMISSION_QUEUE_DEPTH.labels(tenant=tenant).set(st.waiting)
+        if not entry[1].done():
+            entry[1].cancel()
+
+    def release(self, tenant: str) -> None:
+        st = self._tenants.get(tenant)
+        if st is None:
+            return
+        st.in_flight -= 1
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.labels(tenant=tenant).set(st.in_flight)
+        self._drain()
+
+    def _drain(self) -> None:
+        for entry in list(self._queue):
+            if self.in_flight >= self.global_max_in_flight:
+                return
+            tenant, fut = entry
+            st = self._tenants[tenant]
+            if fut.done() or not self._can_run(st):
+                continue
+            self._queue.remove(entry)
+            st.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(tenant=tenant).set(st.waiting)
+            self._grant(tenant, st)
+            fut.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._queue),
+            "tenants": {
+                name: {"in_flight": st.in_flight, "waiting": st.waiting, "tokens": round(st.tokens, 2)}
+                for name, st in self._tenants.items()
+                if st.in_flight or st.waiting
+            },
+        }
+
+
+admission = AdmissionController(
+    rate=settings.TENANT_RATE_PER_SEC,
+    burst=settings.TENANT_BURST,
+    tenant_max_in_flight=settings.TENANT_MAX_IN_FLIGHT,
+    global_max_in_flight=settings.GLOBAL_MAX_IN_FLIGHT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout_s=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    overrides=settings.TENANT_LIMIT_OVERRIDES,
+    idle_ttl_s=settings.TENANT_IDLE_EVICT_SECONDS,
+)
+
+
+async def admit(ctx=Depends(authz)):
+    """Router dependency: hold an admission slot for the whole request.
+
+    The slot is charged to the tenant the RBAC policy grants the token by
+    name; callers whose X-Tenant-Id is not granted that way (wildcard or
+    prefix grants, unknown tokens) share one bucket, so sending another
+    tenant's id or rotating ids gets no extra quota.
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+    token, tenant_id = ctx
+    tenant_id = rbac.granted_tenant(token, tenant_id) or SHARED_TENANT
+    deadline = current_deadline()
+    try:
+        # Queueing spends the request's time budget
+        await admission.acquire(tenant_id, deadline.remaining_s() if deadline is not None else None)
+    except AdmissionRejected as e:
+        rate_limited = e.reason == "rate_limited"
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "code": ErrorCode.RATE_LIMITED if rate_limited else ErrorCode.OVERLOADED,
+                "i18n_key": I18NKeys.ERROR_RATE_LIMITED if rate_limited else I18NKeys.ERROR_OVERLOADED,
+                "reason": e.reason,
+                "retry_after_ms": int(math.ceil(e.retry_after_s * 1000)),
+            },
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after_s)))},
+        )
+    try:
+        yield
+    finally:
+        admission.release(tenant_id)
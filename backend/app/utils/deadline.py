@@ -0,0 +1,121 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Optional
+
+from fastapi import Header, Query
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..metrics.metrics import REQUEST_DEADLINE_TOTAL
+from ..metrics.timing import current_timer
+from .error_codes import ErrorCode
+from .i18n import I18NKeys
+
+# Below this an ES call cannot complete; fail fast instead of sending it
+_MIN_ES_S = 0.02
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before ES answered."""
+
+
+class Deadline:
+    """Time budget of one request, shared by every phase that calls ES.
+
+    - Counts from request arrival (the request timer's start), so admission
+      queueing, the low-priority lane and DSL building spend it too.
+    - `es_timeout_s()` is what an ES call may use: the remaining budget
+      minus `reserve_s` kept for normalize/serialize. ESHttpClient caps its
+      httpx timeouts with it and hands a share to ES as the search `timeout`,
+      so ES stops collecting and answers with what it has.
+    - `partial` is set when ES reported `timed_out` or a cluster was cut
+      off; `respond()` then flags the response with `timed_out: true`.
+    """
+
+    __slots__ = ("started", "budget_s", "reserve_s", "allow_partial", "partial")
+
+    def __init__(
+        self,
+        budget_s: float,
+        *,
+        reserve_s: float = 0.0,
+        allow_partial: bool = True,
+        started: Optional[float] = None,
+    ) -> None:
+        self.started = perf_counter() if started is None else started
+        self.budget_s = budget_s
+        self.reserve_s = reserve_s
+        self.allow_partial = allow_partial
+        self.partial = False
+
+    def remaining_s(self) -> float:
+        return self.budget_s - (perf_counter() - self.started)
+
+    def es_timeout_s(self) -> float:
+        """Seconds left for the next ES call; raises DeadlineExceeded when too few."""
+        left = self.remaining_s() - self.reserve_s
+        if left < _MIN_ES_S:
+            raise DeadlineExceeded(f"deadline of {self.budget_s * 1000:.0f}ms exceeded")
+        return left
+
+    def mark_partial(self) -> None:
+        self.partial = True
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def set_deadline(deadline: Optional[Deadline]) -> None:
+    _current.set(deadline)
+
+
+async def request_deadline(
+    x_request_timeout_ms: Optional[int] = Header(None, alias="X-Request-Timeout-Ms", ge=1),
+    timeout_ms: Optional[int] = Query(None, ge=1),
+    x_allow_partial: Optional[bool] = Header(None, alias="X-Allow-Partial-Results"),
+    allow_partial: Optional[bool] = Query(None),
+) -> None:
+    """Router dependency: start the request's deadline (header or param, else default).
+
+    Async so the context variable is set on the request task, which the
+    sync route and its fan-out threads inherit.
+    """
+    if not settings.REQUEST_DEADLINE_ENABLED:
+        return
+    requested = timeout_ms or x_request_timeout_ms or settings.REQUEST_TIMEOUT_MS
+    partial = allow_partial if allow_partial is not None else x_allow_partial
+    budget_ms = min(requested, settings.REQUEST_TIMEOUT_MAX_MS)
+    timer = current_timer()
+    set_deadline(
+        Deadline(
+            budget_ms / 1000,
+            # Tight budgets keep most of their time for ES
+            reserve_s=min(settings.REQUEST_DEADLINE_RESERVE_MS, budget_ms / 4) / 1000,
+            allow_partial=settings.ALLOW_PARTIAL_RESULTS if partial is None else partial,
+            started=timer.started if timer is not None else None,
+        )
+    )
+
+
+async def deadline_exceeded_handler(request: Any, exc: DeadlineExceeded) -> JSONResponse:
+    REQUEST_DEADLINE_TOTAL.labels(outcome="exceeded").inc()
+    deadline = current_deadline()
+    return JSONResponse(
+        status_code=504,
+        content={
+            "detail": {
+                "code": int(ErrorCode.DEADLINE_EXCEEDED),
+                "i18n_key": I18NKeys.ERROR_DEADLINE_EXCEEDED,
+                "timeout_ms": int(deadline.budget_s * 1000) if deadline is not None else None,
+            }
+        },
+    )
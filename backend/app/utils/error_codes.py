@@ -12,9 +12,14 @@ class ErrorCode(IntEnum):
     TENANT_MISSING = 1002
     RBAC_DENIED = 1003
     ES_CONNECTION = 2001
+    DEADLINE_EXCEEDED = 2002
     BAD_INPUT = 3001
     INVALID_PARAM = 3002
     SESSION_EXPIRED = 3003
     INVALID_PAGE = 3004
+    PROFILER_BUSY = 3005
+    QUERY_TOO_EXPENSIVE = 3006
+    RATE_LIMITED = 4001
+    OVERLOADED = 4002
     INTERNAL_ERROR = 9000
 
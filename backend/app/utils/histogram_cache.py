@@ -0,0 +1,86 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List
+import threading
+
+from ..config import settings
+
+
+class HistogramBucketCache:
+    """Per-key cache of closed date_histogram buckets.
+
+    - A bucket whose end lies before `now - settle` can no longer change,
+      so it is stored forever (bounded by LRU eviction).
+    - The trailing, still-open bucket is never stored; callers re-query it.
+    - Keys are built by the caller (tenant, filters, interval, group_by, indices).
+    """
+
+    def __init__(self, max_entries: int = 1000, max_buckets_per_entry: int = 10000) -> None:
+        self._entries: "OrderedDict[Hashable, Dict[int, Dict[str, Any]]]" = OrderedDict()
+        self._max_entries = max(1, int(max_entries))
+        self._max_buckets = max(1, int(max_buckets_per_entry))
+        self._lock = threading.Lock()
+
+    def get_range(
+        self, key: Hashable, *, start_ms: int, end_ms: int, interval_ms: int
+    ) -> List[Dict[str, Any]]:
+        """Return the contiguous run of cached buckets starting at `start_ms`.
+
+        Stops at the first missing bucket so the caller can query ES from there.
+        """
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return out
+            self._entries.move_to_end(key)
+            k = start_ms
+            while k <= end_ms:
+                b = entry.get(k)
+                if b is None:
+                    break
+                out.append(b)
+                k += interval_ms
+        return out
+
+    def store(
+        self,
+        key: Hashable,
+        buckets: List[Dict[str, Any]],
+        *,
+        interval_ms: int,
+        closed_before_ms: int,
+    ) -> int:
+        """Store buckets that ended before `closed_before_ms`; return how many."""
+        closed = [b for b in buckets if int(b["key"]) + interval_ms <= closed_before_ms]
+        if not closed:
+            return 0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {}
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            for b in closed:
+                entry[int(b["key"])] = b
+            if len(entry) > self._max_buckets:
+                # Drop the oldest buckets first; dashboards look at recent data
+                for k in sorted(entry)[: len(entry) - self._max_buckets]:
+                    del entry[k]
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return len(closed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+histogram_cache = HistogramBucketCache(max_entries=settings.CACHE_MAX_SIZE)
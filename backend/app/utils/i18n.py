@@ -17,10 +17,18 @@ class I18NKeys:
     ERROR_INVALID_PAGE = "error.pagination.invalid_page"
     ERROR_INTERNAL = "error.internal"
     ERROR_INDICES_BAD_CONFIG = "error.indices.bad_config"
+    ERROR_PROFILER_BUSY = "error.debug.profiler_busy"
+    ERROR_QUERY_TOO_EXPENSIVE = "error.query.too_expensive"
+    ERROR_RATE_LIMITED = "error.admission.rate_limited"
+    ERROR_OVERLOADED = "error.admission.overloaded"
+    ERROR_DEADLINE_EXCEEDED = "error.request.deadline_exceeded"
 
     INFO_QUERY_OK = "info.query.ok"
     INFO_ALERTS_OK = "info.alerts.ok"
     INFO_STATS_OK = "info.stats.ok"
+    INFO_HISTOGRAM_OK = "info.histogram.ok"
+    INFO_PATTERNS_OK = "info.patterns.ok"
     INFO_INDICES_OK = "info.indices.ok"
     INFO_INDICES_CONFIG_OK = "info.indices.config.ok"
     INFO_INDICES_REFRESH_OK = "info.indices.refresh.ok"
+    INFO_DEBUG_OK = "info.debug.ok"
@@ -0,0 +1,53 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from typing import Any, Dict, Union
+import json
+
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..metrics.metrics import REQUEST_DEADLINE_TOTAL
+from ..metrics.timing import current_timer
+from .deadline import current_deadline
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when installed, compact stdlib json otherwise."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # e.g. integers beyond 64 bits; stdlib json handles them
+                pass
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def respond(payload: Dict[str, Any]) -> Union[Dict[str, Any], FastJSONResponse]:
+    """Return a route payload, optionally bypassing response_model re-validation.
+
+    Returning a Response instance makes FastAPI skip validating and
+    re-serializing `data` through pydantic; the declared response_model still
+    drives the OpenAPI schema. Enabled with FAST_RESPONSE_ENABLED.
+    Results cut short by the request deadline get `data.timed_out = true`.
+    """
+    timer = current_timer()
+    if timer is not None:
+        # Rendering from here on counts as the serialize phase
+        timer.mark_handler_done()
+    deadline = current_deadline()
+    if deadline is not None and deadline.partial and isinstance(payload.get("data"), dict):
+        payload["data"]["timed_out"] = True
+        REQUEST_DEADLINE_TOTAL.labels(outcome="partial").inc()
+    if settings.FAST_RESPONSE_ENABLED:
+        return FastJSONResponse(payload)
+    return payload
@@ -0,0 +1,4 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
@@ -0,0 +1,115 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Alert rule engine throughput (hits/sec).
+
+Usage (from backend/): python -m benchmarks.bench_alert_rules [--hits 10000] [--rules 50]
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+from app.alerts.engine import AlertRule, CompiledRuleSet
+
+_LEVELS = ["debug", "info", "INFO", "warn", "WARNING", "error", "ERROR"]
+_SERVICES = ["order-service", "pay_api", "gateway", "user-service", "search"]
+_WORDS = ["request", "completed", "user", "cache", "miss", "retry", "upstream", "db", "query", "ok"]
+
+
+def make_rules(n: int) -> List[AlertRule]:
+    rules: List[AlertRule] = []
+    for i in range(n):
+        kind = i % 3
+        raw: Dict[str, Any] = {"id": f"r{i}", "severity": ("high", "medium", "low")[i % 3]}
+        if kind == 0:
+            raw["keywords"] = [f"Err{i}Code", f"fatal-{i}"]
+        elif kind == 1:
+            raw["pattern"] = rf"timeout {i}\d*ms"
+            raw["services"] = [_SERVICES[i % len(_SERVICES)]]
+        else:
+            raw["min_level"] = "warn"
+            raw["keywords"] = [f"exception{i}"]
+        rules.append(AlertRule.from_dict(raw))
+    return rules
+
+
+def make_hits(n: int, n_rules: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    hits = []
+    for _ in range(n):
+        words = rnd.choices(_WORDS, k=12)
+        if rnd.random() < 0.1:
+            words.append(f"Err{rnd.randrange(n_rules)}Code")
+        if rnd.random() < 0.05:
+            words.append(f"timeout {rnd.randrange(n_rules)}00ms")
+        hits.append(
+            {
+                "_source": {
+                    "level": rnd.choice(_LEVELS),
+                    "service": rnd.choice(_SERVICES),
+                    "message": " ".join(words),
+                }
+            }
+        )
+    return hits
+
+
+def naive_match(rules: List[AlertRule], hits: List[Dict[str, Any]]) -> List[Any]:
+    """Reference: per-hit, per-rule loop with individually compiled regexes."""
+    compiled = [re.compile(r.message_regex()) if r.has_message_match else None for r in rules]
+    out = []
+    for h in hits:
+        src = h["_source"]
+        level = str(src.get("level") or "").lower()
+        level = {"warning": "warn"}.get(level, level)
+        service = str(src.get("service") or "").lower().replace("_", "-")
+        found = None
+        for r, rx in zip(rules, compiled):
+            if r.levels and level not in r.levels:
+                continue
+            if r.services and service not in r.services:
+                continue
+            if rx is not None and not rx.search(src.get("message") or ""):
+                continue
+            found = r
+            break
+        out.append(found)
+    return out
+
+
+def _rate(fn, hits, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(hits)
+        best = min(best, time.perf_counter() - t0)
+    return len(hits) / best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hits", type=int, default=10000)
+    ap.add_argument("--rules", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rules = make_rules(args.rules)
+    hits = make_hits(args.hits, args.rules)
+    rule_set = CompiledRuleSet(rules)
+    assert rule_set.match_batch(hits) == naive_match(rules, hits)
+    result = {
+        "hits": args.hits,
+        "rules": args.rules,
+        "compiled_hits_per_sec": round(_rate(rule_set.match_batch, hits, args.repeat)),
+        "naive_hits_per_sec": round(_rate(lambda hs: naive_match(rules, hs), hits, args.repeat)),
+    }
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
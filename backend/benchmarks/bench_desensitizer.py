@@ -0,0 +1,99 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Desensitizer throughput: combined single pass (+ prefilter, + memo) vs one
+`re.sub` per rule.
+
+Usage (from backend/): python -m benchmarks.bench_desensitizer [--messages 20000] [--distinct 500]
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from typing import List
+
+from app.logs.desensitizer import LogDesensitizer
+
+_PER_RULE = [
+    (re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"), "***@***"),
+    (re.compile(r"\beyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+"), "eyJ******"),
+    (re.compile(r"(?i)(bearer\s+)[A-Za-z0-9\-._~+/]+=*"), r"\1******"),
+    (re.compile(r"(?i)(\b(?:token|api[_-]?key|secret|password)\s*[=:]\s*)[^\s\"'&,;]+"), r"\1******"),
+    (re.compile(r"(?<![0-9])[1-9][0-9]{16}[0-9Xx](?![0-9])"), "******"),
+    (re.compile(r"(?<![0-9])1[3-9][0-9]{9}(?![0-9])"), "******"),
+    (re.compile(r"(?<![0-9.])(?:[0-9]{1,3}\.){3}[0-9]{1,3}(?![0-9.])"), "*.*.*.*"),
+]
+
+_TEMPLATES = [
+    "request completed path=/api/orders/{n} status=200 latency={n}ms",
+    "user {n}@example.com logged in from 10.0.{b}.{b}",
+    "sms sent to 138{n8} template=verify",
+    "cache miss key=order:{n} region=cn-east",
+    "GET /health OK",
+    "upstream call failed Authorization: Bearer tok{n}.sig retry={b}",
+]
+
+
+def make_messages(n: int, distinct: int, seed: int = 3) -> List[str]:
+    rnd = random.Random(seed)
+    pool = [
+        rnd.choice(_TEMPLATES).format(n=rnd.randrange(10**6), n8=f"{rnd.randrange(10**8):08d}", b=rnd.randrange(255))
+        for _ in range(distinct)
+    ]
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def per_rule(messages: List[str]) -> None:
+    for m in messages:
+        for rx, repl in _PER_RULE:
+            m = rx.sub(repl, m)
+
+
+def _rate(fn, messages: List[str], repeat: int) -> int:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - t0)
+    return round(len(messages) / best)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--distinct", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    repeated = make_messages(args.messages, args.distinct)
+    unique = make_messages(args.messages, args.messages, seed=5)
+    uncached = LogDesensitizer(cache_size=0)
+
+    def memo(messages: List[str]) -> None:
+        # Fresh cache per run so the first occurrence of each message is paid for
+        d = LogDesensitizer(cache_size=10000)
+        for m in messages:
+            d.mask_text(m)
+
+    def single_pass(messages: List[str]) -> None:
+        for m in messages:
+            uncached.mask_text(m)
+
+    print(
+        json.dumps(
+            {
+                "messages": args.messages,
+                "distinct": args.distinct,
+                "per_rule_msgs_per_sec": _rate(per_rule, unique, args.repeat),
+                "single_pass_msgs_per_sec": _rate(single_pass, unique, args.repeat),
+                "memo_repeated_msgs_per_sec": _rate(memo, repeated, args.repeat),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
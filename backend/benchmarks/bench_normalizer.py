@@ -0,0 +1,101 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Normalizer throughput: legacy per-hit path vs `normalize_batch`.
+
+Usage (from backend/): python -m benchmarks.bench_normalizer [--hits 200] [--clusters 5]
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from app.logs.normalizer import normalize_batch
+
+
+def make_hits(n: int, seed: int = 11) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    hits = []
+    for i in range(n):
+        hits.append(
+            {
+                "_index": "logs-app-2025.01.01",
+                "_id": str(i),
+                "sort": [1735689600000 + i, str(i)],
+                "_source": {
+                    "@timestamp": f"2025-01-01T00:00:{i % 60:02d}Z",
+                    "level": rnd.choice(["info", "warn", "error"]),
+                    "loglevel": "INFO",
+                    "message": "request completed user=%d latency=%dms " % (i, rnd.randrange(900)) * 4,
+                    "service": rnd.choice(["order-service", "pay_api", "gateway"]),
+                    "tenant_id": "t1",
+                    "host": f"node-{i % 16}",
+                    "fields": {"service": "order-service"},
+                },
+            }
+        )
+    return hits
+
+
+def legacy_normalize(hit: Dict[str, Any]) -> Dict[str, Any]:
+    """The per-hit implementation `normalize_batch` replaced (desensitizer omitted)."""
+    from app.config import settings
+
+    src = hit.get("_source", {})
+    msg = src.get("message") or src.get("log")
+    if msg is not None:
+        msg = str(msg)
+        if len(msg) > settings.MAX_MESSAGE_LEN:
+            msg = msg[: settings.MAX_MESSAGE_LEN]
+    return {
+        "timestamp": src.get("@timestamp") or src.get("timestamp") or hit.get("sort", [None])[0],
+        "level": src.get("level"),
+        "message": msg,
+        "service": src.get("service"),
+        "tenant_id": src.get("tenant_id"),
+        "host": src.get("host"),
+        "extra": {
+            k: v
+            for k, v in src.items()
+            if k not in {"@timestamp", "timestamp", "level", "message", "log", "service", "tenant_id", "host"}
+        },
+    }
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hits", type=int, default=200)
+    ap.add_argument("--clusters", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    hits = make_hits(args.hits * args.clusters)
+    assert [legacy_normalize(h) for h in hits] == normalize_batch(hits, desensitize=False)
+    legacy = _best(lambda: [legacy_normalize(h) for h in hits], args.repeat)
+    batch = _best(lambda: normalize_batch(hits, desensitize=False), args.repeat)
+    print(
+        json.dumps(
+            {
+                "hits": len(hits),
+                "legacy_hits_per_sec": round(len(hits) / legacy),
+                "batch_hits_per_sec": round(len(hits) / batch),
+                "speedup": round(legacy / batch, 2),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
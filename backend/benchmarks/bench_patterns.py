@@ -0,0 +1,64 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Single-core throughput of the `/patterns` template miner on synthetic lines
+drawn from a fixed set of message shapes with random variables.
+
+Usage (from backend/): python -m benchmarks.bench_patterns [--lines 200000]
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from app.logs.patterns import LogPatternMiner
+
+_SHAPES = [
+    "request completed user=%d latency=%dms path=/api/orders/%d",
+    "db timeout after %dms on shard %d host 10.0.%d.%d",
+    "payment failed for order %d: card declined code %d",
+    "worker %d started pid %d",
+    "GET /health 200 in %dms",
+    "login ok for alice from web",
+    "login ok for bob from mobile",
+    "retrying upstream call attempt=%d of %d backoff=%dms",
+]
+
+
+def make_lines(n: int, seed: int = 7) -> List[str]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        shape = rnd.choice(_SHAPES)
+        out.append(shape % tuple(rnd.randrange(100000) for _ in range(shape.count("%"))))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=200000)
+    args = ap.parse_args()
+
+    lines = make_lines(args.lines)
+    miner = LogPatternMiner()
+    t0 = time.perf_counter()
+    for i, line in enumerate(lines):
+        miner.add(line, i, str(i))
+    elapsed = time.perf_counter() - t0
+    print(
+        json.dumps(
+            {
+                "lines": args.lines,
+                "lines_per_sec": round(args.lines / elapsed),
+                "clusters": len(miner.clusters),
+                "top": [(p["template"], p["count"]) for p in miner.top(3)],
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+End-to-end `/api/logs/query` latency and allocations for a 200-item page,
+default response path vs FAST_RESPONSE_ENABLED.
+
+ES is replaced in-process by a canned response, so only app-side work
+(validation, normalize, serialization) is measured.
+
+Usage (from backend/): python -m benchmarks.bench_response [--items 200] [--requests 300]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routes import logs as logs_routes
+from benchmarks.bench_normalizer import make_hits
+
+_HEADERS = {"Authorization": "Bearer viewer-bench", "X-Tenant-Id": "t1"}
+
+
+def _payload(items: int) -> Dict[str, Any]:
+    return {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": items},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-bench"],
+    }
+
+
+def _run(client: TestClient, payload: Dict[str, Any], n: int) -> Dict[str, float]:
+    for _ in range(20):
+        client.post("/api/logs/query", json=payload, headers=_HEADERS)
+    lat = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        resp = client.post("/api/logs/query", json=payload, headers=_HEADERS)
+        lat.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == 200
+    tracemalloc.start()
+    client.post("/api/logs/query", json=payload, headers=_HEADERS)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lat.sort()
+    return {
+        "p50_ms": round(statistics.median(lat), 3),
+        "p99_ms": round(lat[int(len(lat) * 0.99) - 1], 3),
+        "peak_alloc_kb": round(peak / 1024, 1),
+        "bytes": len(resp.content),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=300)
+    args = ap.parse_args()
+
+    settings.MAX_PAGE_SIZE = max(settings.MAX_PAGE_SIZE, args.items)
+    hits = make_hits(args.items)
+    canned = {"hits": {"total": {"value": len(hits)}, "hits": hits}}
+    logs_routes.es_client.search_logs = lambda index, body, doc_type=None: canned
+    settings.ES_HOSTS = settings.ES_HOSTS[:1]
+
+    client = TestClient(app)
+    payload = _payload(args.items)
+    out: Dict[str, Any] = {"items": args.items}
+    for name, fast in (("default", False), ("fast", True)):
+        settings.FAST_RESPONSE_ENABLED = fast
+        out[name] = _run(client, payload, args.requests)
+    print(json.dumps(out))
+
+
+if __name__ == "__main__":
+    main()
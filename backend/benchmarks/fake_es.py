@@ -0,0 +1,270 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Local Elasticsearch stand-in for load tests: an ASGI app serving a synthetic,
+deterministic log corpus with 6.x or 7.x response shapes and simulated
+latency.
+
+- `GET /` reports the version; `GET /_cat/indices` lists the indices
+  (with `docs.count` and `pri`).
+- `POST /{index}[/{type}]/_search` honours size/from/search_after/sort and
+  `_source`/highlight, and answers the aggregations the app builds (terms,
+  composite, filters, date_histogram). Queries are not evaluated: every
+  search matches the whole corpus.
+- `POST /{index}[/{type}]/_bulk` acknowledges every action (audit writes).
+- Latency is `--latency-ms` plus lognormal jitter and a per-hit cost;
+  `took` reports it. A `?timeout=<n>ms` shorter than that cuts the hits
+  and answers `timed_out: true`.
+
+Usage (from backend/): python -m benchmarks.fake_es [--port 9250] [--version 6] [--docs 1000000]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+_LEVELS = ["info", "info", "info", "info", "warn", "error", "debug"]
+_SERVICES = ["order-service", "pay_api", "gateway", "user-service", "search"]
+_SHAPES = [
+    "request completed user=%d latency=%dms path=/api/orders/%d",
+    "db timeout after %dms on shard %d",
+    "payment failed for order %d: card declined code %d",
+    "cache miss key=session:%d ttl=%d",
+    "retrying upstream call attempt=%d of %d",
+]
+_END_MS = 1735776000000  # 2025-01-02T00:00:00Z, newest document
+_STEP_MS = 50
+
+
+class FakeCorpus:
+    """Documents are a pure function of their rank (0 = newest)."""
+
+    def __init__(self, docs: int, indices: int) -> None:
+        self.docs = docs
+        self.indices = [f"logs-app-2025.01.{d:02d}-{i}" for d in range(1, 32) for i in range(indices // 31 + 1)][
+            :indices
+        ]
+
+    def ts_ms(self, rank: int) -> int:
+        return _END_MS - rank * _STEP_MS
+
+    def source(self, rank: int) -> Dict[str, Any]:
+        shape = _SHAPES[rank % len(_SHAPES)]
+        args = tuple((rank * 7919 + k * 104729) % 100000 for k in range(shape.count("%")))
+        ts = self.ts_ms(rank)
+        return {
+            "@timestamp": _iso(ts),
+            "level": _LEVELS[rank % len(_LEVELS)],
+            "message": shape % args,
+            "service": _SERVICES[rank % len(_SERVICES)],
+            "tenant_id": "t1",
+            "host": f"node-{rank % 16}",
+            "trace_id": f"{rank:016x}",
+        }
+
+
+def _iso(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _first_sort_order(body: Dict[str, Any]) -> str:
+    for spec in body.get("sort") or []:
+        if isinstance(spec, dict):
+            for _, v in spec.items():
+                return (v or {}).get("order", "desc") if isinstance(v, dict) else str(v)
+    return "desc"
+
+
+def _terms_buckets(field: str, total: int, size: int) -> List[Dict[str, Any]]:
+    values = {"level": _LEVELS, "service": _SERVICES, "host": [f"node-{i}" for i in range(16)]}.get(
+        field.split(".")[0], _SERVICES
+    )
+    distinct = list(dict.fromkeys(values))
+    share = total // max(1, len(distinct))
+    return [{"key": v, "doc_count": share} for v in distinct[:size]]
+
+
+class FakeES:
+    def __init__(self, corpus: FakeCorpus, version: int, latency_ms: float, per_hit_us: float, seed: int) -> None:
+        self.corpus = corpus
+        self.version = version
+        self.latency_ms = latency_ms
+        self.per_hit_us = per_hit_us
+        self._rnd = random.Random(seed)
+
+    def _total(self, n: int) -> Any:
+        return {"value": n, "relation": "eq"} if self.version >= 7 else n
+
+    def _aggs(self, aggs: Dict[str, Any]) -> Dict[str, Any]:
+        n = self.corpus.docs
+        out: Dict[str, Any] = {}
+        for name, spec in aggs.items():
+            if "terms" in spec:
+                out[name] = {"buckets": _terms_buckets(spec["terms"]["field"], n, int(spec["terms"].get("size", 10)))}
+            elif "composite" in spec:
+                comp = spec["composite"]
+                src = next(iter(comp["sources"][0].values()))
+                key = next(iter(comp["sources"][0]))
+                field = next(iter(src.values()))["field"]
+                buckets = _terms_buckets(field, n, 1000)
+                after = (comp.get("after") or {}).get(key)
+                if after is not None:
+                    keys = [b["key"] for b in buckets]
+                    buckets = buckets[keys.index(after) + 1:] if after in keys else []
+                page = buckets[: int(comp.get("size", 10))]
+                res: Dict[str, Any] = {"buckets": [{"key": {key: b["key"]}, "doc_count": b["doc_count"]} for b in page]}
+                if page:
+                    res["after_key"] = {key: page[-1]["key"]}
+                out[name] = res
+            elif "filters" in spec:
+                keys = list(spec["filters"]["filters"])
+                out[name] = {"buckets": {k: {"doc_count": n // (i + 2)} for i, k in enumerate(keys)}}
+            elif "date_histogram" in spec:
+                dh = spec["date_histogram"]
+                interval = dh.get("fixed_interval") or dh.get("interval") or "1h"
+                step = _interval_ms(interval)
+                bounds = dh.get("extended_bounds") or {}
+                lo = int(bounds.get("min", _END_MS - 24 * 3600000))
+                hi = int(bounds.get("max", _END_MS))
+                lo -= lo % step
+                buckets = [
+                    {"key": k, "key_as_string": _iso(k), "doc_count": max(1, step // _STEP_MS)}
+                    for k in range(lo, hi + 1, step)
+                ][:5000]
+                out[name] = {"buckets": buckets}
+        return out
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        size = int(body.get("size", 10))
+        asc = _first_sort_order(body) == "asc"
+        after = body.get("search_after")
+        if after:
+            # sort values are [ts_ms, "_id"]; ids are doc-<rank>
+            start = int(str(after[-1]).rsplit("-", 1)[-1])
+            start = start - 1 if asc else start + 1
+        else:
+            start = (self.corpus.docs - 1 if asc else 0) - (int(body.get("from", 0)) * (1 if asc else -1))
+        includes = (body.get("_source") or {}).get("includes") if isinstance(body.get("_source"), dict) else None
+        highlight = body.get("highlight")
+        hits: List[Dict[str, Any]] = []
+        step = -1 if asc else 1
+        rank = start
+        while len(hits) < size and 0 <= rank < self.corpus.docs:
+            src = self.corpus.source(rank)
+            hit: Dict[str, Any] = {
+                "_index": self.corpus.indices[rank % len(self.corpus.indices)],
+                "_type": "doc" if self.version < 7 else "_doc",
+                "_id": f"doc-{rank}",
+                "_score": None,
+                "sort": [self.corpus.ts_ms(rank), f"doc-{rank}"],
+            }
+            if highlight:
+                hit["highlight"] = {"message": [src["message"]]}
+            if includes:
+                src = {k: v for k, v in src.items() if k in includes}
+            hit["_source"] = src
+            hits.append(hit)
+            rank += step
+        res: Dict[str, Any] = {
+            "took": 0,
+            "timed_out": False,
+            "_shards": {"total": 5, "successful": 5, "skipped": 0, "failed": 0},
+            "hits": {"total": self._total(self.corpus.docs), "max_score": None, "hits": hits},
+        }
+        if body.get("aggs"):
+            res["aggregations"] = self._aggs(body["aggs"])
+        return res
+
+    def delay_ms(self, hits: int) -> float:
+        jitter = self._rnd.lognormvariate(0, 0.5)
+        return self.latency_ms * jitter + hits * self.per_hit_us / 1000
+
+
+def _interval_ms(interval: str) -> int:
+    unit = {"s": 1000, "m": 60000, "h": 3600000, "d": 86400000}[interval[-1]]
+    return int(interval[:-1]) * unit
+
+
+def create_app(
+    *, version: int = 6, docs: int = 1_000_000, indices: int = 500,
+    latency_ms: float = 5.0, per_hit_us: float = 20.0, seed: int = 42,
+) -> Starlette:
+    fake = FakeES(FakeCorpus(docs, indices), version, latency_ms, per_hit_us, seed)
+
+    async def root(request: Request) -> Response:
+        number = "6.5.4" if version < 7 else "7.10.2"
+        return JSONResponse({"name": "fake-es", "version": {"number": number}, "tagline": "You Know, for Search"})
+
+    async def cat_indices(request: Request) -> Response:
+        per_index = str(fake.corpus.docs // max(1, len(fake.corpus.indices)))
+        return JSONResponse([{"index": name, "docs.count": per_index, "pri": "5"} for name in fake.corpus.indices])
+
+    async def search(request: Request) -> Response:
+        raw = await request.body()
+        body = json.loads(raw) if raw else {}
+        res = fake.search(body)
+        delay = fake.delay_ms(len(res["hits"]["hits"]))
+        timeout = request.query_params.get("timeout", "")
+        if timeout.endswith("ms") and delay > float(timeout[:-2]):
+            # Like ES: stop at the search timeout and answer with what was collected
+            budget = float(timeout[:-2])
+            hits = res["hits"]["hits"]
+            del hits[int(len(hits) * budget / delay):]
+            res["timed_out"], delay = True, budget
+        res["took"] = int(math.ceil(delay))
+        await asyncio.sleep(delay / 1000)
+        return JSONResponse(res)
+
+    async def bulk(request: Request) -> Response:
+        # Acknowledge every action line of the NDJSON body
+        actions = (await request.body()).count(b'{"index"')
+        items = [{"index": {"status": 201, "result": "created"}} for _ in range(actions)]
+        return JSONResponse({"took": 1, "errors": False, "items": items})
+
+    async def other(request: Request) -> Response:
+        # Anything else: accept and acknowledge
+        return JSONResponse({"result": "created", "_id": "x"}, status_code=201)
+
+    routes = [
+        Route("/", root, methods=["GET"]),
+        Route("/_cat/indices", cat_indices, methods=["GET"]),
+        Route("/{index}/_search", search, methods=["GET", "POST"]),
+        Route("/{index}/{doc_type}/_search", search, methods=["GET", "POST"]),
+        Route("/{index}/_bulk", bulk, methods=["POST", "PUT"]),
+        Route("/{index}/{doc_type}/_bulk", bulk, methods=["POST", "PUT"]),
+        Route("/{path:path}", other, methods=["GET", "POST", "PUT"]),
+    ]
+    return Starlette(routes=routes)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9250)
+    ap.add_argument("--version", type=int, choices=(6, 7), default=6)
+    ap.add_argument("--docs", type=int, default=1_000_000)
+    ap.add_argument("--indices", type=int, default=500)
+    ap.add_argument("--latency-ms", type=float, default=5.0)
+    ap.add_argument("--per-hit-us", type=float, default=20.0)
+    args = ap.parse_args(argv)
+    app = create_app(
+        version=args.version, docs=args.docs, indices=args.indices,
+        latency_ms=args.latency_ms, per_hit_us=args.per_hit_us,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
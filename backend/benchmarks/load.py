@@ -0,0 +1,270 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+End-to-end load test against a local fake Elasticsearch (see fake_es.py).
+
+Starts the fake ES and the real app (uvicorn) as subprocesses, measures the
+app's cold start (spawn -> /readyz, i.e. startup warm-up done), then drives each scenario
+at the given concurrency and prints a JSON report: per scenario p50/p90/p99,
+RPS, errors and app CPU time, plus app peak RSS and the BENCHMARK.md
+targets.
+
+Scenarios: query, paginate (one /paginate/init per worker, then
+/paginate/get over its pages), stats, alerts.
+
+Usage (from backend/):
+  python -m benchmarks.load [--es-version 6] [--concurrency 100] [--requests 2000]
+                            [--scenarios query,paginate,stats,alerts] [--admission] [--out report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+_HEADERS = {"Authorization": "Bearer viewer-bench", "X-Tenant-Id": "t1"}
+_TIME_RANGE = {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"}
+TARGETS = {"p99_ms": 500, "concurrency": 100, "cold_start_s": 2.0}
+SCENARIOS = ("query", "paginate", "stats", "alerts")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_http(url: str, timeout_s: float) -> Optional[float]:
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout_s:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter() - t0
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def _proc_cpu_s(pid: int) -> Optional[float]:
+    """utime + stime of `pid` from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _proc_peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return round(sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))], 2)
+
+
+async def _drive(
+    base: str,
+    concurrency: int,
+    requests: int,
+    make_call: Callable[[httpx.AsyncClient, int, Dict[str, Any]], Any],
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=_HEADERS, limits=limits, timeout=30.0) as client:
+
+        async def worker(wid: int) -> None:
+            nonlocal errors
+            state: Dict[str, Any] = {"wid": wid}
+            for i in counter:
+                t0 = time.perf_counter()
+                try:
+                    resp = await make_call(client, i, state)
+                    ok = resp.status_code == 200 and resp.json().get("code") == 0
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - t0) * 1000)
+                errors += 0 if ok else 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p90_ms": _percentile(latencies, 0.90),
+        "p99_ms": _percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+async def _query(client: httpx.AsyncClient, i: int, state: Dict[str, Any]) -> httpx.Response:
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1 + i % 5, "page_size": 20},
+        "time_range": _TIME_RANGE,
+        "filters": {"level": ["error", "warn"]} if i % 2 else {"keyword": "timeout"},
+    }
+    return await client.post("/api/logs/query", json=payload)
+
+
+async def _paginate(client: httpx.AsyncClient, i: int, state: Dict[str, Any]) -> httpx.Response:
+    if "session_id" not in state:
+        init = await client.post(
+            "/api/logs/paginate/init",
+            json={"tenant_id": "t1", "pagination": {"page": 1, "page_size": 20}, "time_range": _TIME_RANGE},
+        )
+        state["session_id"] = init.json()["data"]["session_id"]
+        state["page"] = 0
+    state["page"] = state["page"] % 50 + 1
+    return await client.post(
+        "/api/logs/paginate/get", json={"session_id": state["session_id"], "page": state["page"]}
+    )
+
+
+async def _stats(client: httpx.AsyncClient, i: int, state: Dict[str, Any]) -> httpx.Response:
+    group_by = ("service", "level", "host")[i % 3]
+    return await client.post(
+        "/api/logs/stats", json={"tenant_id": "t1", "time_range": _TIME_RANGE, "group_by": group_by}
+    )
+
+
+async def _alerts(client: httpx.AsyncClient, i: int, state: Dict[str, Any]) -> httpx.Response:
+    return await client.post(
+        "/api/logs/alerts",
+        json={"tenant_id": "t1", "time_range": _TIME_RANGE, "severity": ["high", "medium"]},
+    )
+
+
+_CALLS = {"query": _query, "paginate": _paginate, "stats": _stats, "alerts": _alerts}
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    es_port, app_port = _free_port(), _free_port()
+    es_url = f"http://127.0.0.1:{es_port}"
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_es", "--port", str(es_port),
+            "--version", str(args.es_version), "--latency-ms", str(args.es_latency_ms),
+        ],
+        cwd=backend_dir,
+    )
+    app_proc = None
+    try:
+        if _wait_http(es_url + "/", 15) is None:
+            raise RuntimeError("fake ES did not start")
+        env = dict(os.environ)
+        env.update(
+            {
+                "ES_HOSTS": json.dumps([es_url]),
+                "LOG_INDEXES": json.dumps(["logs-*"]),
+                "METRICS_ENABLED": "true",
+                "ALERT_SCHEDULER_ENABLED": "false",
+                # All load comes from one tenant: per-tenant limits would reject most of it
+                "ADMISSION_ENABLED": "true" if args.admission else "false",
+            }
+        )
+        t_spawn = time.perf_counter()
+        app_proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+                "--port", str(app_port), "--log-level", "warning",
+            ],
+            cwd=backend_dir,
+            env=env,
+        )
+        app_url = f"http://127.0.0.1:{app_port}"
+        if _wait_http(app_url + "/readyz", 30) is None:
+            raise RuntimeError("app did not start")
+        cold_start_s = round(time.perf_counter() - t_spawn, 3)
+        warmup = httpx.get(app_url + "/readyz").json()["data"]
+
+        report: Dict[str, Any] = {
+            "es_version": args.es_version,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "python": platform.python_version(),
+            "cold_start_s": cold_start_s,
+            "warmup": warmup,
+            "scenarios": {},
+        }
+        for name in args.scenarios:
+            # Warm connection pools and lazy state outside the measurement
+            asyncio.run(_drive(app_url, min(args.concurrency, 8), 16, _CALLS[name]))
+            cpu0 = _proc_cpu_s(app_proc.pid)
+            result = asyncio.run(_drive(app_url, args.concurrency, args.requests, _CALLS[name]))
+            cpu1 = _proc_cpu_s(app_proc.pid)
+            if cpu0 is not None and cpu1 is not None:
+                result["app_cpu_s"] = round(cpu1 - cpu0, 3)
+                result["app_cpu_pct"] = round(100 * (cpu1 - cpu0) / result["wall_s"], 1)
+            report["scenarios"][name] = result
+        report["app_peak_rss_mb"] = _proc_peak_rss_mb(app_proc.pid)
+        worst_p99 = max((r["p99_ms"] for r in report["scenarios"].values()), default=0.0)
+        report["targets"] = dict(TARGETS)
+        report["meets_targets"] = {
+            "p99_ms": worst_p99 < TARGETS["p99_ms"],
+            "concurrency": args.concurrency >= TARGETS["concurrency"],
+            "cold_start_s": cold_start_s <= TARGETS["cold_start_s"],
+        }
+        return report
+    finally:
+        for proc in (app_proc, fake):
+            if proc is not None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--es-version", type=int, choices=(6, 7), default=6)
+    ap.add_argument("--es-latency-ms", type=float, default=5.0)
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--admission", action="store_true", help="keep per-tenant admission control on")
+    ap.add_argument("--out", default="")
+    args = ap.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        ap.error(f"unknown scenarios: {sorted(unknown)}")
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+
+Microbenchmarks for the CPU-bound pure-Python paths, with stored baselines.
+
+Each case runs on generated fixtures and reports ops/sec (best of
+`--repeat` timed runs) and the peak traced allocation of one call.
+
+Cases: adapt_query_to_es6, normalize_batch (200 / 10k hits), the
+MultiESClient.search_logs_all merge (3 clusters x 1000 hits),
+IndexDiscoveryService.find_indices (10k / 100k indices) and _is_valid,
+evaluate_alerts (10k hits).
+
+Usage (from backend/):
+  python -m benchmarks.micro                      # print results
+  python -m benchmarks.micro --save               # (re)write benchmarks/baselines/micro.json
+  python -m benchmarks.micro --compare [--threshold 0.2]
+      # compare against the baseline; exit 1 when a case is slower by more than
+      # `threshold` (ops/sec) or allocates more than `threshold` above baseline
+  python -m benchmarks.micro --filter find_indices
+
+Baselines are machine dependent: regenerate them on the machine that runs
+the comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.alerts.engine import evaluate_alerts
+from app.es.client import MultiESClient
+from app.es.query_adapter import adapt_query_to_es6
+from app.indexes.service import IndexDiscoveryService
+from app.logs.normalizer import normalize_batch
+from benchmarks.bench_normalizer import make_hits
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+
+_SERVICES = ["order", "pay", "gateway", "user", "search", "sctv", "billing", "auth"]
+
+
+def make_index_names(n: int) -> List[str]:
+    """`n` distinct daily index names across services and environments."""
+    names: List[str] = []
+    i = 0
+    while len(names) < n:
+        svc = _SERVICES[i % len(_SERVICES)]
+        env = ("prod", "staging", "dev")[(i // len(_SERVICES)) % 3]
+        day = i // (len(_SERVICES) * 3)
+        names.append(f"logs-{svc}-{env}-{2020 + day // 366}.{(day // 31) % 12 + 1:02d}.{day % 31 + 1:02d}")
+        i += 1
+    return names
+
+
+class _CannedClient:
+    def __init__(self, hits: List[Dict[str, Any]]) -> None:
+        self._res = {"hits": {"total": {"value": len(hits)}, "hits": hits}}
+
+    def available(self) -> bool:
+        return True
+
+    def search_logs(self, index: Any, body: Any, doc_type: Any = None) -> Dict[str, Any]:
+        return self._res
+
+
+def make_cluster_hits(clusters: int, per_cluster: int) -> List[List[Dict[str, Any]]]:
+    """Per-cluster hit lists with interleaved timestamps, as ES returns them (newest first)."""
+    out = []
+    for c in range(clusters):
+        hits = make_hits(per_cluster, seed=c)
+        for i, h in enumerate(hits):
+            h["_source"]["@timestamp"] = f"2025-01-01T{(i * 7 + c) % 24:02d}:{i % 60:02d}:{c * 3 % 60:02d}Z"
+        hits.sort(key=lambda h: h["_source"]["@timestamp"], reverse=True)
+        out.append(hits)
+    return out
+
+
+def _query_kwargs(mode: str) -> Dict[str, Any]:
+    return {
+        "tenant_id": "t1",
+        "pagination": {"page": 3, "page_size": 20},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "filters": {"level": ["error", "warn"], "service": ["order-service"], "keyword": "timeout"},
+        "sort": {"field": "timestamp", "order": "desc"},
+        "mode": mode,
+        "cursor_after": ["2025-01-01T10:00:00Z", "abc"] if mode == "cursor" else None,
+    }
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    cases: List[Tuple[str, Callable[[], Any]]] = []
+
+    page_kwargs, cursor_kwargs = _query_kwargs("page"), _query_kwargs("cursor")
+    cases.append(("adapt_query_to_es6[page]", lambda: adapt_query_to_es6(**page_kwargs)))
+    cases.append(("adapt_query_to_es6[cursor]", lambda: adapt_query_to_es6(**cursor_kwargs)))
+
+    for n in (200, 10000):
+        hits = make_hits(n)
+        cases.append((f"normalize_batch[{n}]", lambda hits=hits: normalize_batch(hits)))
+
+    multi = MultiESClient.__new__(MultiESClient)
+    multi.clients = [_CannedClient(h) for h in make_cluster_hits(3, 1000)]
+    merge_body = {"size": 200}
+    cases.append(
+        ("search_logs_all[3x1000]", lambda: multi.search_logs_all(index=["logs-*"], body=merge_body))
+    )
+
+    for n in (10000, 100000):
+        svc = IndexDiscoveryService()
+        svc._cache = set(make_index_names(n))
+        cases.append((f"find_indices[{n},substring]", lambda svc=svc: svc.find_indices(keyword="sctv-prod")))
+        cases.append(
+            (f"find_indices[{n},regex]", lambda svc=svc: svc.find_indices(keyword=r"^logs-(pay|auth)-prod", use_regex=True))
+        )
+        cases.append((f"find_indices[{n},fuzzy]", lambda svc=svc: svc.find_indices(keyword="billing_qa")))
+
+    validator = IndexDiscoveryService()
+    validator._exclude_patterns = [r"-dev-"]
+    names = make_index_names(10000)
+    cases.append(("_is_valid[10000]", lambda: [validator._is_valid(n) for n in names]))
+
+    alert_hits = make_hits(10000)
+    cases.append(("evaluate_alerts[10000]", lambda: evaluate_alerts(alert_hits, ["high", "medium", "low"])))
+    return cases
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, float]:
+    fn()  # warm caches (regexes, plans)
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed * 2 >= min_time else 10
+    best = elapsed
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": round(number / best, 2), "alloc_kb": round(peak / 1024, 1)}
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> Dict[str, Any]:
+    rows: Dict[str, Any] = {}
+    regressions: List[str] = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            rows[name] = dict(cur, status="new")
+            continue
+        speed = cur["ops_per_sec"] / base["ops_per_sec"] if base["ops_per_sec"] else 1.0
+        alloc = cur["alloc_kb"] / base["alloc_kb"] if base["alloc_kb"] else 1.0
+        reasons = []
+        if speed < 1 - threshold:
+            reasons.append("slower")
+        # ignore sub-KB noise on tiny allocations
+        if alloc > 1 + threshold and cur["alloc_kb"] - base["alloc_kb"] > 1:
+            reasons.append("more_alloc")
+        if reasons:
+            regressions.append(name)
+        rows[name] = dict(
+            cur,
+            baseline_ops_per_sec=base["ops_per_sec"],
+            baseline_alloc_kb=base["alloc_kb"],
+            speed_ratio=round(speed, 3),
+            alloc_ratio=round(alloc, 3),
+            status="regression:" + ",".join(reasons) if reasons else "ok",
+        )
+    return {"threshold": threshold, "regressions": regressions, "cases": rows}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--save", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    ap.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--filter", default="", help="only run cases containing this text")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.1, help="seconds per timed run")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    args = ap.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn in build_cases():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.repeat, args.min_time)
+
+    if args.save:
+        existing: Dict[str, Any] = {}
+        if args.filter and os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                existing = json.load(f).get("cases", {})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        doc = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cases": {**existing, **results},
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["cases"]
+        report = compare(results, baseline, args.threshold)
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if report["regressions"] else 0)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
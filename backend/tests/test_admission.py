@@ -0,0 +1,152 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.tenancy import admission as admission_mod
+from app.tenancy.admission import AdmissionController, AdmissionRejected
+
+
+def test_token_bucket_rejects_with_retry_after():
+    async def run():
+        ctl = AdmissionController(rate=2, burst=2)
+        for _ in range(2):
+            await ctl.acquire("t1")
+            ctl.release("t1")
+        with pytest.raises(AdmissionRejected) as exc:
+            await ctl.acquire("t1")
+        assert exc.value.reason == "rate_limited" and 0 < exc.value.retry_after_s <= 0.5
+        # Other tenants have their own bucket
+        await ctl.acquire("t2")
+
+    asyncio.run(run())
+
+
+def test_bulkhead_queues_and_hands_slots_to_unblocked_tenants():
+    async def run():
+        ctl = AdmissionController(rate=0, tenant_max_in_flight=1, global_max_in_flight=2, queue_timeout_s=1)
+        await ctl.acquire("a")
+        waiter = asyncio.ensure_future(ctl.acquire("a"))
+        await asyncio.sleep(0)
+        assert ctl.snapshot()["queued"] == 1
+        # "a" is at its limit, but "b" still gets the free global slot
+        await ctl.acquire("b")
+        assert ctl.in_flight == 2
+        ctl.release("a")
+        await asyncio.wait_for(waiter, 1)
+        assert ctl.snapshot()["tenants"]["a"] == {"in_flight": 1, "waiting": 0, "tokens": 100.0}
+
+    asyncio.run(run())
+
+
+def test_bounded_queue_rejects_fast_and_times_out():
+    async def run():
+        ctl = AdmissionController(rate=0, global_max_in_flight=1, max_queue=1, queue_timeout_s=0.05)
+        await ctl.acquire("a")
+        waiter = asyncio.ensure_future(ctl.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await ctl.acquire("c")
+        assert full.value.reason == "queue_full"
+        with pytest.raises(AdmissionRejected) as timeout:
+            await waiter
+        assert timeout.value.reason == "queue_timeout"
+        assert ctl.snapshot()["queued"] == 0
+        ctl.release("a")
+        assert ctl.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_logs_routes_return_429_with_retry_after(monkeypatch):
+    from app.config import settings
+    from app.routes import logs as logs_routes
+
+    monkeypatch.setattr(admission_mod, "admission", AdmissionController(rate=1, burst=1))
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(
+        logs_routes.es_client, "search_logs", lambda index, body, doc_type=None: {"hits": {"total": 0, "hits": []}}
+    )
+    client = TestClient(app)
+    payload = {
+        "tenant_id": "t9",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-a"],
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t9"}
+    assert client.post("/api/logs/query", json=payload, headers=headers).json()["code"] == 0
+    resp = client.post("/api/logs/query", json=payload, headers=headers)
+    assert resp.status_code == 429 and resp.headers["Retry-After"] == "1"
+    detail = resp.json()["detail"]
+    assert detail["reason"] == "rate_limited" and detail["retry_after_ms"] > 0
+    # Slots are returned after each request
+    assert admission_mod.admission.in_flight == 0
+    # Health checks are not subject to admission
+    assert client.get("/healthz").status_code == 200
+
+
+def test_idle_tenants_are_evicted(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission_mod.time, "monotonic", lambda: clock[0])
+
+    async def run():
+        ctl = AdmissionController(rate=1, burst=2, idle_ttl_s=60)
+        await ctl.acquire("a")
+        ctl.release("a")
+        await ctl.acquire("b")
+        clock[0] += 30
+        await ctl.acquire("c")
+        assert list(ctl._tenants) == ["a", "b", "c"]
+        clock[0] += 31
+        # "a" is idle with a refilled bucket; "b" still holds a slot
+        await ctl.acquire("c")
+        assert list(ctl._tenants) == ["b", "c"]
+        for name in ("b", "c", "c"):
+            ctl.release(name)
+        clock[0] += 61
+        await ctl.acquire("d")
+        assert list(ctl._tenants) == ["d"]
+
+    asyncio.run(run())
+
+
+def test_admission_charges_the_granted_tenant(monkeypatch):
+    from app.config import settings
+    from app.routes import logs as logs_routes
+    from app.security.auth import CompiledPolicy, rbac
+
+    policy = {
+        "roles": {"viewer": ["query"]},
+        "tokens": {"tok-t1": {"t1": "viewer"}, "tok-any": "viewer"},
+    }
+    monkeypatch.setattr(rbac, "_policy", CompiledPolicy(policy))
+    monkeypatch.setattr(admission_mod, "admission", AdmissionController(rate=1, burst=1))
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(
+        logs_routes.es_client, "search_logs", lambda index, body, doc_type=None: {"hits": {"total": 0, "hits": []}}
+    )
+    client = TestClient(app)
+
+    def query(token, tenant):
+        payload = {
+            "tenant_id": tenant,
+            "pagination": {"page": 1, "page_size": 10},
+            "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+            "override_indexes": ["logs-a"],
+        }
+        headers = {"Authorization": f"Bearer {token}", "X-Tenant-Id": tenant}
+        return client.post("/api/logs/query", json=payload, headers=headers).status_code
+
+    assert query("tok-t1", "t1") == 200
+    # A wildcard grant cannot spend t1's bucket, nor get fresh ones by rotating ids
+    assert query("tok-any", "t1") == 200
+    assert query("tok-any", "t2") == 429
+    assert query("tok-any", "t3") == 429
+    assert set(admission_mod.admission._tenants) == {"t1", "*"}
@@ -0,0 +1,239 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import pytest
+
+from app.alerts.engine import AlertRule, CompiledRuleSet, compile_alert_plan, label_alerts
+
+
+def _hit(level):
+    return {"_source": {"level": level, "message": "m"}}
+
+
+def test_default_plan_filters_and_labels():
+    plan = compile_alert_plan(["high", "low"])
+    assert set(plan.filters) == {"high", "low"}
+    # "low" includes the catch-all: neither error nor warn
+    assert any("must_not" in c.get("bool", {}) for c in plan.filters["low"]["bool"]["should"])
+    labeled = label_alerts([_hit("ERROR"), _hit("debug")], plan)
+    assert [e["severity"] for e in labeled] == ["high", "low"]
+
+
+def test_rule_refs_override_severity():
+    plan = compile_alert_plan(None, [{"id": "level-warn", "severity": "high"}])
+    assert set(plan.filters) == {"high"}
+    assert plan.default is None
+    labeled = label_alerts([_hit("warn"), _hit("info")], plan)
+    assert [e["severity"] for e in labeled] == ["high"]
+
+
+def test_compiled_rules_first_match_wins():
+    rules = CompiledRuleSet(
+        [
+            AlertRule.from_dict({"id": "oom", "severity": "high", "keywords": ["OutOfMemory"]}),
+            AlertRule.from_dict(
+                {"id": "pay-timeout", "severity": "high", "services": ["pay_api"], "pattern": r"timeout \d+ms"}
+            ),
+            AlertRule.from_dict({"id": "warn-up", "severity": "medium", "min_level": "warn"}),
+        ],
+        default_severity=None,
+    )
+    srcs = [
+        {"level": "info", "message": "java.lang.outofmemoryerror"},
+        {"level": "ERROR", "service": "pay-api", "message": "upstream TIMEOUT 300ms"},
+        {"level": "error", "service": "web", "message": "upstream timeout 300ms"},
+        {"level": "debug", "service": "pay-api", "message": "timeout 5ms"},
+        {"level": "debug", "message": "fine"},
+    ]
+    matched = rules.match_batch([{"_source": s} for s in srcs])
+    assert [r.id if r else None for r in matched] == ["oom", "pay-timeout", "warn-up", "pay-timeout", None]
+
+
+def test_compiled_rules_overlapping_keywords():
+    rules = CompiledRuleSet(
+        [
+            AlertRule.from_dict({"id": "short", "severity": "low", "keywords": ["conn"]}),
+            AlertRule.from_dict({"id": "long", "severity": "high", "keywords": ["connection reset"]}),
+            AlertRule.from_dict({"id": "inner", "severity": "high", "keywords": ["reset"]}),
+        ]
+    )
+    assert rules.match_one({"message": "Connection reset by peer"}).id == "short"
+    assert rules.subset([{"id": "inner"}]).match_one({"message": "connection reset"}).id == "inner"
+
+
+def test_es_filters_follow_first_match_and_level_aliases():
+    import json
+
+    rules = CompiledRuleSet(
+        [
+            AlertRule.from_dict({"id": "pay", "severity": "high", "services": ["pay"]}),
+            AlertRule.from_dict({"id": "warn-up", "severity": "medium", "min_level": "warn"}),
+            AlertRule.from_dict({"id": "timeout", "severity": "low", "keywords": ["timeout"]}),
+        ]
+    )
+    plan = compile_alert_plan(None, [{"id": r.id} for r in rules.rules], rule_set=rules)
+    medium = json.dumps(plan.filters["medium"])
+    # Hits of the earlier `pay` rule are excluded from the medium filter
+    assert "must_not" in medium and "pay" in medium
+    assert all(v in medium for v in ("warning", "WARNING", "critical", "err"))
+    # Keywords are substring matches decided in Python, never pushed down
+    assert "multi_match" not in json.dumps(plan.filters["low"])
+    assert not plan.exact
+    assert compile_alert_plan(["high"]).exact
+
+
+def test_unknown_rule_rejected():
+    with pytest.raises(KeyError):
+        compile_alert_plan(None, [{"id": "nope"}])
+
+
+class _FakeES:
+    _base_url = "http://fake:9200"
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.bodies = []
+
+    def available(self):
+        return True
+
+    def search_logs(self, index, body, doc_type=None):
+        self.bodies.append(body)
+        after = body.get("search_after")
+        rest = [h for h in self.hits if after is None or h["sort"] > after]
+        return {"hits": {"hits": rest[: body["size"]]}}
+
+
+def test_scheduler_resumes_from_watermark(monkeypatch):
+    import time
+
+    from app.alerts import scheduler as sched_mod
+    from app.config import settings
+    from app.es.query_adapter import parse_timestamp_ms
+
+    monkeypatch.setattr(sched_mod, "normalize_batch", lambda hs: [dict(h["_source"]) for h in hs])
+    monkeypatch.setattr(settings, "ALERT_SCHEDULER_SETTLE_SECONDS", 60)
+    now = int(time.time() * 1000)
+    old = now - 120_000
+    hits = [
+        {"_index": "logs-a", "_id": str(i), "sort": [old + i, str(i)],
+         "_source": {"level": "error", "tenant_id": "t1"}}
+        for i in range(3)
+    ]
+    es = _FakeES(hits)
+    sched = sched_mod.AlertScheduler(clients=[es])
+    sched._enabled = True
+    sched._rule_ids = ["level-error"]
+    sched._state_path = ""
+    sched.run_once()
+    assert es.bodies[0].get("search_after") is None
+    # Evaluation stops at the settle horizon, not at wall-clock now
+    time_filter = es.bodies[0]["query"]["bool"]["filter"][0]["bool"]["should"][0]["range"]
+    (bounds,) = time_filter.values()
+    assert parse_timestamp_ms(bounds["lte"]) <= int(time.time() * 1000) - 60_000
+    es.hits.append({"_index": "logs-a", "_id": "9", "sort": [old + 10, "9"],
+                    "_source": {"level": "error", "tenant_id": "t1"}})
+    sched.run_once()
+    # Second tick continues after the last seen document
+    assert es.bodies[-1]["search_after"] == [old + 2, "2"]
+
+    plan = compile_alert_plan(["high"])
+    rule_ids = sched.rule_ids_for(plan)
+    assert rule_ids == ["level-error"]
+    assert sched.covers(rule_ids, old - 5000, now - 60_000)
+    # The settle window may still receive late documents
+    assert not sched.covers(rule_ids, old - 5000, now)
+    data = sched.query(plan=plan, rule_ids=rule_ids, tenant_id="t1",
+                       start_ms=old - 5000, end_ms=now - 60_000, page=1, page_size=10)
+    assert data["total"] == 4 and data["counts"] == {"high": 4}
+    assert data["items"][0]["severity"] == "high"
+
+
+def _scheduler(monkeypatch, clients):
+    from app.alerts import scheduler as sched_mod
+
+    monkeypatch.setattr(sched_mod, "normalize_batch", lambda hs: [dict(h["_source"]) for h in hs])
+    sched = sched_mod.AlertScheduler(clients=clients)
+    sched._enabled = True
+    sched._rule_ids = ["level-error"]
+    sched._state_path = ""
+    return sched
+
+
+def test_scheduler_does_not_cover_failed_or_truncated_hosts(monkeypatch):
+    import time
+
+    import httpx
+
+    from app.config import settings
+
+    old = int(time.time() * 1000) - 600_000
+    hits = [
+        {"_index": "logs-a", "_id": str(i), "sort": [old + i * 1000, str(i)],
+         "_source": {"level": "error", "tenant_id": "t1"}}
+        for i in range(5)
+    ]
+
+    class _DownES(_FakeES):
+        _base_url = "http://down:9200"
+
+        def search_logs(self, index, body, doc_type=None):
+            raise httpx.ConnectError("down")
+
+    sched = _scheduler(monkeypatch, [_FakeES(hits), _DownES([])])
+    sched.run_once()
+    assert not sched.covers(["level-error"], old, old + 10_000)
+
+    monkeypatch.setattr(settings, "ALERT_SCHEDULER_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "ALERT_SCHEDULER_MAX_PAGES", 1)
+    sched = _scheduler(monkeypatch, [_FakeES(hits)])
+    sched.run_once()
+    # One page of two documents: only the instant before the second is complete
+    assert not sched.covers(["level-error"], old, old + 10_000)
+    assert not sched.covers(["level-error"], old, old + 1000)
+    assert sched.covers(["level-error"], old, old + 999)
+
+
+def test_scheduler_matches_evaluate_alerts_for_severity_filters(monkeypatch):
+    import time
+
+    from app.alerts import engine as engine_mod
+    from app.alerts import scheduler as sched_mod
+    from app.alerts.engine import evaluate_alerts
+
+    rules = CompiledRuleSet([
+        AlertRule.from_dict({"id": "timeout", "keywords": ["timeout"], "severity": "medium"}),
+        AlertRule.from_dict({"id": "error", "levels": ["error"], "severity": "high"}),
+        AlertRule.from_dict({"id": "warn", "levels": ["warn"], "severity": "low"}),
+    ])
+    monkeypatch.setattr(engine_mod, "alert_rules", rules)
+    monkeypatch.setattr(sched_mod, "alert_rules", rules)
+    old = int(time.time() * 1000) - 600_000
+    sources = [
+        {"level": "error", "message": "db timeout"},
+        {"level": "error", "message": "boom"},
+        {"level": "warn", "message": "slow"},
+    ]
+    hits = [
+        {"_index": "logs-a", "_id": str(i), "sort": [old + i, str(i)],
+         "_source": dict(src, n=i, tenant_id="t1")}
+        for i, src in enumerate(sources)
+    ]
+    sched = _scheduler(monkeypatch, [_FakeES(hits)])
+    sched._rule_ids = ["timeout", "error", "warn"]
+    sched.run_once()
+
+    for severities in (["high"], ["medium", "high"], ["medium"], ["high", "low"]):
+        expected = {(a["hit"]["_source"]["n"], a["severity"]) for a in evaluate_alerts(hits, severities)}
+        plan = compile_alert_plan(severities)
+        rule_ids = sched.rule_ids_for(plan)
+        if rule_ids is None:
+            # An excluded severity ranks first (e.g. "high" alone: the timeout
+            # rule takes the first document); only ES can answer
+            assert severities in (["high"], ["high", "low"])
+            continue
+        data = sched.query(plan=plan, rule_ids=rule_ids, tenant_id="t1",
+                           start_ms=old - 1000, end_ms=old + 1000, page=1, page_size=10)
+        assert {(it["n"], it["severity"]) for it in data["items"]} == expected
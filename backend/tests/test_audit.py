@@ -0,0 +1,110 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.es.audit import AuditWriter, audit_writer
+from app.es.client import ESHttpClient, pool_options
+from app.main import app
+from app.routes import logs as logs_routes
+
+
+def _doc(day, n=0):
+    return {"@timestamp": f"2025-01-{day:02d}T10:00:00.000+00:00", "tenant_id": "t1", "n": n}
+
+
+class BulkHttp:
+    def __init__(self):
+        self.calls = []
+        self.down = False
+
+    def request(self, method, url, content=None, headers=None, **kwargs):
+        if self.down:
+            raise httpx.ConnectError("refused")
+        lines = content.decode("utf-8").splitlines()
+        self.calls.append({"url": url, "lines": lines, "headers": headers})
+        items = [{"index": {"status": 201}} for _ in lines[::2]]
+        return httpx.Response(200, json={"errors": False, "items": items}, request=httpx.Request(method, url))
+
+
+def _es6_client(fake):
+    client = ESHttpClient("http://es:9200", options=pool_options("http://es:9200"))
+    client._version_major = 6
+    client._client = fake
+    return client
+
+
+def test_batches_go_to_daily_indices_with_es6_type_path():
+    fake = BulkHttp()
+    client = _es6_client(fake)
+    writer = AuditWriter(index_prefix="mcp-audit", doc_type="_doc", client_factory=lambda: client)
+    writer.flush([_doc(1, 0), _doc(2, 1), _doc(1, 2)])
+    by_url = {c["url"]: c["lines"] for c in fake.calls}
+    assert set(by_url) == {
+        "http://es:9200/mcp-audit-2025.01.01/_doc/_bulk",
+        "http://es:9200/mcp-audit-2025.01.02/_doc/_bulk",
+    }
+    lines = by_url["http://es:9200/mcp-audit-2025.01.01/_doc/_bulk"]
+    assert lines[0] == '{"index":{}}' and [json.loads(x)["n"] for x in lines[1::2]] == [0, 2]
+    assert fake.calls[0]["headers"]["Content-Type"] == "application/x-ndjson"
+
+    client._version_major = 7
+    writer.flush([_doc(3)])
+    assert fake.calls[-1]["url"] == "http://es:9200/mcp-audit-2025.01.03/_bulk"
+
+
+def test_unreachable_es_spills_to_disk_then_replays(tmp_path):
+    fake = BulkHttp()
+    spill = tmp_path / "audit.spill"
+    writer = AuditWriter(spill_path=str(spill), batch_size=2, client_factory=lambda: _es6_client(fake))
+    fake.down = True
+    writer.flush([_doc(1, 0), _doc(1, 1)])
+    # In backoff: the next batch is spilled without trying ES
+    writer.flush([_doc(1, 2)])
+    assert len(spill.read_text().splitlines()) == 3 and not fake.calls
+
+    fake.down = False
+    writer._retry_at = 0.0
+    writer.flush([_doc(1, 3)])
+    assert not spill.exists()
+    sent = [json.loads(x)["n"] for c in fake.calls for x in c["lines"][1::2]]
+    assert sorted(sent) == [0, 1, 2, 3]
+
+
+def test_full_queue_drops_without_blocking():
+    writer = AuditWriter(queue_size=2)
+    assert writer.record(_doc(1)) and writer.record(_doc(1))
+    assert writer.record(_doc(1)) is False
+    assert writer.get_status()["queued"] == 2
+
+
+def test_searches_are_audited_with_request_identity(monkeypatch):
+    class FakeHttp:
+        def request(self, method, url, json=None, **kwargs):
+            body = {"took": 3, "hits": {"total": 0, "hits": []}}
+            return httpx.Response(200, json=body, request=httpx.Request(method, url))
+
+    recorded = []
+    monkeypatch.setattr(audit_writer, "record", recorded.append)
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(logs_routes.es_client, "_version_major", 6)
+    monkeypatch.setattr(logs_routes.es_client, "_client", FakeHttp())
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-a"],
+    }
+    headers = {"Authorization": "Bearer admin-secret", "X-Tenant-Id": "t1"}
+    assert TestClient(app).post("/api/logs/query", json=payload, headers=headers).json()["code"] == 0
+    (event,) = recorded
+    assert event["tenant_id"] == "t1" and event["role"] == "admin"
+    assert event["endpoint"] == "/api/logs/query" and event["indices"] == ["logs-a"]
+    assert event["status"] == "ok" and event["took_ms"] == 3 and len(event["fingerprint"]) == 16
+    assert "admin-secret" not in json.dumps(event)
@@ -0,0 +1,105 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.alerts.scheduler import alert_scheduler
+from app.config import settings
+from app.es.client import ClusterRegistry, MultiESClient, cluster_registry, es_client, multi_es_client
+from app.indexes.service import index_discovery
+from app.main import app
+
+
+def test_subsystems_share_one_client_per_host():
+    assert es_client is cluster_registry.primary()
+    assert multi_es_client.clients == cluster_registry.clients()
+    assert index_discovery._clients == cluster_registry.clients()
+    assert alert_scheduler._clients == cluster_registry.clients()
+    reg = ClusterRegistry(["http://a:9200", "http://a:9200/", "http://b:9200"])
+    assert len(reg) == 2 and reg.get("http://b:9200/") is reg.clients()[1]
+
+
+def test_capabilities_follow_detected_version():
+    client = ClusterRegistry(["http://a:9200"]).primary()
+    assert client.capabilities() == {
+        "doc_type": True, "composite_aggs": True, "track_total_hits": False, "pit": False,
+        "fixed_interval": False,
+    }
+    client.version = "7.10.2"
+    caps = client.capabilities()
+    assert caps["pit"] and caps["track_total_hits"] and caps["fixed_interval"] and not caps["doc_type"]
+
+
+def test_registry_capabilities_are_common_to_all_clusters(monkeypatch):
+    reg = ClusterRegistry(["http://a:9200", "http://b:9200"])
+    a, b = reg.clients()
+    a.version, a._version_major = "7.10.2", 7
+    probed = []
+
+    def detect():
+        probed.append(b)
+        b.version, b._version_major = "6.5.4", 6
+        return 6
+
+    monkeypatch.setattr(b, "_detect_version", detect)
+    assert reg.capabilities(probe=False)["fixed_interval"] is False
+    assert probed == []
+    # The unknown cluster is probed; a 6.x cluster keeps the legacy `interval`
+    caps = reg.capabilities()
+    assert probed == [b] and not caps["fixed_interval"] and not caps["track_total_hits"]
+    b.version, b._version_major = "7.17.0", 7
+    assert reg.capabilities()["fixed_interval"] and probed == [b]
+
+
+class _Client:
+    def __init__(self, name, fail):
+        self.cluster = self._base_url = name
+        self.fail = fail
+        self.calls = 0
+        self.consecutive_failures = 0
+
+    def available(self):
+        return self.consecutive_failures < 3
+
+    def search_logs(self, index, body, doc_type=None):
+        self.calls += 1
+        if self.fail:
+            self.consecutive_failures += 1
+            raise httpx.ConnectError("down")
+        return {"hits": {"total": 1, "hits": [{"_source": {"timestamp": "2025-01-01T00:00:00Z"}}]}}
+
+
+def test_fanout_skips_clusters_marked_down():
+    multi = MultiESClient(ClusterRegistry([]))
+    up, down = _Client("up", False), _Client("down", True)
+    multi.clients = [up, down]
+    for _ in range(5):
+        assert multi.search_logs_all(index=["logs-*"], body={"size": 10})["hits"]["total"]["value"] == 1
+    assert up.calls == 5 and down.calls == 3
+
+
+def test_health_marks_and_cooldown(monkeypatch):
+    monkeypatch.setattr(settings, "CLUSTER_DOWN_AFTER_FAILURES", 2)
+    monkeypatch.setattr(settings, "CLUSTER_RETRY_SECONDS", 60)
+    client = ClusterRegistry(["http://a:9200"]).primary()
+    client.mark_failed(httpx.ConnectError("x"))
+    assert client.available()
+    client.mark_failed(httpx.ConnectError("x"))
+    assert not client.available() and "ConnectError" in client.status()["last_error"]
+    client.last_failure_ts -= 61
+    assert client.available()
+    client.mark_ok()
+    assert client.consecutive_failures == 0
+
+
+def test_clusters_endpoint_is_admin_only():
+    client = TestClient(app)
+    viewer = client.get("/api/debug/clusters", headers={"Authorization": "Bearer viewer-x", "X-Tenant-Id": "t1"})
+    assert viewer.json()["code"] != 0
+    admin = client.get("/api/debug/clusters", headers={"Authorization": "Bearer admin-x", "X-Tenant-Id": "t1"}).json()
+    assert admin["code"] == 0
+    assert [i["host"] for i in admin["data"]["items"]] == [c._base_url for c in cluster_registry.clients()]
+    assert "pool" in admin["data"]["items"][0]
@@ -0,0 +1,73 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import json
+import random
+
+from app.logs.columnar import from_columnar, to_columnar
+from app.logs.normalizer import normalize_batch
+
+
+def make_hits(n, seed=11):
+    rnd = random.Random(seed)
+    return [
+        {
+            "_index": "logs-app-2025.01.01",
+            "_id": str(i),
+            "sort": [1735689600000 + i, str(i)],
+            "_source": {
+                "@timestamp": f"2025-01-01T00:00:{i % 60:02d}Z",
+                "level": rnd.choice(["info", "warn", "error"]),
+                "message": "request completed user=%d latency=%dms" % (i, rnd.randrange(900)),
+                "service": rnd.choice(["order-service", "pay_api", "gateway"]),
+                "tenant_id": "t1",
+                "host": f"node-{i % 16}",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def test_columnar_round_trip_and_collapsing():
+    items = normalize_batch(make_hits(60), desensitize=False)
+    items[0]["message"] = items[1]["message"] = "same"
+    items[2]["extra"] = {"trace_id": "t-2"}
+    col = to_columnar(items)
+    assert col["rows"] == 60
+    assert col["message_counts"][col["dicts"]["message"].index("same")] == 2
+    assert set(col["dicts"]["service"]) == {"order-service", "pay_api", "gateway"}
+    assert len(col["dicts"]["host"]) == 16
+    assert from_columnar(col) == items
+
+
+def test_columnar_keeps_explicit_none_in_extra():
+    items = normalize_batch(make_hits(4), desensitize=False)
+    items[0]["extra"] = {"trace_id": None, "span": "s-0"}
+    items[1]["extra"] = {"span": "s-1"}
+    items[2]["extra"] = {"trace_id": "t-2", "span": None}
+    col = to_columnar(items)
+    assert col["extra_absent"] == {"trace_id": [1, 3], "span": [3]}
+    assert from_columnar(json.loads(json.dumps(col))) == items
+
+
+def test_columnar_is_smaller_for_repetitive_pages():
+    hits = make_hits(200)
+    for i, h in enumerate(hits):
+        h["_source"]["message"] = f"GET /api/orders 200 worker={i % 4}"
+    items = normalize_batch(hits, desensitize=False)
+    rows = len(json.dumps(items, separators=(",", ":")))
+    cols = len(json.dumps(to_columnar(items), separators=(",", ":")))
+    assert rows / cols > 3
+
+
+def test_columnar_keeps_bools_and_numbers_apart():
+    items = [{"code": v, "extra": {"ok": v}} for v in (1, True, 1.0, 0, False) * 3]
+    col = to_columnar(items)
+    assert col["dicts"]["code"] == [1, True, 1.0, 0, False] and "extra.ok" in col["dicts"]
+    decoded = from_columnar(json.loads(json.dumps(col)))
+    assert [(type(r["code"]), r["code"]) for r in decoded] == [(type(i["code"]), i["code"]) for i in items]
+    assert [(type(r["extra"]["ok"]), r["extra"]["ok"]) for r in decoded] == [
+        (type(i["extra"]["ok"]), i["extra"]["ok"]) for i in items
+    ]
@@ -0,0 +1,124 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.es.cost import CostGuard, CostModel, index_time_span
+from app.es.query_adapter import adapt_query_to_es6, parse_timestamp_ms
+from app.main import app
+
+_START, _END = "2025-01-10T00:00:00Z", "2025-01-10T12:00:00Z"
+_CATALOG = {f"logs-app-2025.01.{d:02d}": (50_000_000, 5) for d in range(1, 31)}
+
+
+def _body(keyword=None, page=1):
+    return adapt_query_to_es6(
+        tenant_id="t1",
+        pagination={"page": page, "page_size": 100},
+        time_range={"start": _START, "end": _END},
+        filters={"keyword": keyword},
+    )
+
+
+def _plan(guard, body, indices=("logs-*",), approximate=False):
+    return guard.plan(
+        indices=list(indices), catalog=_CATALOG, body=body,
+        start_ms=parse_timestamp_ms(_START), end_ms=parse_timestamp_ms(_END), approximate_count=approximate,
+    )
+
+
+def test_index_time_span_parses_common_suffixes():
+    assert index_time_span("logs-app-2025.01.03")[1] - index_time_span("logs-app-2025.01.03")[0] == 86_400_000
+    assert index_time_span("logs-app-2025.01.03-2") == index_time_span("logs-app-2025.01.03")
+    assert index_time_span("logs-2025-02")[1] - index_time_span("logs-2025-02")[0] == 28 * 86_400_000
+    assert index_time_span("logs-app") is None
+
+
+def test_estimate_counts_only_indices_in_range_and_keyword_costs_more():
+    model = CostModel()
+    est = model.estimate(
+        indices=model.resolve(["logs-*"], _CATALOG), catalog=_CATALOG, body=_body(),
+        start_ms=parse_timestamp_ms(_START), end_ms=parse_timestamp_ms(_END),
+    )
+    # The 10th's index and, through the 1h margin, the 9th's overlap the range
+    assert est["indices"] == 30 and len(est["indices_outside_range"]) == 28
+    plain = est["estimate_ms"]
+    kw = model.estimate(
+        indices=list(_CATALOG), catalog=_CATALOG, body=_body("timeout"),
+        start_ms=parse_timestamp_ms(_START), end_ms=parse_timestamp_ms(_END),
+    )
+    assert "keyword" in kw["features"] and kw["estimate_ms"] > plain
+
+
+def test_guard_reshapes_then_rejects_or_deprioritizes():
+    guard = CostGuard(CostModel(), low_priority_ms=50, reshape_ms=100, reject_ms=1e9)
+    body = _body("timeout")
+    plan = _plan(guard, body, approximate=True)
+    assert plan["decision"] == "reshaped" and plan["reshaped"] == ["narrow_indices", "approximate_count"]
+    excluded = [f"-logs-app-2025.01.{d:02d}" for d in range(1, 31) if d not in (9, 10)]
+    assert plan["indices"] == ["logs-*"] + excluded and body["track_total_hits"] == 10_000
+    cheap = _plan(guard, _body(), indices=["audit-small"])
+    assert cheap["decision"] == "ok" and not cheap["low_priority"]
+
+    strict = CostGuard(CostModel(), reshape_ms=100, reject_ms=500)
+    deep = _plan(strict, _body(page=600))
+    assert deep["decision"] == "rejected" and any("cursor" in h for h in deep["hints"])
+
+
+def test_narrowing_keeps_wildcards_when_the_catalog_is_stale():
+    guard = CostGuard(CostModel(), low_priority_ms=50, reshape_ms=100, reject_ms=1e9)
+    # logs-app-2025.01.31 was created after the last discovery refresh
+    start, end = "2025-01-30T12:00:00Z", "2025-01-31T12:00:00Z"
+    plan = guard.plan(
+        indices=["logs-*", "logs-app-2025.01.02"], catalog=_CATALOG, body=_body("timeout"),
+        start_ms=parse_timestamp_ms(start), end_ms=parse_timestamp_ms(end), approximate_count=False,
+    )
+    assert plan["reshaped"] == ["narrow_indices"]
+    # The wildcard still reaches the new index; only known idle indices are excluded
+    assert plan["indices"][0] == "logs-*" and "logs-app-2025.01.02" not in plan["indices"]
+    assert "-logs-app-2025.01.02" in plan["indices"] and "-logs-app-2025.01.30" not in plan["indices"]
+    assert all(i.startswith("-") for i in plan["indices"][1:])
+    assert plan["estimate"]["indices"] == 1
+
+
+def test_calibration_converges_to_observed_took():
+    model = CostModel(alpha=0.2)
+    for _ in range(50):
+        model.observe(100.0, 300.0)
+    assert 2.9 < model.calibration < 3.1 and model.samples == 50
+
+
+def test_query_route_rejects_expensive_search(monkeypatch):
+    from app.config import settings
+    from app.es import cost as cost_mod
+    from app.routes import logs as logs_routes
+
+    calls = []
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(logs_routes.index_discovery, "_catalog", _CATALOG)
+    monkeypatch.setattr(
+        logs_routes.es_client, "search_logs",
+        lambda index, body, doc_type=None: calls.append(index) or {"took": 40, "hits": {"total": 0, "hits": []}},
+    )
+    monkeypatch.setattr(logs_routes, "cost_guard", CostGuard(CostModel(), reshape_ms=1e8, reject_ms=1.0))
+    client = TestClient(app)
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": _START, "end": _END},
+        "filters": {"keyword": "timeout"},
+        "override_indexes": ["logs-*"],
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    rejected = client.post("/api/logs/query", json=payload, headers=headers).json()
+    assert rejected["code"] == 3006 and rejected["data"]["cost"]["shards"] == 10 and not calls
+
+    guard = CostGuard(CostModel(), low_priority_ms=1.0, reshape_ms=1e8, reject_ms=1e9)
+    monkeypatch.setattr(logs_routes, "cost_guard", guard)
+    ok = client.post("/api/logs/query", json=payload, headers=headers).json()
+    assert ok["code"] == 0 and ok["data"]["cost"]["decision"] == "low_priority"
+    # Lane slot returned, actual took fed back
+    assert guard.lane.acquire(blocking=False) and guard.model.samples == 1
+    assert cost_mod.cost_guard is not guard
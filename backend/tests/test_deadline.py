@@ -0,0 +1,131 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.es.client import ClusterRegistry, MultiESClient
+from app.main import app
+from app.routes import logs as logs_routes
+from app.utils.deadline import Deadline, DeadlineExceeded, set_deadline
+
+
+client = TestClient(app)
+HEADERS = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+PAYLOAD = {
+    "tenant_id": "t1",
+    "pagination": {"page": 1, "page_size": 10},
+    "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+    "override_indexes": ["logs-a"],
+}
+
+
+class FakeHttp:
+    def __init__(self, timed_out=False, raise_timeout=False):
+        self.timed_out = timed_out
+        self.raise_timeout = raise_timeout
+        self.calls = []
+
+    def request(self, method, url, json=None, params=None, timeout=None, **kwargs):
+        self.calls.append({"params": params, "timeout": timeout})
+        if self.raise_timeout:
+            raise httpx.ReadTimeout("read timed out")
+        hit = {"_id": "1", "_source": {"timestamp": "2025-01-01T00:00:00Z", "message": "ok"}}
+        body = {"took": 7, "timed_out": self.timed_out, "hits": {"total": 1, "hits": [hit]}}
+        return httpx.Response(200, json=body, request=httpx.Request(method, url))
+
+
+@pytest.fixture
+def fake_http(monkeypatch):
+    def install(**kw):
+        fake = FakeHttp(**kw)
+        monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+        monkeypatch.setattr(logs_routes.es_client, "_version_major", 6)
+        monkeypatch.setattr(logs_routes.es_client, "_client", fake)
+        monkeypatch.setattr(logs_routes.es_client, "consecutive_failures", 0)
+        return fake
+
+    return install
+
+
+def test_budget_reaches_es_timeout_and_httpx(fake_http):
+    fake = fake_http()
+    resp = client.post("/api/logs/query?timeout_ms=1000", json=PAYLOAD, headers=HEADERS)
+    assert resp.json()["code"] == 0 and "timed_out" not in resp.json()["data"]
+    call = fake.calls[0]
+    es_ms = int(call["params"]["timeout"][:-2])
+    # 1000ms budget - 200ms reserve, 80% of the rest for ES
+    assert 500 <= es_ms <= 640
+    assert call["timeout"].read <= 0.8 and call["timeout"].connect <= 0.8
+
+    # Header works too; the server cap still applies
+    client.post("/api/logs/query", json=PAYLOAD, headers={**HEADERS, "X-Request-Timeout-Ms": "999999"})
+    assert fake.calls[1]["timeout"].read == settings.ES_SEARCH_TIMEOUT
+    assert int(fake.calls[1]["params"]["timeout"][:-2]) > 40_000
+
+
+def test_es_timed_out_is_partial_or_504(fake_http):
+    fake_http(timed_out=True)
+    js = client.post("/api/logs/query", json=PAYLOAD, headers=HEADERS).json()
+    assert js["code"] == 0 and js["data"]["timed_out"] is True
+    assert js["data"]["items"][0]["message"] == "ok"
+
+    resp = client.post("/api/logs/query?allow_partial=false", json=PAYLOAD, headers=HEADERS)
+    assert resp.status_code == 504
+    assert resp.json()["detail"]["code"] == 2002
+    assert resp.json()["detail"]["i18n_key"] == "error.request.deadline_exceeded"
+
+
+def test_deadline_cut_skips_fallback_and_keeps_cluster_healthy(fake_http):
+    fake = fake_http(raise_timeout=True)
+    resp = client.post("/api/logs/query?timeout_ms=500", json=PAYLOAD, headers=HEADERS)
+    assert resp.status_code == 504
+    # No retry with fewer indices after the deadline cut the call
+    assert len(fake.calls) == 1
+    assert logs_routes.es_client.consecutive_failures == 0
+
+
+class _Slow:
+    def __init__(self, name, exc=None):
+        self.cluster = self._base_url = name
+        self.exc = exc
+
+    def available(self):
+        return True
+
+    def search_logs(self, index, body, doc_type=None):
+        if self.exc:
+            raise self.exc
+        return {"hits": {"total": 2, "hits": [{"_source": {"timestamp": "2025-01-01T00:00:00Z"}}]}}
+
+
+def test_fanout_returns_partial_when_a_cluster_runs_out_of_time():
+    multi = MultiESClient(ClusterRegistry([]))
+    multi.clients = [_Slow("a"), _Slow("b", DeadlineExceeded("b"))]
+    deadline = Deadline(1.0)
+    set_deadline(deadline)
+    try:
+        res = multi.search_logs_all(index=["logs-*"], body={"size": 10})
+        assert res["timed_out"] and deadline.partial
+        assert res["hits"]["total"]["value"] == 2
+
+        set_deadline(Deadline(1.0, allow_partial=False))
+        with pytest.raises(DeadlineExceeded):
+            multi.search_logs_all(index=["logs-*"], body={"size": 10})
+
+        multi.clients = [_Slow("b", DeadlineExceeded("b"))]
+        set_deadline(Deadline(1.0))
+        with pytest.raises(DeadlineExceeded):
+            multi.search_logs_all(index=["logs-*"], body={"size": 10})
+    finally:
+        set_deadline(None)
+
+
+def test_exhausted_budget_fails_fast():
+    deadline = Deadline(0.05, reserve_s=0.05)
+    with pytest.raises(DeadlineExceeded):
+        deadline.es_timeout_s()
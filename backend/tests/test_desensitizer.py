@@ -0,0 +1,35 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from app.logs.desensitizer import LogDesensitizer
+
+
+def test_mask_text_rules():
+    d = LogDesensitizer()
+    text = (
+        "user alice@example.com phone 13812345678 id 110101199003071234 "
+        "from 192.168.10.23 Authorization: Bearer abc.def-123 token=s3cr3t&x=1"
+    )
+    out = d.mask_text(text)
+    assert "a***@example.com" in out
+    assert "138****5678" in out
+    assert "110***********1234" in out
+    assert "192.168.*.*" in out
+    assert "Bearer ******" in out
+    assert "token=******&x=1" in out
+    assert d.mask_text("GET /health 200 OK") == "GET /health 200 OK"
+
+
+def test_desensitize_batch_nested_extra():
+    d = LogDesensitizer(cache_size=0)
+    logs = [
+        {
+            "message": "login ok 13912345678",
+            "extra": {"password": "p", "ctx": {"emails": ["bob@corp.io"]}, "n": 3},
+        }
+    ]
+    out = d.desensitize_batch(logs)
+    assert out[0]["message"] == "login ok 139****5678"
+    assert out[0]["extra"] == {"password": "******", "ctx": {"emails": ["b***@corp.io"]}, "n": 3}
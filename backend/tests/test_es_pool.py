@@ -0,0 +1,70 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.config import settings
+from app.es.client import ESHttpClient, pool_options
+from app.metrics.metrics import ES_POOL_CONNECTIONS_OPENED, ES_POOL_WAIT_MS
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = json.dumps({"version": {"number": "7.10.2"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_per_cluster_options_override_defaults(monkeypatch):
+    monkeypatch.setattr(
+        settings, "ES_CLUSTER_OPTIONS", {"http://es2:9200": {"max_connections": 7, "search_timeout": 30}}
+    )
+    opts = pool_options("http://es2:9200/")
+    assert opts["max_connections"] == 7 and opts["search_timeout"] == 30
+    assert pool_options("http://es1:9200")["max_connections"] == settings.ES_POOL_MAX_CONNECTIONS
+    client = ESHttpClient("http://es2:9200")
+    assert client.limits.max_connections == 7
+    assert client._timeouts["search"].read == 30 and client._timeouts["admin"].connect == settings.ES_CONNECT_TIMEOUT
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr("app.es.client._http2_available", lambda: False)
+    client = ESHttpClient("http://es:9200", options=dict(pool_options("http://es:9200"), http2=True))
+    assert client.http2 is False
+
+
+def test_pool_metrics_and_connection_reuse():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = ESHttpClient(f"http://127.0.0.1:{server.server_port}")
+        opened = ES_POOL_CONNECTIONS_OPENED.labels(cluster=client.cluster)
+        waits = ES_POOL_WAIT_MS.labels(cluster=client.cluster)
+        before = opened._value.get()
+        for _ in range(3):
+            assert client.request("GET", client._base_url + "/", kind="admin").status_code == 200
+        # Keep-alive: one connection for three requests, each one's pool wait observed
+        assert opened._value.get() - before == 1
+        assert sum(b.get() for b in waits._buckets) == 3
+        assert client.pool_stats() == {"active": 0, "idle": 1}
+        assert client._detect_version() == 7 and client.capabilities()["pit"]
+    finally:
+        server.shutdown()
+
+
+def test_get_path_quotes_index_and_id(monkeypatch):
+    client = ESHttpClient("http://es1:9200")
+    monkeypatch.setattr(client, "_version_major", 7)
+    assert client._get_path("logs-a,logs-b#x?y", "a/b", None) == "http://es1:9200/logs-a,logs-b%23x%3Fy/_doc/a%2Fb"
@@ -0,0 +1,54 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import json
+
+from app.config import settings
+from app.logs.normalizer import estimate_json_bytes, normalize_batch, normalize_within_budget
+
+
+def test_normalize_batch_shape_and_truncation():
+    hits = [
+        {
+            "_source": {
+                "@timestamp": "2025-01-01T00:00:00Z",
+                "level": "error",
+                "message": "x" * (settings.MAX_MESSAGE_LEN + 10),
+                "service": "order",
+                "tenant_id": "t1",
+                "host": "h1",
+                "trace_id": "abc",
+            }
+        },
+        {"_source": {"log": "plain"}, "sort": [1700000000000, "id1"]},
+    ]
+    items = normalize_batch(hits, desensitize=False)
+    assert len(items[0]["message"]) == settings.MAX_MESSAGE_LEN
+    assert items[0]["extra"] == {"trace_id": "abc"}
+    assert items[1]["timestamp"] == 1700000000000
+    assert items[1]["message"] == "plain"
+    assert set(items[1]) == {"timestamp", "level", "message", "service", "tenant_id", "host", "extra"}
+
+
+def test_normalize_batch_prefers_highlight_fragments():
+    hits = [{"_source": {"level": "info"}, "highlight": {"message": ["a timeout", "b timeout"]}}]
+    items = normalize_batch(hits, desensitize=False)
+    assert items[0]["message"] == "a timeout … b timeout"
+
+
+def test_normalize_within_budget_packs_to_estimated_size():
+    hits = [
+        {"_source": {"message": f"行 {i}\n\t\"quoted\" " + "y" * 300, "level": "info", "n": i, "ok": True}}
+        for i in range(40)
+    ]
+    items, used = normalize_within_budget(hits, 4000, desensitize=False)
+    encoded = json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert used == len(encoded) <= 4000
+    assert 0 < len(items) < len(hits)
+    assert items == normalize_batch(hits[: len(items)], desensitize=False)
+    # A single oversized item is still returned so paging can make progress
+    one, _ = normalize_within_budget(hits, 10, desensitize=False)
+    assert len(one) == 1
+    assert estimate_json_bytes({"a": [1, 2.5, None, False]}) == len('{"a":[1,2.5,null,false]}')
@@ -0,0 +1,103 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.logs.patterns import LogPatternMiner
+from app.main import app
+
+
+def test_miner_groups_variable_tokens_and_bounds_clusters():
+    miner = LogPatternMiner(max_clusters=2)
+    for i in range(10):
+        miner.add(f"db timeout after {i * 7}ms on shard {i}", ts=i, doc_id=str(i))
+    miner.add("login ok for alice", ts=10, doc_id="a")
+    miner.add("login ok for bob", ts=11, doc_id="b")
+    miner.add("cache evicted everything now", ts=12, doc_id="c")
+    top = miner.top(5)
+    assert top[0]["template"] == "db timeout after <*> on shard <*>"
+    assert (top[0]["count"], top[0]["first_ts"], top[0]["last_ts"]) == (10, 0, 9)
+    assert top[0]["example_ids"] == ["0", "1", "2"]
+    assert top[1]["template"] == "login ok for <*>" and top[1]["count"] == 2
+    # Third shape exceeds max_clusters
+    assert miner.other == 1 and miner.lines == 13
+
+
+def test_patterns_route_streams_with_search_after(monkeypatch):
+    from app.config import settings
+    from app.routes import logs as logs_routes
+
+    hits = [
+        {"_id": str(i), "sort": [i, str(i)], "_source": {"@timestamp": 1000 + i, "message": f"order {i} paid\ntrace"}}
+        for i in range(25)
+    ]
+    bodies = []
+
+    def fake_search(index, body, doc_type=None):
+        bodies.append(dict(body))
+        start = body.get("search_after", [-1])[0] + 1
+        return {"hits": {"total": len(hits), "hits": hits[start:start + body["size"]]}}
+
+    monkeypatch.setattr(logs_routes.es_client, "search_logs", fake_search)
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(settings, "PATTERNS_BATCH_SIZE", 10)
+    payload = {
+        "tenant_id": "t1",
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "max_lines": 100,
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    data = TestClient(app).post("/api/logs/patterns", json=payload, headers=headers).json()["data"]
+    assert len(bodies) == 3 and "from" not in bodies[0]
+    assert data["scanned"] == 25 and data["truncated"] is False
+    assert data["patterns"] == [
+        {
+            "template": "order <*> paid",
+            "count": 25,
+            "ratio": 1.0,
+            "first_ts": 1000,
+            "last_ts": 1024,
+            "example_ids": ["0", "1", "2"],
+        }
+    ]
+
+
+def test_patterns_pages_across_clusters_in_ascending_order(monkeypatch):
+    from app.config import settings
+    from app.es.client import ClusterRegistry, MultiESClient
+    from app.routes import logs as logs_routes
+
+    class _Cluster:
+        def __init__(self, ids):
+            self.hits = [
+                {"_id": f"{i:02d}", "sort": [i, f"{i:02d}"], "_source": {"@timestamp": 1000 + i, "message": "tick"}}
+                for i in ids
+            ]
+
+        def available(self):
+            return True
+
+        def search_logs(self, index, body, doc_type=None):
+            after = body.get("search_after")
+            rest = [h for h in self.hits if after is None or h["sort"] > after]
+            return {"hits": {"total": len(self.hits), "hits": rest[: body["size"]]}}
+
+    multi = MultiESClient(ClusterRegistry([]))
+    # Interleaved timestamps: cluster a holds even, cluster b odd seconds
+    multi.clients = [_Cluster(range(0, 30, 2)), _Cluster(range(1, 30, 2))]
+    monkeypatch.setattr(logs_routes, "multi_es_client", multi)
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://a:9200", "http://b:9200"])
+    monkeypatch.setattr(settings, "PATTERNS_BATCH_SIZE", 10)
+    payload = {
+        "tenant_id": "t1",
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "max_lines": 100,
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    data = TestClient(app).post("/api/logs/patterns", json=payload, headers=headers).json()["data"]
+    # Every row read exactly once, oldest to newest
+    assert data["scanned"] == 30
+    (pattern,) = data["patterns"]
+    assert pattern["count"] == 30 and pattern["first_ts"] == 1000 and pattern["last_ts"] == 1029
@@ -0,0 +1,72 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics.profiler import StackSampler, collapse, top_functions
+
+
+def _spin_target(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(200))
+
+
+def _with_spinner(fn):
+    stop = threading.Event()
+    t = threading.Thread(target=_spin_target, args=(stop,), name="spinner", daemon=True)
+    t.start()
+    try:
+        return fn()
+    finally:
+        stop.set()
+        t.join()
+
+
+def test_sampler_sees_busy_thread_and_skips_idle():
+    idle = threading.Event()
+    parked = threading.Thread(target=idle.wait, name="parked", daemon=True)
+    parked.start()
+    try:
+        res = _with_spinner(lambda: StackSampler().sample(0.2, interval_s=0.005))
+    finally:
+        idle.set()
+    assert res["samples"] > 0 and "spinner" in res["threads"]
+    assert "parked" not in res["threads"]
+    text = collapse(res["stacks"])
+    assert any(line.startswith("spinner;") and "test_profiler.py:_spin_target" in line for line in text.splitlines())
+    funcs = {f["function"]: f for f in top_functions(res["stacks"])}
+    assert funcs["test_profiler.py:_spin_target"]["total"] >= res["threads"]["spinner"]
+
+
+def test_one_profile_at_a_time():
+    sampler = StackSampler()
+    sampler._busy.acquire()
+    assert sampler.sample(0.01) is None
+    sampler._busy.release()
+    assert sampler.sample(0.01) is not None
+
+
+def test_profile_endpoint_is_admin_only():
+    client = TestClient(app)
+    viewer = client.get(
+        "/api/debug/profile?seconds=0.05", headers={"Authorization": "Bearer viewer-x", "X-Tenant-Id": "t1"}
+    ).json()
+    assert viewer["code"] != 0
+    start = time.perf_counter()
+    admin = _with_spinner(
+        lambda: client.get(
+            "/api/debug/profile?seconds=0.2&interval_ms=5&top=5",
+            headers={"Authorization": "Bearer admin-x", "X-Tenant-Id": "t1"},
+        ).json()
+    )
+    assert time.perf_counter() - start >= 0.2
+    data = admin["data"]
+    assert admin["code"] == 0 and data["interval_ms"] == 5
+    assert len(data["top_functions"]) <= 5 and "spinner" in data["threads"]
+    assert "_spin_target" in data["collapsed"]
@@ -0,0 +1,53 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from app.es.query_adapter import build_composite_aggregation_es6, parse_composite_buckets
+
+
+def test_composite_aggregation_after_key():
+    body = build_composite_aggregation_es6(field="host", size=2, after_key={"host": "h2"})
+    composite = body["aggs"]["group_stats"]["composite"]
+    assert composite["size"] == 2
+    assert composite["sources"] == [{"host": {"terms": {"field": "host"}}}]
+    assert composite["after"] == {"host": "h2"}
+
+
+def test_parse_composite_buckets_cursor():
+    agg = {
+        "buckets": [
+            {"key": {"host": "h1"}, "doc_count": 3},
+            {"key": {"host": "h2"}, "doc_count": 1},
+        ],
+        "after_key": {"host": "h2"},
+    }
+    buckets, after_key = parse_composite_buckets(agg, field="host", size=2)
+    assert buckets == [{"key": "h1", "doc_count": 3}, {"key": "h2", "doc_count": 1}]
+    assert after_key == {"host": "h2"}
+    # Short page: no more buckets
+    _, after_key = parse_composite_buckets(agg, field="host", size=10)
+    assert after_key is None
+
+
+def test_server_side_truncation_uses_highlight():
+    from app.es.query_adapter import adapt_query_to_es6
+
+    body = adapt_query_to_es6(
+        tenant_id="t1",
+        pagination={"page": 1, "page_size": 10},
+        time_range={},
+        filters={"keyword": "timeout"},
+        sort={},
+        truncate_message=True,
+    )
+    assert "message" not in body["_source"]["includes"]
+    hl = body["highlight"]["fields"]["message"]
+    assert hl["number_of_fragments"] >= 1 and "no_match_size" in hl
+
+    full = adapt_query_to_es6(tenant_id="t1", pagination={}, truncate_message=False)
+    assert "message" in full["_source"]["includes"] and "highlight" not in full
+
+    # Off by default: fields without highlight would lose their message
+    default = adapt_query_to_es6(tenant_id="t1", pagination={})
+    assert "message" in default["_source"]["includes"] and "highlight" not in default
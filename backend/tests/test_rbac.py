@@ -0,0 +1,151 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import hashlib
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routes import logs as logs_routes
+from app.security.auth import RBAC, CompiledPolicy, rbac, scope_indices
+
+
+POLICY = {
+    "roles": {"admin": ["*"], "viewer": {"actions": ["query", "stats"]}},
+    "tokens": {
+        "tok-a": {"t1": "admin", "*": "viewer"},
+        "sha256:" + hashlib.sha256(b"tok-b").hexdigest(): {"t2": "viewer"},
+        "tok-ops": "admin",
+    },
+    "tenants": {"t1": {"index_patterns": ["logs-t1-*"]}, "*": {"index_patterns": ["logs-shared"]}},
+}
+
+
+def test_compiled_decisions_per_tenant_and_token():
+    policy = CompiledPolicy(POLICY)
+    assert policy.decide("tok-a", "t1", "debug") and policy.decide("tok-a", "t9", "query")
+    assert not policy.decide("tok-a", "t9", "debug")
+    # Hashed tokens are matched by digest; unknown tokens get nothing
+    assert policy.decide("tok-b", "t2", "stats") and not policy.decide("tok-b", "t1", "query")
+    assert not policy.decide("nobody", "t1", "query")
+    assert policy.decide("tok-ops", "any", "indices_config")
+    assert policy.decide.cache_info().currsize == 7
+
+    with pytest.raises(ValueError):
+        CompiledPolicy({"roles": {"r": ["query"]}, "tokens": {"x": "missing"}})
+    with pytest.raises(ValueError):
+        CompiledPolicy({"roles": {"r": ["drop_tables"]}})
+
+
+def test_builtin_policy_keeps_token_prefix_roles():
+    builtin = RBAC()
+    assert builtin.allow(token="admin-1", tenant_id="t1", action="debug")
+    assert builtin.allow(token="viewer-1", tenant_id="t1", action="query")
+    assert not builtin.allow(token="viewer-1", tenant_id="t1", action="debug")
+    assert builtin.role_of("admin-1", "t1") == "admin" and builtin.index_patterns("t1") is None
+
+
+def test_scope_indices_never_widens():
+    patterns = ("logs-t1-*",)
+    assert scope_indices(["logs-*"], patterns) == ["logs-t1-*"]
+    assert scope_indices(["logs-t1-app-*", "logs-t2-a", "logs-t1-a"], patterns) == ["logs-t1-app-*", "logs-t1-a"]
+    # Comma lists, exclusions and _all cannot smuggle other indices in
+    assert scope_indices(["logs-t1-a,secret", "-logs-t1-b", "_all"], patterns) == ["logs-t1-a", "logs-t1-*"]
+    assert scope_indices(["secret-*"], patterns) == []
+    # Path and URL syntax is dropped before matching (`*` would match `/`)
+    assert scope_indices(["logs-t1-x/../../secret-idx", "logs-t1-a?b", "logs-t1-%2e", "logs-t1-a b"], patterns) == []
+    assert scope_indices(["anything"], None) == ["anything"]
+
+
+def test_file_changes_are_reloaded_atomically(tmp_path):
+    path = tmp_path / "rbac.json"
+    path.write_text(json.dumps({"roles": {"viewer": ["query"]}, "tokens": {"tok": "viewer"}}))
+    guard = RBAC(str(path), reload_interval_s=0)
+    assert guard.allow(token="tok", tenant_id="t1", action="query")
+
+    path.write_text(json.dumps({"roles": {"viewer": ["query"]}, "tokens": {"tok": {"t2": "viewer"}}}))
+    assert not guard.allow(token="tok", tenant_id="t1", action="query")
+    assert guard.allow(token="tok", tenant_id="t2", action="query")
+
+    # A broken file keeps the last good policy
+    path.write_text("{not json")
+    assert guard.allow(token="tok", tenant_id="t2", action="query")
+
+
+def test_tenant_scope_reaches_the_es_url(monkeypatch):
+    urls = []
+
+    class FakeHttp:
+        def request(self, method, url, json=None, **kwargs):
+            urls.append(url)
+            return httpx.Response(200, json={"hits": {"total": 0, "hits": []}}, request=httpx.Request(method, url))
+
+    monkeypatch.setattr(rbac, "_policy", CompiledPolicy(POLICY))
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(settings, "LOG_INDEXES", ["logs-*"])
+    monkeypatch.setattr(logs_routes.es_client, "_version_major", 6)
+    monkeypatch.setattr(logs_routes.es_client, "_client", FakeHttp())
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer tok-a", "X-Tenant-Id": "t1"}
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+    }
+    assert client.post("/api/logs/query", json=payload, headers=headers).json()["code"] == 0
+    stats = {"tenant_id": "t1", "time_range": payload["time_range"], "group_by": "level"}
+    assert client.post("/api/logs/stats", json=stats, headers=headers).json()["code"] == 0
+    assert len(urls) == 2 and all("/logs-t1-*/" in u for u in urls)
+
+    for override in (["secret-a"], ["logs-t1-x/../../secret-idx"]):
+        forbidden = {**payload, "override_indexes": override}
+        assert client.post("/api/logs/query", json=forbidden, headers=headers).json()["code"] != 0
+    assert len(urls) == 2
+
+    # Unrestricted callers still cannot leave the index path segment
+    monkeypatch.setattr(rbac, "_policy", CompiledPolicy({"roles": {"v": ["query"]}, "tokens": {"tok-a": "v"}}))
+    traversal = {**payload, "override_indexes": ["logs-a/../../_cluster/settings"]}
+    client.post("/api/logs/query", json=traversal, headers=headers)
+    assert urls[2] == "http://localhost:9200/logs-a%2F..%2F..%2F_cluster%2Fsettings/_search"
+
+
+def test_payload_tenant_must_match_the_authorized_tenant(monkeypatch):
+    bodies = []
+
+    def fake_search(index, body, doc_type=None):
+        bodies.append(body)
+        return {"hits": {"total": 0, "hits": []}}
+
+    monkeypatch.setattr(rbac, "_policy", CompiledPolicy(POLICY))
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(logs_routes.es_client, "search_logs", fake_search)
+    client = TestClient(app)
+    payload = {
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+    }
+    viewer = {"Authorization": "Bearer tok-a", "X-Tenant-Id": "t9"}
+    for other in ("t1", "all", "ALL", ""):
+        resp = client.post("/api/logs/query", json={**payload, "tenant_id": other}, headers=viewer)
+        assert resp.status_code == 403
+    stats = {"tenant_id": "all", "time_range": payload["time_range"], "group_by": "level"}
+    assert client.post("/api/logs/stats", json=stats, headers=viewer).status_code == 403
+    assert bodies == []
+
+    assert client.post("/api/logs/query", json={**payload, "tenant_id": "t9"}, headers=viewer).json()["code"] == 0
+    assert {"term": {"tenant_id": "t9"}} in bodies[-1]["query"]["bool"]["filter"]
+
+    # Cross-tenant reads need the cross_tenant action (admin on t1 has "*")
+    admin = {"Authorization": "Bearer tok-a", "X-Tenant-Id": "t1"}
+    init = client.post("/api/logs/paginate/init", json={**payload, "tenant_id": "all"}, headers=admin).json()
+    assert init["code"] == 0
+    assert not any("tenant_id" in json.dumps(f) for f in bodies[-1]["query"]["bool"]["filter"])
+    # ... and sessions keep their tenant filter: a viewer cannot reuse it
+    session = {"session_id": init["data"]["session_id"], "page": 1}
+    assert client.post("/api/logs/paginate/get", json=session, headers=viewer).status_code == 403
@@ -3,6 +3,8 @@ Copyright (c) 2025, elk-MCP Project.
 All rights reserved.
 """
 
+import json
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -21,3 +23,160 @@ def test_query_auth_required():
     resp = client.post("/api/logs/query", json={})
     assert resp.status_code == 401
 
+
+def test_histogram_serves_closed_buckets_from_cache(monkeypatch):
+    from app.routes import logs as logs_routes
+    from app.utils.histogram_cache import histogram_cache
+
+    histogram_cache.clear()
+    calls = []
+
+    def fake_search(index, body, doc_type=None):
+        bounds = body["aggs"]["histogram"]["date_histogram"]["extended_bounds"]
+        calls.append(bounds["min"])
+        keys = range(bounds["min"], bounds["max"] + 1, 60_000)
+        return {"aggregations": {"histogram": {"buckets": [{"key": k, "doc_count": 1} for k in keys]}}}
+
+    monkeypatch.setattr(logs_routes.es_client, "search_logs", fake_search)
+    payload = {
+        "tenant_id": "t1",
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-01T00:09:30Z"},
+        "interval": "1m",
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    first = client.post("/api/logs/histogram", json=payload, headers=headers).json()
+    second = client.post("/api/logs/histogram", json=payload, headers=headers).json()
+    assert len(first["data"]["buckets"]) == 10
+    assert second["data"]["buckets"] == first["data"]["buckets"]
+    # Only the partial trailing bucket is re-queried
+    assert second["data"]["cached_buckets"] == 9
+    assert calls[1] == calls[0] + 9 * 60_000
+
+
+def test_histogram_unaligned_start_keeps_range_and_partial_head(monkeypatch):
+    from app.routes import logs as logs_routes
+    from app.utils.histogram_cache import histogram_cache
+
+    histogram_cache.clear()
+    bodies = []
+
+    def fake_search(index, body, doc_type=None):
+        bodies.append(body)
+        hist = body["aggs"]["histogram"]["date_histogram"]
+        bounds = hist["extended_bounds"]
+        keys = range(bounds["min"], bounds["max"] + 1, 60_000)
+        return {"aggregations": {"histogram": {"buckets": [{"key": k, "doc_count": 1} for k in keys]}}}
+
+    monkeypatch.setattr(logs_routes.es_client, "search_logs", fake_search)
+    monkeypatch.setattr(logs_routes.es_client, "version", "7.10.2")
+    monkeypatch.setattr(logs_routes.es_client, "_version_major", 7)
+    payload = {
+        "tenant_id": "t1",
+        "time_range": {"start": "2025-01-01T00:00:30Z", "end": "2025-01-01T00:09:30Z"},
+        "interval": "1m",
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    first = client.post("/api/logs/histogram", json=payload, headers=headers).json()["data"]
+    second = client.post("/api/logs/histogram", json=payload, headers=headers).json()["data"]
+    hist = bodies[0]["aggs"]["histogram"]["date_histogram"]
+    assert hist["fixed_interval"] == "1m" and "interval" not in hist
+    # The range starts at the user's start, not at the bucket boundary
+    assert '"gte": "2025-01-01T00:00:30Z"' in json.dumps(bodies[0]["query"])
+    assert len(first["buckets"]) == 10 and second["buckets"] == first["buckets"]
+    # The partial head bucket is re-queried with the tail; the full ones in between are cached
+    assert second["cached_buckets"] == 8
+    assert "must_not" in bodies[1]["query"]["bool"]
+
+
+def test_fast_response_matches_default(monkeypatch):
+    from app.config import settings
+    from app.routes import logs as logs_routes
+
+    hits = [{"_id": "1", "sort": [1, "1"], "_source": {"@timestamp": "2025-01-01T00:00:00Z", "message": "ok"}}]
+    monkeypatch.setattr(
+        logs_routes.es_client,
+        "search_logs",
+        lambda index, body, doc_type=None: {"hits": {"total": 1, "hits": hits}},
+    )
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-a"],
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    schema = client.get("/openapi.json").json()
+    default = client.post("/api/logs/query", json=payload, headers=headers).json()
+    monkeypatch.setattr(settings, "FAST_RESPONSE_ENABLED", True)
+    fast = client.post("/api/logs/query", json=payload, headers=headers).json()
+    assert fast == default and fast["data"]["items"][0]["message"] == "ok"
+    ref = schema["paths"]["/api/logs/query"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ref["$ref"].endswith("/QueryResponse")
+
+
+def test_query_byte_budget_returns_cursor_for_remainder(monkeypatch):
+    from app.config import settings
+    from app.routes import logs as logs_routes
+
+    hits = [
+        {"_id": str(i), "sort": [i, str(i)], "_source": {"@timestamp": i, "message": "z" * 500}}
+        for i in range(100)
+    ]
+    bodies = []
+
+    def fake_search(index, body, doc_type=None):
+        bodies.append(body)
+        return {"hits": {"total": 100, "hits": hits[: body["size"]]}}
+
+    monkeypatch.setattr(logs_routes.es_client, "search_logs", fake_search)
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 100},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-a"],
+        "max_response_bytes": 16384,
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    resp = client.post("/api/logs/query", json=payload, headers=headers)
+    data = resp.json()["data"]
+    # The budget lifts MAX_PAGE_SIZE and cuts the page instead
+    assert bodies[0]["size"] == 100
+    assert len(resp.content) <= 16384
+    assert data["truncated"] is True and 0 < len(data["items"]) < 100
+    assert data["next_cursor_after"] == hits[len(data["items"]) - 1]["sort"]
+
+
+def test_server_timing_header_and_phase_metrics(monkeypatch):
+    from app.config import settings
+    from app.metrics.metrics import PHASE_LATENCY
+    from app.routes import logs as logs_routes
+
+    hits = [{"_id": "1", "sort": [1, "1"], "_source": {"@timestamp": "2025-01-01T00:00:00Z", "message": "ok"}}]
+
+    class FakeHttp:
+        def request(self, method, url, json=None, **kwargs):
+            import httpx
+
+            body = {"took": 7, "hits": {"total": 1, "hits": hits}}
+            return httpx.Response(200, json=body, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(settings, "ES_HOSTS", ["http://localhost:9200"])
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+    monkeypatch.setattr(logs_routes.es_client, "_version_major", 6)
+    monkeypatch.setattr(logs_routes.es_client, "_client", FakeHttp())
+    payload = {
+        "tenant_id": "t1",
+        "pagination": {"page": 1, "page_size": 10},
+        "time_range": {"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        "override_indexes": ["logs-a"],
+    }
+    headers = {"Authorization": "Bearer viewer-test", "X-Tenant-Id": "t1"}
+    resp = client.post("/api/logs/query", json=payload, headers=headers)
+    assert resp.json()["data"]["items"][0]["message"] == "ok"
+    names = {p.strip().split(";")[0] for p in resp.headers["server-timing"].split(",")}
+    assert {"auth", "dsl", "es_network", "es_took", "decode", "normalize", "serialize", "total"} <= names
+    assert 'es_took;dur=7.00;desc="localhost:9200"' in resp.headers["server-timing"]
+    took_sum = PHASE_LATENCY.labels(endpoint="query", phase="es_took", cluster="localhost:9200")._sum.get()
+    assert took_sum >= 7
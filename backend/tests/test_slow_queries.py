@@ -0,0 +1,81 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.es.query_adapter import adapt_query_to_es6
+from app.es.slow_queries import SlowQueryLog, dsl_fingerprint
+from app.main import app
+
+
+def _body(tenant, keyword, levels):
+    return adapt_query_to_es6(
+        tenant_id=tenant,
+        pagination={"page": 3, "page_size": 10},
+        time_range={"start": "2025-01-01T00:00:00Z", "end": "2025-01-02T00:00:00Z"},
+        filters={"keyword": keyword, "level": levels},
+    )
+
+
+def test_fingerprint_ignores_literal_values():
+    a = _body("t1", "timeout", ["error"])
+    b = _body("t2", "refused", ["error", "warn"])
+    assert dsl_fingerprint(a) == dsl_fingerprint(b)
+    assert dsl_fingerprint(a) != dsl_fingerprint(_body("t1", None, ["error"]))
+
+
+def test_rolling_stats_are_bounded_and_ranked():
+    log = SlowQueryLog(threshold_ms=50, max_fingerprints=2, samples=4)
+    fast = _body("t1", "x", None)
+    slow = _body("t1", None, ["error"])
+    for ms in (1, 2, 3, 4, 5):
+        log.record(fast, indices=2, latency_ms=ms, took_ms=ms, response_bytes=100)
+    log.record(slow, indices=40, latency_ms=90, took_ms=80, response_bytes=5000)
+    top = log.top(sort_by="total_ms")
+    assert [r["count"] for r in top] == [1, 5]
+    assert top[0]["slow"] == 1 and top[0]["max_indices"] == 40
+    # Only the last 4 samples are kept for percentiles
+    assert top[1]["p50_ms"] == 3 and top[1]["p99_ms"] == 5 and top[1]["total_ms"] == 15
+    log.record({"size": 1}, indices=1, latency_ms=1, took_ms=None, response_bytes=10)
+    assert len(log.top()) == 2
+
+
+def test_slow_queries_endpoint_is_admin_only():
+    client = TestClient(app)
+    viewer = client.get(
+        "/api/debug/slow-queries", headers={"Authorization": "Bearer viewer-x", "X-Tenant-Id": "t1"}
+    ).json()
+    assert viewer["code"] != 0
+    admin = client.get(
+        "/api/debug/slow-queries?limit=5&sort_by=p99_ms",
+        headers={"Authorization": "Bearer admin-x", "X-Tenant-Id": "t1"},
+    ).json()
+    assert admin["code"] == 0 and isinstance(admin["data"]["items"], list)
+
+
+def test_failed_searches_are_recorded(monkeypatch):
+    import httpx
+
+    from app.es.client import ESHttpClient, pool_options
+    from app.es.slow_queries import slow_query_log
+
+    class TimeoutHttp:
+        def request(self, method, url, **kwargs):
+            raise httpx.ReadTimeout("read timed out")
+
+    client = ESHttpClient("http://es:9200", options=pool_options("http://es:9200"))
+    client._version_major = 6
+    client._client = TimeoutHttp()
+    monkeypatch.setattr(slow_query_log, "enabled", True)
+    slow_query_log.clear()
+    body = _body("t1", "timeout", ["error"])
+    try:
+        client.search_logs(index=["logs-a"], body=body)
+    except httpx.ReadTimeout:
+        pass
+    (row,) = slow_query_log.top()
+    assert row["fingerprint"] == dsl_fingerprint(body)
+    assert row["count"] == 1 and row["errors"] == 1 and row["last_error"] == "timeout"
+    assert row["avg_took_ms"] == 0.0
@@ -0,0 +1,120 @@
+"""
+Copyright (c) 2025, elk-MCP Project.
+All rights reserved.
+"""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.es.warmup import StartupWarmup
+from app.main import app
+from app.routes import health
+
+
+class _SlowClient:
+    def __init__(self, cluster, delay):
+        self.cluster = cluster
+        self.delay = delay
+        self.probes = 0
+        self._lock = threading.Lock()
+
+    def _detect_version(self):
+        with self._lock:
+            self.probes += 1
+        time.sleep(self.delay)
+        return 6
+
+
+def test_warmup_runs_steps_in_parallel_within_budget():
+    clients = [_SlowClient(f"es{i}:9200", 0.2) for i in range(3)]
+    refreshed = []
+    warmup = StartupWarmup(budget_s=2.0, connections=2)
+    t0 = time.perf_counter()
+    warmup.run(clients, discovery=lambda: refreshed.append(time.sleep(0.2)))
+    elapsed = time.perf_counter() - t0
+    status = warmup.get_status()
+    assert status["ready"] and not status["timed_out"] and refreshed
+    # Four 0.2s steps (and two probes per client) overlap instead of running serially
+    assert elapsed < 0.5
+    assert all(c.probes == 2 for c in clients)
+    assert set(status["steps"]) == {"version:es0:9200", "version:es1:9200", "version:es2:9200", "index_discovery"}
+    assert status["cold_start_s"] is not None
+
+
+def test_warmup_budget_reports_ready_with_pending_steps():
+    warmup = StartupWarmup(budget_s=0.1, connections=1)
+    t0 = time.perf_counter()
+    warmup.run([_SlowClient("slow:9200", 0.5)])
+    assert time.perf_counter() - t0 < 0.4
+    status = warmup.get_status()
+    assert status["ready"] and status["timed_out"]
+    assert status["steps"]["version:slow:9200"]["status"] == "running"
+
+
+def test_readyz_is_503_until_warm(monkeypatch):
+    warmup = StartupWarmup(budget_s=1.0)
+    monkeypatch.setattr(health, "startup_warmup", warmup)
+    client = TestClient(app)
+    assert client.get("/readyz").status_code == 503
+    warmup.mark_ready()
+    resp = client.get("/readyz")
+    assert resp.status_code == 200 and resp.json()["data"]["ready"] is True
+
+
+class _CatClient:
+    _base_url = "http://es:9200"
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        import httpx
+
+        self.calls += 1
+        if self.down:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, json=[{"index": "logs-a", "docs.count": "1", "pri": "1"}],
+                              request=httpx.Request(method, url))
+
+    def mark_ok(self):
+        pass
+
+    def mark_failed(self, error):
+        pass
+
+
+def test_discovery_retries_when_warmup_refresh_failed():
+    from app.indexes.service import IndexDiscoveryService
+
+    es = _CatClient()
+    service = IndexDiscoveryService(clients=[es])
+    service._enabled = True
+    service._interval_seconds = 3600
+    warmup = StartupWarmup(budget_s=1.0)
+    warmup.run([], discovery=service.refresh_once)
+    # Nothing answered: the step fails and the cache is left alone
+    assert warmup.step_status("index_discovery") == "error" and service.get_indices() == []
+
+    es.down = False
+    service.startup(warmup_status=lambda: warmup.step_status("index_discovery"))
+    try:
+        for _ in range(50):
+            if service.get_indices():
+                break
+            time.sleep(0.02)
+        # The loop did not wait a full interval after the failed warm-up refresh
+        assert service.get_indices() == ["logs-a"]
+    finally:
+        service.shutdown()
+
+    # A successful warm-up refresh is not repeated right away
+    calls = es.calls
+    skipped = IndexDiscoveryService(clients=[es])
+    skipped._interval_seconds = 3600
+    skipped.startup(warmup_status=lambda: "ok")
+    time.sleep(0.1)
+    skipped.shutdown()
+    assert es.calls == calls
@@ -34,6 +34,11 @@ export const LogQueryRequest = z.object({
   sort: SortSpec.default({ field: 'timestamp', order: 'desc' }),
   mode: z.enum(['page', 'cursor']).default('page'),
   cursor_after: z.array(z.union([z.string(), z.number()])).optional(),
+  index_keyword: z.string().optional(),
+  use_regex: z.boolean().optional(),
+  override_indexes: z.array(z.string()).optional(),
+  max_response_bytes: z.number().int().min(4096).max(1048576).optional(),
+  format: z.enum(['rows', 'columnar']).default('rows'),
 });
 
 export const AlertRuleRef = z.object({ id: z.string().min(1), severity: z.string().optional() });
@@ -43,15 +48,41 @@ export const AlertsQueryRequest = z.object({
   time_range: TimeRange,
   severity: z.array(z.enum(['low', 'medium', 'high'])).optional(),
   rules: z.array(AlertRuleRef).optional(),
+  pagination: Pagination.default({ page: 1, page_size: 100 }),
+  mode: z.enum(['page', 'cursor']).default('page'),
+  cursor_after: z.array(z.union([z.string(), z.number()])).optional(),
+  format: z.enum(['rows', 'columnar']).default('rows'),
 });
 
 export const StatsRequest = z.object({
   tenant_id: z.string().min(1),
   time_range: TimeRange,
   group_by: z.enum(['service', 'level', 'host']),
+  mode: z.enum(['terms', 'composite']).default('terms'),
+  page_size: z.number().int().min(1).max(1000).default(100),
+  after_key: z.record(z.union([z.string(), z.number(), z.null()])).optional(),
+});
+
+export const HistogramRequest = z.object({
+  tenant_id: z.string().min(1),
+  time_range: TimeRange,
+  filters: LogQueryFilters.default({}),
+  interval: z.string().regex(/^[1-9][0-9]*[smhd]$/).optional(),
+  group_by: z.enum(['service', 'level', 'host']).optional(),
+  group_size: z.number().int().min(1).max(100).default(10),
+});
+
+export const PatternsRequest = z.object({
+  tenant_id: z.string().min(1),
+  time_range: TimeRange,
+  filters: LogQueryFilters.default({}),
+  max_lines: z.number().int().min(1).max(1000000).optional(),
+  top: z.number().int().min(1).max(200).default(20),
 });
 
 export type TLogQueryRequest = z.infer<typeof LogQueryRequest>;
 export type TAlertsQueryRequest = z.infer<typeof AlertsQueryRequest>;
 export type TStatsRequest = z.infer<typeof StatsRequest>;
+export type THistogramRequest = z.infer<typeof HistogramRequest>;
 
+export type TPatternsRequest = z.infer<typeof PatternsRequest>;